@@ -1,4 +1,3 @@
-import ast
 import logging
 from typing import Iterable, Mapping, Optional
 
@@ -10,6 +9,7 @@ from etlrules.exceptions import (
     MissingColumnError,
     UnsupportedTypeError,
 )
+from etlrules.backends.common.expressions import compile_expression
 from etlrules.backends.common.types import SUPPORTED_TYPES
 from etlrules.rule import UnaryOpBaseRule
 
@@ -138,8 +138,7 @@ class AggregateRule(UnaryOpBaseRule):
                     raise ColumnAlreadyExistsError(f"Column {col} is already being aggregated.")
                 try:
                     perf_logger.warning("Aggregation expression '%s' in AggregateRule is not vectorized and might hurt the overall performance", agg_expr)
-                    _ast_expr = ast.parse(agg_expr, filename=f"{col}_expression.py", mode="eval")
-                    _compiled_expr = compile(_ast_expr, filename=f"{col}_expression.py", mode="eval")
+                    _, _compiled_expr = compile_expression(agg_expr, filename=f"{col}_expression.py")
                     self._aggs[col] = lambda values, bound_compiled_expr=_compiled_expr: eval(
                         bound_compiled_expr, {"isnull": isnull}, {"values": values}
                     )
@@ -13,6 +13,9 @@ class BaseAssignColumnRule(UnaryOpBaseRule, ColumnsInOutMixin):
         self.input_column = input_column
         self.output_column = output_column
 
+    def is_streamable(self):
+        return True
+
     def do_apply(self, df, col):
         raise NotImplementedError()
 
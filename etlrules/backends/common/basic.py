@@ -100,6 +100,9 @@ class ProjectRule(UnaryOpBaseRule):
         ), "ProjectRule: columns must be strings"
         self.exclude = exclude
 
+    def is_streamable(self):
+        return True
+
     def _get_remaining_columns(self, df_column_names):
         columns_set = set(self.columns)
         df_column_names_set = set(df_column_names)
@@ -153,6 +156,9 @@ class RenameRule(UnaryOpBaseRule):
         super().__init__(named_input=named_input, named_output=named_output, name=name, description=description, strict=strict)
         self.mapper = mapper
 
+    def is_streamable(self):
+        return True
+
     def do_rename(self, df, mapper):
         raise NotImplementedError("Have you imported the rules from etlrules.backends.<your_backend> and not common?")
 
@@ -390,6 +396,9 @@ class ExplodeValuesRule(UnaryOpBaseRule, ColumnsInOutMixin):
         if self.column_type is not None and self.column_type not in SUPPORTED_TYPES:
             raise UnsupportedTypeError(f"Type '{self.column_type}' is not supported.")
 
+    def is_streamable(self):
+        return True
+
     def _validate_input_column(self, df):
         if self.input_column not in df.columns:
             raise MissingColumnError(f"Column '{self.input_column}' is not present in the input dataframe.")
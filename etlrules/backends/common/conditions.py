@@ -1,4 +1,4 @@
-from typing import Optional, Union
+from typing import Mapping, Optional, Sequence, Union
 
 from etlrules.exceptions import ColumnAlreadyExistsError, MissingColumnError
 from etlrules.rule import UnaryOpBaseRule
@@ -74,6 +74,9 @@ class IfThenElseRule(UnaryOpBaseRule):
         self.else_column = else_column
         self._condition_expression = self.get_condition_expression()
 
+    def is_streamable(self):
+        return True
+
     def _validate_columns(self, df_columns):
         if self.strict and self.output_column in df_columns:
             raise ColumnAlreadyExistsError(f"Column {self.output_column} already exists in the input dataframe.")
@@ -83,6 +86,114 @@ class IfThenElseRule(UnaryOpBaseRule):
             raise MissingColumnError(f"Column {self.else_column} is missing from the input dataframe.")
 
 
+class CaseWhenRule(UnaryOpBaseRule):
+    """ Calculates the output based on a list of conditions, similar to the SQL CASE WHEN statement.
+
+    The output is taken from the first case whose condition is true. When none of the conditions is true,
+    the output is taken from else_value/else_column (or it's null when neither is set).
+    All the conditions are evaluated in one pass and combined into the output column, which is
+    equivalent to, but more efficient than, chaining multiple IfThenElseRule rules.
+
+    Example::
+
+        Given df:
+        | A   |
+        | 1   |
+        | 5   |
+        | 12  |
+
+        rule = CaseWhenRule([
+            {"condition_expression": "df['A'] < 3", "then_value": "small"},
+            {"condition_expression": "df['A'] < 10", "then_value": "medium"},
+        ], output_column="B", else_value="large")
+        rule.apply(df)
+
+    Result::
+
+        | A   | B      |
+        | 1   | small  |
+        | 5   | medium |
+        | 12  | large  |
+
+    Args:
+        cases: An ordered list of cases. Each case is a dictionary with the keys:
+            condition_expression: An expression as a string. The expression must evaluate to a boolean scalar or a boolean series.
+            then_value: The value to use if the condition is true.
+            then_column: Use the value from the then_column if the condition is true.
+            One and only one of then_value and then_column can be used in each case.
+            A null result of a condition is treated as false.
+        output_column: The column name of the result column which will be added to the dataframe.
+        else_value: The value to use if none of the conditions is true. Optional.
+        else_column: Use the value from the else_column if none of the conditions is true. Optional.
+            At most one of the else_value and else_column can be used. When neither is used, the output is null
+            for the rows not matching any of the conditions.
+
+        named_input: Which dataframe to use as the input. Optional.
+            When not set, the input is taken from the main output.
+            Set it to a string value, the name of an output dataframe of a previous rule.
+        named_output: Give the output of this rule a name so it can be used by another rule as a named input. Optional.
+            When not set, the result of this rule will be available as the main output.
+            When set to a name (string), the result will be available as that named output.
+        name: Give the rule a name. Optional.
+            Named rules are more descriptive as to what they're trying to do/the intent.
+        description: Describe in detail what the rules does, how it does it. Optional.
+            Together with the name, the description acts as the documentation of the rule.
+        strict: When set to True, the rule does a stricter valiation. Default: True
+
+    Raises:
+        ColumnAlreadyExistsError: raised in strict mode only if a column with the same name already exists in the dataframe.
+        ExpressionSyntaxError: raised if any of the condition expressions has a Python syntax error.
+        MissingColumnError: raised when a then_column or the else_column is used but it is missing from the input dataframe.
+        TypeError: raised if an operation is not supported between the types involved
+        NameError: raised if an unknown variable is used
+        KeyError: raised if you try to use an unknown column (i.e. df['ANY_UNKNOWN_COLUMN'])
+    """
+
+    EXCLUDE_FROM_COMPARE = ('_condition_expressions', )
+
+    CASE_KEYS = ("condition_expression", "then_value", "then_column")
+
+    def __init__(self, cases: Sequence[Mapping[str, Union[int,float,bool,str]]], output_column: str,
+                 else_value: Optional[Union[int,float,bool,str]]=None, else_column: Optional[str]=None,
+                 named_input: Optional[str]=None, named_output: Optional[str]=None, name: Optional[str]=None, description: Optional[str]=None, strict: bool=True):
+        super().__init__(named_input=named_input, named_output=named_output, name=name, description=description, strict=strict)
+        assert cases, "cases cannot be empty"
+        assert else_value is None or else_column is None, "At most one of else_value and else_column can be specified."
+        assert output_column, "output_column cannot be empty"
+        self.cases = []
+        for case in cases:
+            unknown_keys = set(case.keys()) - set(self.CASE_KEYS)
+            assert not unknown_keys, f"Unknown keys {sorted(unknown_keys)} in case {case}."
+            assert case.get("condition_expression"), "condition_expression cannot be empty"
+            assert bool(case.get("then_value") is None) != bool(case.get("then_column") is None), "One and only one of then_value and then_column can be specified."
+            self.cases.append({key: case[key] for key in self.CASE_KEYS if case.get(key) is not None})
+        self.output_column = output_column
+        self.else_value = else_value
+        self.else_column = else_column
+        self._condition_expressions = [
+            self.get_condition_expression(case["condition_expression"], idx) for idx, case in enumerate(self.cases)
+        ]
+
+    def is_streamable(self):
+        return True
+
+    def get_condition_expression(self, condition_expression: str, idx: int):
+        raise NotImplementedError("Have you imported the rules from etlrules.backends.<your_backend> and not common?")
+
+    def _has_str_values(self) -> bool:
+        return any(isinstance(case.get("then_value"), str) for case in self.cases) or isinstance(self.else_value, str)
+
+    def _validate_columns(self, df_columns):
+        if self.strict and self.output_column in df_columns:
+            raise ColumnAlreadyExistsError(f"Column {self.output_column} already exists in the input dataframe.")
+        columns = [case["then_column"] for case in self.cases if "then_column" in case]
+        if self.else_column is not None:
+            columns.append(self.else_column)
+        for column in columns:
+            if column not in df_columns:
+                raise MissingColumnError(f"Column {column} is missing from the input dataframe.")
+
+
 class FilterRule(UnaryOpBaseRule):
     """ Exclude rows based on a condition.
 
@@ -150,3 +261,6 @@ class FilterRule(UnaryOpBaseRule):
         self.discard_matching_rows = discard_matching_rows
         self.named_output_discarded = named_output_discarded
         self._condition_expression = self.get_condition_expression()
+
+    def is_streamable(self):
+        return True
@@ -1,21 +1,286 @@
 import ast
-from typing import Optional
+import functools
+import logging
+import math
+import numpy as np
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Optional, Sequence
 
+from etlrules.backends.common import jit
+from etlrules.data import context
 from etlrules.exceptions import ExpressionSyntaxError
 
 
+perf_logger = logging.getLogger("etlrules.perf")
+
+EVAL_MODE_VECTORIZED = "vectorized"
+EVAL_MODE_ROWWISE = "rowwise"
+
+# dataframes with fewer rows than this are evaluated row by row in the current process
+# as starting the worker processes and sending the data to them takes longer
+PARALLEL_MIN_ROWS = 100_000
+
+# the rows are split in this many chunks per worker process to balance the load between the workers
+PARALLEL_CHUNKS_PER_WORKER = 4
+
+# maximum number of compiled expressions (and Expression objects) kept in the process-wide caches
+EXPRESSIONS_CACHE_SIZE = 1024
+
+
+@functools.lru_cache(maxsize=EXPRESSIONS_CACHE_SIZE)
+def compile_expression(expression_str: str, filename: str, mode: str="eval") -> tuple[ast.AST, Any]:
+    """ Parses and compiles an expression, returning the ast and the code object.
+
+    The results are cached process-wide by the expression, filename and mode.
+    Raises SyntaxError if the expression is not valid Python (errors are not cached).
+    """
+    ast_expr = ast.parse(expression_str, filename=filename, mode=mode)
+    return ast_expr, compile(ast_expr, filename=filename, mode=mode)
+
+
+@functools.lru_cache(maxsize=EXPRESSIONS_CACHE_SIZE)
+def _get_expression(expression_cls: type, expression_str: str, filename: Optional[str]) -> "Expression":
+    return expression_cls(expression_str, filename)
+
+
+def clear_expressions_cache() -> None:
+    """ Clears the process-wide caches of compiled expressions (including the jit compiled kernels). """
+    compile_expression.cache_clear()
+    _get_expression.cache_clear()
+    jit.clear_jit_kernels()
+
+
+def get_expression_workers() -> int:
+    """ Returns the number of worker processes used to evaluate the expressions which cannot be vectorized.
+
+    It's set via the ETLRULES_EXPRESSION_WORKERS environment variable. When not set (or set to 0 or 1),
+    the expressions are evaluated in the current process.
+    """
+    workers = os.environ.get("ETLRULES_EXPRESSION_WORKERS")
+    if not workers:
+        return 0
+    try:
+        return int(workers)
+    except ValueError:
+        raise ValueError(f"Invalid value '{workers}' for ETLRULES_EXPRESSION_WORKERS: expected the number of worker processes.")
+
+
+def _eval_rows(compiled_expr: Any, columns: Sequence[str], columns_values: Sequence[Sequence[Any]]) -> list[Any]:
+    return [
+        eval(compiled_expr, {}, {'df': dict(zip(columns, row)), 'context': context})
+        for row in zip(*columns_values)
+    ]
+
+
+_EXECUTOR = None
+_EXECUTOR_WORKERS = 0
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _get_executor(workers: int) -> ProcessPoolExecutor:
+    """ Returns the process-wide pool of worker processes, created on first use and recreated when the number of workers changes. """
+    global _EXECUTOR, _EXECUTOR_WORKERS
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None or _EXECUTOR_WORKERS != workers:
+            if _EXECUTOR is not None:
+                # the evaluations in progress in other threads are completed
+                _EXECUTOR.shutdown(wait=False)
+            _EXECUTOR = ProcessPoolExecutor(max_workers=workers)
+            _EXECUTOR_WORKERS = workers
+        return _EXECUTOR
+
+
+def shutdown_expression_workers() -> None:
+    """ Shuts down the pool of worker processes evaluating the expressions (it's recreated when next needed). """
+    global _EXECUTOR, _EXECUTOR_WORKERS
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is not None:
+            _EXECUTOR.shutdown()
+        _EXECUTOR = None
+        _EXECUTOR_WORKERS = 0
+
+
+def _eval_rows_chunk(expression_str: str, filename: str, context_snapshot: dict[str, Any],
+                     columns: Sequence[str], columns_values: Sequence[Sequence[Any]]) -> list[Any]:
+    # runs in the worker processes, the compiled expressions are cached in each worker
+    _, compiled_expr = compile_expression(expression_str, filename)
+    # only the values sent from the parent process are visible (not the ones inherited by a forked worker)
+    mappers, context.mappers = context.mappers, [context_snapshot]
+    try:
+        return _eval_rows(compiled_expr, columns, columns_values)
+    finally:
+        context.mappers = mappers
+
+
+def _get_referenced_keys(ast_expr: ast.AST, name: str, allow_attributes: bool) -> Optional[tuple[str, ...]]:
+    keys = {}
+    referenced = set()
+    for node in ast.walk(ast_expr):
+        if isinstance(node, (ast.Subscript, ast.Attribute)) and isinstance(node.value, ast.Name) and node.value.id == name:
+            if isinstance(node, ast.Subscript) and isinstance(node.slice, ast.Constant) and isinstance(node.slice.value, str):
+                keys[node.slice.value] = True
+                referenced.add(id(node.value))
+            elif isinstance(node, ast.Attribute) and allow_attributes:
+                keys[node.attr] = True
+                referenced.add(id(node.value))
+    for node in ast.walk(ast_expr):
+        if isinstance(node, ast.Name) and node.id == name and id(node) not in referenced:
+            return None
+    return tuple(keys)
+
+
+def get_referenced_columns(ast_expr: ast.AST) -> Optional[tuple[str, ...]]:
+    """ Returns the columns referenced in an expression as df['COL'] (in order of first use).
+
+    Returns None if the dataframe is used in any other way in the expression (e.g. df.COL,
+    df[some_variable] or df passed to a function) as it's not possible to determine statically
+    which columns are needed to evaluate the expression in that case.
+    """
+    return _get_referenced_keys(ast_expr, "df", allow_attributes=False)
+
+
+def get_referenced_context_values(ast_expr: ast.AST) -> Optional[tuple[str, ...]]:
+    """ Returns the context values referenced in an expression as context.VAL or context['VAL'].
+
+    Returns None if the context is used in any other way in the expression.
+    """
+    return _get_referenced_keys(ast_expr, "context", allow_attributes=True)
+
+
 class Expression:
     def __init__(self, expression_str: str, filename: Optional[str]) -> None:
         self.filename = filename or "Expression.py"
         assert expression_str and isinstance(expression_str, str), f"expression_str cannot be empty in {self.filename}"
         self.expression_str = expression_str
         try:
-            self._ast_expr = ast.parse(
-                self.expression_str, filename=self.filename, mode='eval'
-            )
-            self._compiled_expr = compile(self._ast_expr, filename=self.filename, mode='eval')
+            self._ast_expr, self._compiled_expr = compile_expression(self.expression_str, self.filename)
         except SyntaxError as exc:
             raise ExpressionSyntaxError(f"Error in expression '{self.expression_str}': {str(exc)}")
+        self._columns = get_referenced_columns(self._ast_expr)
+        self._context_values = get_referenced_context_values(self._ast_expr)
+        self._eval_modes = {}
+        self._jit_source = None
+        if jit.HAS_NUMBA and self._columns and self._context_values is not None:
+            self._jit_source = jit.JitTranslator(self._ast_expr, self._columns, self._context_values).source
+
+    @classmethod
+    def get(cls, expression_str: str, filename: Optional[str]) -> "Expression":
+        """ Returns a (possibly shared) expression object for the given expression and filename.
+
+        The expression objects are kept in a bounded process-wide LRU cache, so rules using
+        the same expression (e.g. when reloading a plan) don't parse, compile and analyse it again
+        and share the analysis done when evaluating it (e.g. vectorized vs row level evaluation).
+        """
+        return _get_expression(cls, expression_str, filename)
+
+    def _get_schema_key(self, df) -> Optional[tuple]:
+        """ Returns a key describing the types of the inputs of the expression or None if it cannot be determined.
+
+        The key is made of the types of the columns referenced in the expression (or all columns when those
+        cannot be determined) and the types of the context values used in the expression.
+        Object columns can hold values of any type, in which case the evaluation mode depends on the values
+        and not just the types of the columns, so None is returned and the evaluation mode is not cached.
+        """
+        dtypes = dict(zip(df.columns, df.dtypes))
+        columns = self._columns if self._columns is not None else tuple(dtypes.keys())
+        columns_key = tuple((col, str(dtypes.get(col))) for col in columns)
+        if any(dtype.lower() == "object" for _, dtype in columns_key):
+            return None
+        if self._context_values is None:
+            return None
+        context_key = []
+        for context_value in self._context_values:
+            try:
+                context_key.append((context_value, type(context[context_value]).__name__))
+            except (KeyError, RuntimeError):
+                context_key.append((context_value, None))
+        return columns_key, tuple(context_key)
+
+    def _get_eval_mode(self, schema_key: Optional[tuple]) -> Optional[str]:
+        return self._eval_modes.get(schema_key) if schema_key is not None else None
+
+    def _set_eval_mode(self, schema_key: Optional[tuple], mode: str) -> None:
+        if schema_key is not None and schema_key not in self._eval_modes:
+            self._eval_modes[schema_key] = mode
+            perf_logger.info("Expression '%s' is evaluated %s for the input types: %s", self.expression_str, mode, schema_key)
+
+    def _eval_rows(self, columns_values: Sequence[Sequence[Any]], parallel: bool=True) -> list[Any]:
+        """ Evaluates the expression row by row.
+
+        Only the values of the columns referenced in the expression are needed (in the order
+        given by the _columns attribute), which avoids materializing every row of the dataframe.
+        When parallel is True and ETLRULES_EXPRESSION_WORKERS is set, large inputs are split
+        in chunks evaluated in a pool of worker processes.
+        """
+        workers = get_expression_workers() if parallel else 0
+        if workers > 1 and columns_values and len(columns_values[0]) >= PARALLEL_MIN_ROWS:
+            return self._eval_rows_parallel(columns_values, workers)
+        return _eval_rows(self._compiled_expr, self._columns, columns_values)
+
+    def _get_context_snapshot(self) -> dict[str, Any]:
+        """ Returns the context values used by the expression (or the whole context if they cannot be determined). """
+        if self._context_values is None:
+            return {key: value for mapper in context.mappers for key, value in mapper.items()}
+        snapshot = {}
+        for context_value in self._context_values:
+            try:
+                snapshot[context_value] = context[context_value]
+            except (KeyError, RuntimeError):
+                # the worker raises the same error when evaluating the expression
+                ...
+        return snapshot
+
+    def _eval_rows_parallel(self, columns_values: Sequence[Sequence[Any]], workers: int) -> list[Any]:
+        """ Evaluates the expression row by row in a pool of worker processes.
+
+        The rows are split in chunks which are evaluated by the workers and the results are
+        reassembled in order. The pool is shared by all the evaluations in the process (see _get_executor),
+        the context values used by the expression are sent with each chunk.
+        """
+        nb_rows = len(columns_values[0])
+        chunk_size = math.ceil(nb_rows / (workers * PARALLEL_CHUNKS_PER_WORKER))
+        perf_logger.info("Evaluating expression '%s' on %s rows in %s worker processes", self.expression_str, nb_rows, workers)
+        executor = _get_executor(workers)
+        context_snapshot = self._get_context_snapshot()
+        futures = [
+            executor.submit(
+                _eval_rows_chunk, self.expression_str, self.filename, context_snapshot, self._columns,
+                [values[start:start + chunk_size] for values in columns_values]
+            )
+            for start in range(0, nb_rows, chunk_size)
+        ]
+        result = []
+        for future in futures:
+            result.extend(future.result())
+        return result
+
+    def _can_eval_rows_jit(self, nb_rows: int) -> bool:
+        return self._jit_source is not None and nb_rows >= jit.JIT_MIN_ROWS
+
+    def _eval_rows_jit(self, columns_values: Sequence[Optional[np.ndarray]]) -> Optional[np.ndarray]:
+        """ Evaluates the expression row by row with a numba compiled kernel.
+
+        The columns_values are numpy arrays (without NAs) of the columns referenced in the expression
+        (in the order given by the _columns attribute). Returns None when the expression cannot be
+        jit compiled for the given inputs, in which case the caller should use _eval_rows instead.
+        """
+        if any(values is None or values.dtype.kind not in jit.JIT_DTYPE_KINDS for values in columns_values):
+            return None
+        context_values = []
+        for context_value in self._context_values:
+            try:
+                value = context[context_value]
+            except (KeyError, RuntimeError):
+                return None
+            if type(value) not in (int, float, bool):
+                return None
+            context_values.append(value)
+        kernel = jit.get_jit_kernel(self._jit_source, columns_values, context_values)
+        if kernel is None:
+            return None
+        return kernel(columns_values, context_values)
 
     def eval(self, df):
         raise NotImplementedError("Have you imported the rules from etlrules.backends.<your_backend> and not common?")
@@ -0,0 +1,106 @@
+import bz2
+import io
+import lzma
+import os
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+
+# the size of the blocks compressed in parallel, each block is compressed independently of the others
+COMPRESS_BLOCK_SIZE = 8 * 1024 * 1024
+
+
+def _compress_gzip(data: bytes) -> bytes:
+    # level 6, the default of the gzip tool, wbits=31 for a gzip member (header and trailer)
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _compress_bz2(data: bytes) -> bytes:
+    return bz2.compress(data)
+
+
+def _compress_xz(data: bytes) -> bytes:
+    return lzma.compress(data, format=lzma.FORMAT_XZ)
+
+
+def _compress_zstd(data: bytes) -> bytes:
+    import pyarrow as pa
+    return pa.Codec("zstd").compress(data, asbytes=True)
+
+
+# all the compressors release the GIL while compressing
+COMPRESSORS = {
+    'gzip': _compress_gzip,
+    'bz2': _compress_bz2,
+    'xz': _compress_xz,
+    'zstd': _compress_zstd,
+}
+
+
+class ParallelCompressedWriter(io.RawIOBase):
+    """ A binary file which compresses the data written into it in blocks, in parallel in worker threads.
+
+    The data is split in blocks of block_size bytes and each block is compressed independently in a thread pool,
+    while the next blocks are being written. The compressed blocks are written to the file in order, as multiple
+    gzip members, bz2/xz streams or zstd frames, which are decompressed as a single file by the standard tools
+    (gzip, bzip2, xz, zstd) and libraries.
+
+    Args:
+        file_path: The path of the compressed file to write.
+        compression: One of gzip, bz2, xz or zstd.
+        max_workers: The maximum number of blocks compressed in parallel. Defaults to None, which uses
+            the Python default for thread pools.
+        block_size: The size in bytes of the blocks compressed independently. Defaults to COMPRESS_BLOCK_SIZE (8MB).
+    """
+
+    def __init__(self, file_path: str, compression: str, max_workers: Optional[int]=None, block_size: Optional[int]=None):
+        super().__init__()
+        assert compression in COMPRESSORS, f"Unsupported compression '{compression}'. It must be one of: {COMPRESSORS.keys()}."
+        self._compress = COMPRESSORS[compression]
+        self.block_size = block_size or COMPRESS_BLOCK_SIZE
+        # the number of compressed blocks kept in memory waiting to be written is bounded
+        self._max_pending = 2 * (max_workers or os.cpu_count() or 1)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._pending = deque()
+        self._buffer = bytearray()
+        self._blocks = 0
+        self._file = open(file_path, "wb")
+
+    def writable(self) -> bool:
+        return True
+
+    def _write_pending(self, max_pending: int) -> None:
+        while len(self._pending) > max_pending:
+            self._file.write(self._pending.popleft().result())
+
+    def _submit(self, block: bytes) -> None:
+        self._pending.append(self._executor.submit(self._compress, block))
+        self._blocks += 1
+        self._write_pending(self._max_pending)
+
+    def write(self, data) -> int:
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+        self._buffer += data
+        while len(self._buffer) >= self.block_size:
+            block = bytes(self._buffer[:self.block_size])
+            del self._buffer[:self.block_size]
+            self._submit(block)
+        return memoryview(data).nbytes
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            if self._buffer or not self._blocks:
+                # an empty file is still a valid compressed file
+                self._submit(bytes(self._buffer))
+                self._buffer.clear()
+            self._write_pending(0)
+        finally:
+            self._executor.shutdown(cancel_futures=True)
+            self._file.close()
+            super().close()
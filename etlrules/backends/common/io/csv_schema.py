@@ -0,0 +1,162 @@
+import bz2
+import contextlib
+import gzip
+import hashlib
+import json
+import logging
+import lzma
+import os
+import threading
+import zipfile
+from typing import Dict, Mapping, Optional
+
+from etlrules.backends.common.types import SUPPORTED_TYPES
+
+
+perf_logger = logging.getLogger("etlrules.perf")
+
+CSV_SCHEMA_CACHE_VERSION = 1
+
+# the size of the chunks read from the start of a file until the header line is found
+HEADER_CHUNK_SIZE = 64 * 1024
+
+
+def read_header_line(file_path: str, skip_rows: int=0) -> Optional[str]:
+    """ Returns the header line of a (compressed) csv file, after skip_rows lines, or None if it cannot be read.
+
+    Only the start of the file is read (and decompressed).
+    """
+    import pyarrow as pa
+    _, ext = os.path.splitext(file_path)
+    data = b""
+    try:
+        with contextlib.ExitStack() as stack:
+            if ext == ".zip":
+                zarch = stack.enter_context(zipfile.ZipFile(file_path, "r"))
+                f = stack.enter_context(zarch.open(zarch.namelist()[0]))
+            elif ext == ".zst":
+                f = stack.enter_context(pa.CompressedInputStream(pa.OSFile(file_path), "zstd"))
+            else:
+                opener = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}.get(ext, open)
+                f = stack.enter_context(opener(file_path, "rb"))
+            while data.count(b"\n") <= skip_rows:
+                chunk = f.read(HEADER_CHUNK_SIZE)
+                if not chunk:
+                    break
+                data += chunk
+    except (OSError, ValueError, EOFError, IndexError, zipfile.BadZipFile, lzma.LZMAError):
+        # e.g. a compression not matching the extension, the file is read without the cache
+        return None
+    lines = data.split(b"\n")
+    if len(lines) <= skip_rows or not lines[skip_rows].strip():
+        return None
+    return lines[skip_rows].rstrip(b"\r").decode("utf-8", errors="replace")
+
+
+def get_schema_key(file_pattern: str, header: str) -> str:
+    """ Returns the key of the schema of the csv files matching file_pattern with the given header line. """
+    return hashlib.sha1(f"{file_pattern}\0{header}".encode("utf-8")).hexdigest()
+
+
+def _is_numeric_type(column_type: str) -> bool:
+    return column_type.startswith(("int", "uint", "float"))
+
+
+def widen_column_types(column_types: Mapping[str, str], other_types: Mapping[str, str]) -> Dict[str, str]:
+    """ Returns the column types which can hold the data of both column_types and other_types.
+
+    Used to combine the types inferred from the batches of a file. A column with different numeric types gets
+    float64 if any of them is a float (int64 otherwise) and a column with otherwise different types gets string.
+    """
+    widened_types = dict(column_types)
+    for col, other_type in other_types.items():
+        column_type = widened_types.get(col)
+        if column_type is None or column_type == other_type:
+            widened_types[col] = other_type
+        elif _is_numeric_type(column_type) and _is_numeric_type(other_type):
+            widened_types[col] = "float64" if "float" in column_type or "float" in other_type else "int64"
+        else:
+            widened_types[col] = "string"
+    return widened_types
+
+
+class CsvSchemaCache:
+    """ A cache of the column types inferred from csv files, persisted in json state files.
+
+    The column types are keyed by the pattern of the files (their directory and name before any substitutions,
+    e.g. a regular expression or a name with a {context.date} placeholder) and the header line of the files,
+    such that the files with different columns get their own schemas. A json state file can hold the schemas
+    of multiple patterns (e.g. be shared by multiple rules).
+
+    The hits, misses and mismatches (the data no longer matches the cached types) are counted (see get_stats)
+    and logged to the etlrules.perf logger.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = self._empty_stats()
+
+    def _empty_stats(self) -> dict:
+        return {"hits": 0, "misses": 0, "mismatches": 0}
+
+    def count(self, **counts: int) -> None:
+        with self._lock:
+            for key, value in counts.items():
+                self._stats[key] += value
+
+    def get_stats(self) -> dict:
+        """ Returns the counters of the cache: hits, misses and mismatches (the schema was inferred again). """
+        with self._lock:
+            return dict(self._stats)
+
+    def clear_stats(self) -> None:
+        """ Resets the counters. The schemas persisted on disk are kept. """
+        with self._lock:
+            self._stats = self._empty_stats()
+
+    def _load(self, cache_file: str) -> Dict[str, dict]:
+        if not os.path.exists(cache_file):
+            return {}
+        try:
+            with open(cache_file, "rt") as f:
+                cache = json.load(f)
+        except ValueError:
+            # a corrupt cache file is treated as empty and rewritten
+            return {}
+        if not isinstance(cache, dict) or cache.get("version") != CSV_SCHEMA_CACHE_VERSION:
+            return {}
+        return cache.get("schemas", {})
+
+    def get(self, cache_file: str, key: str) -> Optional[Dict[str, str]]:
+        """ Returns the column types cached under key or None if not cached. """
+        with self._lock:
+            entry = self._load(cache_file).get(key)
+        column_types = entry.get("column_types") if isinstance(entry, dict) else None
+        if not isinstance(column_types, dict) or any(column_type not in SUPPORTED_TYPES for column_type in column_types.values()):
+            return None
+        return column_types
+
+    def put(self, cache_file: str, key: str, file_pattern: str, header: str, column_types: Mapping[str, str]) -> None:
+        """ Stores the column types under key, replacing the cache file atomically. """
+        with self._lock:
+            schemas = self._load(cache_file)
+            schemas[key] = {"file_pattern": file_pattern, "header": header, "column_types": dict(column_types)}
+            cache_dir = os.path.dirname(os.path.abspath(cache_file))
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_file = f"{cache_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_file, "wt") as f:
+                json.dump({"version": CSV_SCHEMA_CACHE_VERSION, "schemas": schemas}, f, indent=1, sort_keys=True)
+            os.replace(tmp_file, cache_file)
+
+
+CSV_SCHEMA_CACHE = CsvSchemaCache()
+
+
+def get_csv_schema_cache_stats() -> dict:
+    """ Returns the counters of the process-wide csv schema cache. """
+    return CSV_SCHEMA_CACHE.get_stats()
+
+
+def clear_csv_schema_cache_stats() -> None:
+    """ Resets the counters of the process-wide csv schema cache. """
+    CSV_SCHEMA_CACHE.clear_stats()
@@ -215,6 +215,17 @@ class WriteSQLTableRule(UnaryOpBaseRule):
     def has_output(self):
         return False
 
+    def is_streamable(self):
+        return True
+
+    def write_batches(self, dfs) -> None:
+        """ Writes the dataframes one by one into the table.
+
+        The if_exists option applies to the first dataframe, the subsequent ones are appended to the table.
+        Used by the streaming mode of the RuleEngine to process inputs larger than the available memory.
+        """
+        raise NotImplementedError("Have you imported the rules from etlrules.backends.<your_backend> and not common?")
+
     def _get_sql_engine(self) -> str:
         sql_engine = subst_string(self.sql_engine)
         if not sql_engine:
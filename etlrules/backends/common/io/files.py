@@ -1,56 +1,172 @@
-import os, re
-from typing import List, NoReturn, Optional, Sequence, Tuple, Union
+import bz2, contextlib, gzip, json, logging, lzma, os, re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, NoReturn, Optional, Sequence, Tuple, Union
 
+from etlrules.exceptions import MissingColumnError, UnsupportedTypeError
 from etlrules.rule import BaseRule, UnaryOpBaseRule
+from etlrules.backends.common.io.compression import ParallelCompressedWriter
+from etlrules.backends.common.io.csv_schema import CSV_SCHEMA_CACHE, get_schema_key, read_header_line, widen_column_types
+from etlrules.backends.common.io.http_cache import HTTP_CACHE, get_http_cache_dir
+from etlrules.backends.common.io.http_download import downloaded_file, open_uri
+from etlrules.backends.common.io.manifest import FileManifest
+from etlrules.backends.common.io.parquet_metadata import PARQUET_METADATA_CACHE, row_group_may_match
 from etlrules.backends.common.substitution import subst_string
+from etlrules.backends.common.types import SUPPORTED_TYPES
+
+
+perf_logger = logging.getLogger("etlrules.perf")
+
+# the number of rows converted to csv at once by the pyarrow csv writer (its default is 1024)
+ARROW_CSV_BATCH_SIZE = 64 * 1024
+
+# the number of rows read from the start of a file for the columns and types of the empty result
+# of an incremental read with no new or changed files
+EMPTY_READ_ROWS = 1000
+
+
+def is_uri(file_path: str) -> bool:
+    """ Returns True if the file path is a http(s) URI rather than a local file. """
+    file_path = file_path.lower()
+    return file_path.startswith("http://") or file_path.startswith("https://")
 
 
 class BaseReadFileRule(BaseRule):
-    def __init__(self, file_name: str, file_dir: Optional[str]=None, regex: bool=False, named_output: Optional[str]=None, name: Optional[str]=None, description: Optional[str]=None, strict: bool=True):
+
+    # when True, the URIs are downloaded into temporary files which are read (and removed) by do_read/do_read_batches
+    # the backends which read lazily (e.g. dask) or which read only parts of the remote files leave it False
+    DOWNLOAD_URIS = False
+
+    def __init__(self, file_name: str, file_dir: Optional[str]=None, regex: bool=False, max_workers: Optional[int]=None,
+                 manifest_file: Optional[str]=None, manifest_hash: bool=False,
+                 named_output: Optional[str]=None, name: Optional[str]=None, description: Optional[str]=None, strict: bool=True):
         super().__init__(named_output=named_output, name=name, description=description, strict=strict)
         self.file_name = file_name
         self.file_dir = file_dir
         self.regex = bool(regex)
         if self._is_uri() and self.regex:
             raise ValueError("Regex read not supported for URIs.")
+        assert max_workers is None or (isinstance(max_workers, int) and max_workers > 0), "max_workers must be a positive integer."
+        self.max_workers = max_workers
+        self.manifest_file = manifest_file
+        self.manifest_hash = bool(manifest_hash)
+        if self.manifest_file is not None and self._is_uri():
+            raise ValueError("Incremental reads (manifest_file) not supported for URIs.")
 
     def _is_uri(self):
-        file_name = self.file_name.lower()
-        return file_name.startswith("http://") or file_name.startswith("https://")
+        return is_uri(self.file_name)
 
     def has_input(self):
         return False
 
+    def is_streamable(self):
+        return True
+
     def _get_full_file_paths(self):
         file_name = subst_string(self.file_name)
         file_dir = subst_string(self.file_dir or "")
         if self.regex:
             pattern = re.compile(file_name)
-            for fn in os.listdir(file_dir):
+            # sorted for a deterministic order of the rows in the result
+            for fn in sorted(os.listdir(file_dir)):
                 if pattern.match(fn):
                     yield os.path.join(file_dir, fn)
         else:
             if self._is_uri():
-                yield file_name
+                http_cache_dir = get_http_cache_dir()
+                # the local copy is read when the file is cached and not modified on the server
+                yield HTTP_CACHE.get(file_name, http_cache_dir) if http_cache_dir else file_name
             else:
                 yield os.path.join(file_dir, file_name)
 
     def do_read(self, file_path: str):
         raise NotImplementedError("Have you imported the rules from etlrules.backends.<your_backend> and not common?")
 
-    def do_concat(self, left_df, right_df):
+    def do_concat(self, dfs: Sequence):
         raise NotImplementedError("Have you imported the rules from etlrules.backends.<your_backend> and not common?")
 
+    def do_read_batches(self, file_path: str, batch_size: int) -> Iterator:
+        raise NotImplementedError("Have you imported the rules from etlrules.backends.<your_backend> and not common?")
+
+    def do_empty(self, df):
+        """ Returns an empty dataframe with the same columns and types as df. """
+        return df.head(0)
+
+    def do_read_empty(self, file_path: str):
+        """ Returns an empty dataframe with the columns and types of a file, without reading the whole file.
+
+        Only the first batch (of up to EMPTY_READ_ROWS rows) is read and the types are inferred from it.
+        The lazy readers (dask) only build the dataframe, which reads the start of the file or its schema.
+        """
+        if not self.is_streamable():
+            return self.do_empty(self.do_read(file_path))
+        with contextlib.closing(self.do_read_batches(file_path, EMPTY_READ_ROWS)) as batches:
+            for df in batches:
+                return self.do_empty(df)
+        # a file without any rows
+        return self.do_empty(self.do_read(file_path))
+
+    @contextlib.contextmanager
+    def _local_file(self, file_path: str) -> Iterator[str]:
+        """ Yields a temporary local copy of an URI when DOWNLOAD_URIS is set or the file path itself otherwise.
+
+        The URIs are downloaded with parallel range requests when the server supports them (see http_download.download).
+        """
+        if self.DOWNLOAD_URIS and is_uri(file_path):
+            with downloaded_file(file_path) as local_path:
+                yield local_path
+        else:
+            yield file_path
+
+    def do_read_files(self, file_paths: Sequence[str]):
+        """ Reads multiple files and concatenates them into a single dataframe, in the order of the file paths. """
+        if self.max_workers != 1:
+            # the readers release the GIL so the files can be read in parallel in threads
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                dfs = list(executor.map(self.do_read, file_paths))
+        else:
+            dfs = [self.do_read(file_path) for file_path in file_paths]
+        return self.do_concat(dfs)
+
+    def _get_files_to_read(self, data) -> Tuple[List[str], List[str]]:
+        """ Returns the files to read (only the new or changed ones when a manifest_file is set) and all the files matched.
+
+        The manifest is updated via a pending commit on data, i.e. only when the whole plan succeeds.
+        """
+        file_paths = list(self._get_full_file_paths())
+        if not file_paths:
+            raise IOError(f"No files matching '{self.file_name}' found in '{self.file_dir}'.")
+        if self.manifest_file is None:
+            return file_paths, file_paths
+        manifest = FileManifest(subst_string(self.manifest_file), use_hash=self.manifest_hash)
+        new_file_paths, entries = manifest.get_new_or_changed(file_paths)
+        if data is not None:
+            data.add_pending_commit(lambda: manifest.commit(entries))
+        return new_file_paths, file_paths
+
+    def iter_batches(self, batch_size: int, data=None) -> Iterator:
+        """ Yields the data as dataframes of (up to) batch_size rows, reading the files one by one.
+
+        Used by the streaming mode of the RuleEngine to process inputs larger than the available memory.
+        The RuleData instance (data) receives the pending commit of the manifest for the incremental reads.
+        """
+        assert isinstance(batch_size, int) and batch_size > 0, "batch_size must be a positive integer."
+        file_paths, _ = self._get_files_to_read(data)
+        for file_path in file_paths:
+            with self._local_file(file_path) as local_path:
+                yield from self.do_read_batches(local_path, batch_size)
+
     def apply(self, data):
         super().apply(data)
 
-        result = None
-        for file_path in self._get_full_file_paths():
-            df = self.do_read(file_path)
-            if result is None:
-                result = df
-            else:
-                result = self.do_concat(result, df)
+        file_paths, all_file_paths = self._get_files_to_read(data)
+        if not file_paths:
+            # no new or changed files since the last run, the columns are taken from the start of the last file matched
+            result = self.do_read_empty(all_file_paths[-1])
+        elif len(file_paths) > 1:
+            result = self.do_read_files(file_paths)
+        else:
+            with self._local_file(file_paths[0]) as local_path:
+                result = self.do_read(local_path)
         self._set_output_df(data, result)
 
 
@@ -73,26 +189,73 @@ class ReadCSVFileRule(BaseReadFileRule):
         rule = ReadCSVFileRule("data[0-9]{4}.csv", "/home/myuser/", regex=True, named_output="input_data")
         rule.apply(data)
 
+        # reads a file data.csv with the column types specified rather than inferred from the data
+        # and the column Date parsed as a datetime from the day/month/year format
+        rule = ReadCSVFileRule("data.csv", "/home/myuser/", column_types={"A": "int64", "B": "string"}, date_formats={"Date": "%d/%m/%Y"})
+        rule.apply(data)
+
     Args:
         file_name: The name of the csv file to load. The format will be inferred from the extension of the file.
-            A simple text csv file will be inferred from the .csv extension. The extensions like .zip, .gz, .bz2, .xz
+            A simple text csv file will be inferred from the .csv extension. The extensions like .zip, .gz, .bz2, .xz, .zst
             will extract a single compressed csv file from the given input compressed file.
             file_name can also be a regular expression (specify regex=True in that case).
             The reader will find all the files in the file_dir directory that match the regular expression and extract
             all those csv file and concatenate them into a single dataframe.
             For example, file_name=".*\.csv", file_dir=".", regex=True will extract all the files with the .csv extension
             from the current directory.
-            It can also be an URI (e.g. https://example.com/mycsv.csv)
+            It can also be an URI (e.g. https://example.com/mycsv.csv). The files read from URIs are cached locally
+            when the ETLRULES_HTTP_CACHE_DIR environment variable is set to a directory. The cached files are
+            revalidated with the server (conditional GET with their ETag/Last-Modified) and only downloaded again
+            when they changed.
         file_dir: The file directory where the file_name is located. When file_name is a regular expression and 
             the regex parameter is True, file_dir is the directory that is inspected for any files that match the
             regular expression. Optional.
             For files it defaults to . (ie the current directory). Ignored for URIs.
         regex: When True, the file_name is interpreted as a regular expression. Defaults to False.
+        max_workers: The maximum number of files read in parallel (in threads) when multiple files match the regular expression.
+            The files are concatenated in the order of their names. Defaults to None, which uses the Python default
+            for thread pools. Set it to 1 to read the files one by one.
+            The dask backend reads all the files matched in a single dask read_csv call instead, with the partitions
+            read in parallel by the dask scheduler, so all the files must have the same columns.
         separator: The single character to be used as separator in the csv file. Defaults to , (comma).
         header: When True, the first line is interpreted as the header and the column names are extracted from it.
             When False, the first line is part of the data and the columns will have names like 0, 1, 2, etc.
             Defaults to True.
         skip_header_rows: Optional number of rows to skip at the top of the file, before the header.
+        column_types: A mapping of column names and their types. Column types are inferred from the data when this parameter
+            is not specified. Specifying the types skips the inference for those columns (faster for wide files) and keeps
+            the types stable when the values in the files change (e.g. a column with missing values in all the rows).
+            Columns not in the mapping are still inferred.
+        date_formats: A mapping of column names and the format of the dates in those columns, e.g. {"Date": "%Y-%m-%d"}.
+            The columns are parsed into datetimes. Use None as the format to infer it (e.g. for ISO 8601 dates).
+            The columns cannot also be specified in column_types.
+        use_pyarrow: When True, the multithreaded pyarrow csv parser is used by the backends which support it (pandas and dask).
+            The polars csv parser is already multithreaded and polars ignores this option. Defaults to False.
+        manifest_file: The path of a json state file used to read the files incrementally. When set, only the files
+            which are new or changed (i.e. a different size or modification time) since the last successful run are read.
+            The state file is only updated when the whole plan runs successfully, so the files are read again
+            after a failed run. Changed files are read again entirely. When no files are new or changed, the result
+            is an empty dataframe with the columns of the last file matched (only its start or its schema is read). Optional.
+        manifest_hash: When True, the hashes of the contents of the files are also recorded in the manifest_file and
+            the files with unchanged contents (e.g. touched or copied again) are not read again. Defaults to False.
+        blocksize: The size in bytes (e.g. 64_000_000 or "64MB") of the blocks the uncompressed csv files are split into
+            by the dask backend. Each block becomes a partition, which is read and processed in parallel.
+            Set it to None to read each file into a single partition. The compressed files are always read
+            into a single partition. Ignored by the pandas and polars backends. Defaults to "64MB".
+            Note: the column types are inferred from the beginning of the first file, specify the column_types
+            for any columns whose types cannot be inferred from there (e.g. a column with only missing values at the top).
+        schema_cache_file: The path of a json state file where the column types inferred from the files are cached. Optional.
+            The types are keyed by the file_dir/file_name pattern (before any substitutions) and the header line
+            of the files. The next reads of the files matching the pattern with the same header use the cached types
+            as explicit column types, which skips the type inference and keeps the types the same from one read
+            to the next. The files with a different header get their types inferred and cached separately.
+            When the data no longer matches the cached types (e.g. text in a numeric column), the types are
+            inferred again and the cache is refreshed. The columns in column_types and date_formats are not cached.
+            The cached types are the types the backend infers (e.g. the numpy int64, not the nullable Int64, in pandas),
+            so a cached read gives the same types as an uncached one. In the streaming mode, the types of all the
+            batches are cached once the whole file is read (e.g. float64 for a column with int64 and float64 batches).
+            Requires header=True. The dask backend reads lazily, so only the data in its sample (the start of
+            the first file) is checked against the cached types.
 
         named_output (Optional[str]): Give the output of this rule a name so it can be used by another rule as a named input. Optional.
             When not set, the result of this rule will be available as the main output.
@@ -104,16 +267,147 @@ class ReadCSVFileRule(BaseReadFileRule):
         strict (bool): When set to True, the rule does a stricter valiation. Default: True
 
     Raises:
-        IOError: raised when the file is not found.
+        IOError: raised when the file is not found or, with regex=True, when no files match the regular expression.
+        UnsupportedTypeError: raised if column_types are specified and any of them are not supported.
+        ValueError: raised if a column is specified in both column_types and date_formats, if a manifest_file or
+            a schema_cache_file is set for an URI, if a schema_cache_file is set without a header
+            or if the blocksize is not a positive integer or a string.
     """
 
+    # the errors raised by the backends when the data cannot be parsed or converted to the column types
+    SCHEMA_MISMATCH_ERRORS = (ValueError, TypeError)
+
     def __init__(self, file_name: str, file_dir: Optional[str]=None, regex: bool=False, separator: str=",",
-                 header: bool=True, skip_header_rows: Optional[int]=None,
+                 header: bool=True, skip_header_rows: Optional[int]=None, max_workers: Optional[int]=None,
+                 column_types: Optional[Mapping[str, str]]=None, date_formats: Optional[Mapping[str, Optional[str]]]=None,
+                 use_pyarrow: bool=False, manifest_file: Optional[str]=None, manifest_hash: bool=False,
+                 blocksize: Optional[Union[int, str]]="64MB", schema_cache_file: Optional[str]=None,
                  named_output: Optional[str]=None, name: Optional[str]=None, description: Optional[str]=None, strict: bool=True):
-        super().__init__(file_name=file_name, file_dir=file_dir, regex=regex, named_output=named_output, name=name, description=description, strict=strict)
+        super().__init__(file_name=file_name, file_dir=file_dir, regex=regex, max_workers=max_workers, manifest_file=manifest_file,
+                         manifest_hash=manifest_hash, named_output=named_output, name=name, description=description, strict=strict)
         self.separator = separator
         self.header = header
         self.skip_header_rows = skip_header_rows
+        self.column_types = column_types
+        self._validate_column_types()
+        self.date_formats = date_formats
+        self._validate_date_formats()
+        self.use_pyarrow = bool(use_pyarrow)
+        if blocksize is not None and not isinstance(blocksize, str) and (not isinstance(blocksize, int) or blocksize <= 0):
+            raise ValueError(f"Invalid blocksize {blocksize!r}: it must be a positive integer, a string (e.g. '64MB') or None.")
+        self.blocksize = blocksize
+        if schema_cache_file is not None:
+            if self._is_uri():
+                raise ValueError("Caching the schema (schema_cache_file) not supported for URIs.")
+            if not self.header:
+                raise ValueError("Caching the schema (schema_cache_file) requires a header.")
+        self.schema_cache_file = schema_cache_file
+
+    def _validate_column_types(self):
+        if self.column_types is not None:
+            for column, column_type in self.column_types.items():
+                if column_type not in SUPPORTED_TYPES:
+                    raise UnsupportedTypeError(f"Type '{column_type}' for column '{column}' is not supported.")
+
+    def _validate_date_formats(self):
+        if self.date_formats is not None:
+            for column, date_format in self.date_formats.items():
+                if date_format is not None and not isinstance(date_format, str):
+                    raise ValueError(f"The date format for column '{column}' must be a string or None.")
+                if self.column_types and column in self.column_types:
+                    raise ValueError(f"Column '{column}' cannot be specified in both column_types and date_formats.")
+
+    def _get_inferred_types(self, df) -> Dict[str, str]:
+        """ Returns the types (one of SUPPORTED_TYPES) of the columns of a dataframe, skipping the columns of other types. """
+        raise NotImplementedError("Have you imported the rules from etlrules.backends.<your_backend> and not common?")
+
+    def _get_cached_schema(self, file_path: str):
+        """ Returns the cache key, the header line and the cached column types of a file (None if not cached). """
+        header = read_header_line(file_path, self.skip_header_rows or 0)
+        if header is None:
+            return None, None, None
+        file_pattern = os.path.join(self.file_dir or "", self.file_name)
+        key = get_schema_key(file_pattern, header)
+        cached_types = CSV_SCHEMA_CACHE.get(subst_string(self.schema_cache_file), key)
+        if cached_types is not None:
+            # the columns parsed as dates or with explicit types are not taken from the cache
+            cached_types = {
+                col: col_type for col, col_type in cached_types.items()
+                if col not in (self.date_formats or {}) and col not in (self.column_types or {})
+            }
+        return key, header, cached_types
+
+    def _cache_inferred_types(self, key: str, header: str, inferred_types: Mapping[str, str]) -> None:
+        """ Caches the inferred types, except for the columns parsed as dates or with explicit types. """
+        inferred_types = {
+            col: col_type for col, col_type in inferred_types.items()
+            if col not in (self.date_formats or {}) and col not in (self.column_types or {})
+        }
+        file_pattern = os.path.join(self.file_dir or "", self.file_name)
+        CSV_SCHEMA_CACHE.put(subst_string(self.schema_cache_file), key, file_pattern, header, inferred_types)
+
+    def _read_with_schema_cache(self, file_path: str, read: Callable):
+        """ Reads a file via read(cached_types), with the column types from the schema_cache_file (None if not cached).
+
+        The column_types and date_formats are applied by read on top of the cached types. When the data no longer
+        matches the cached types, the file is read again with the types inferred, which are then cached.
+        """
+        if self.schema_cache_file is None:
+            return read(None)
+        key, header, cached_types = self._get_cached_schema(file_path)
+        if key is None:
+            return read(None)
+        if cached_types is not None:
+            try:
+                df = read(cached_types)
+                CSV_SCHEMA_CACHE.count(hits=1)
+                return df
+            except self.SCHEMA_MISMATCH_ERRORS as exc:
+                CSV_SCHEMA_CACHE.count(mismatches=1)
+                perf_logger.info("The cached schema of '%s' doesn't match the data (%s), inferring it again.", file_path, exc)
+        else:
+            CSV_SCHEMA_CACHE.count(misses=1)
+        df = read(None)
+        self._cache_inferred_types(key, header, self._get_inferred_types(df))
+        return df
+
+    def _read_batches_with_schema_cache(self, file_path: str, read_batches: Callable) -> Iterator:
+        """ Yields the batches of a file read via read_batches(cached_types), see _read_with_schema_cache.
+
+        When not cached, the types are inferred for each batch and the types of all the batches (widened when they
+        differ, e.g. int64 and float64 to float64) are cached once the whole file is read. The types are inferred
+        again only if the data doesn't match the cached types before the first batch is yielded.
+        """
+        if self.schema_cache_file is None:
+            yield from read_batches(None)
+            return
+        key, header, cached_types = self._get_cached_schema(file_path)
+        if key is None:
+            yield from read_batches(None)
+            return
+        if cached_types is not None:
+            started = False
+            try:
+                for df in read_batches(cached_types):
+                    if not started:
+                        CSV_SCHEMA_CACHE.count(hits=1)
+                        started = True
+                    yield df
+                return
+            except self.SCHEMA_MISMATCH_ERRORS as exc:
+                if started:
+                    raise
+                CSV_SCHEMA_CACHE.count(mismatches=1)
+                perf_logger.info("The cached schema of '%s' doesn't match the data (%s), inferring it again.", file_path, exc)
+        else:
+            CSV_SCHEMA_CACHE.count(misses=1)
+        inferred_types = None
+        for df in read_batches(None):
+            batch_types = self._get_inferred_types(df)
+            inferred_types = batch_types if inferred_types is None else widen_column_types(inferred_types, batch_types)
+            yield df
+        if inferred_types is not None:
+            self._cache_inferred_types(key, header, inferred_types)
 
 
 class ReadParquetFileRule(BaseReadFileRule):
@@ -143,6 +437,11 @@ class ReadParquetFileRule(BaseReadFileRule):
         rule = ReadParquetFileRule("data.parquet", "/home/myuser/", filters=[["A", ">=", 10], ["B", "==", True]])
         rule.apply(data)
 
+        # reads a hive partitioned dataset (e.g. /home/myuser/lake/year=2023/month=1/desk=fx/part-0.parquet)
+        # only the files under the year=2023 directories are read
+        rule = ReadParquetFileRule("lake", "/home/myuser/", dataset=True, filters=[["year", "==", 2023]])
+        rule.apply(data)
+
     Args:
         file_name: The name of the parquet file to load. The format will be inferred from the extension of the file.
             file_name can also be a regular expression (specify regex=True in that case).
@@ -150,11 +449,16 @@ class ReadParquetFileRule(BaseReadFileRule):
             all those parquet file and concatenate them into a single dataframe.
             For example, file_name=".*\.parquet", file_dir=".", regex=True will extract all the files with the .parquet extension
             from the current directory.
+            It can also be an URI (e.g. https://example.com/data.parquet), cached locally when the ETLRULES_HTTP_CACHE_DIR
+            environment variable is set (see ReadCSVFileRule).
         file_dir: The file directory where the file_name is located. When file_name is a regular expression and 
             the regex parameter is True, file_dir is the directory that is inspected for any files that match the
             regular expression.
             Defaults to . (ie the current directory).
         regex: When True, the file_name is interpreted as a regular expression. Defaults to False.
+        max_workers: The maximum number of files read in parallel (in threads) when multiple files match the regular expression.
+            The files are concatenated in the order of their names. Defaults to None, which uses the Python default
+            for thread pools. Set it to 1 to read the files one by one.
         columns: A subset of the columns in the parquet file to load.
         filters: A list of filters to apply to filter the rows returned. Rows which do not match the filter conditions
             will be removed from scanned data.
@@ -165,6 +469,18 @@ class ReadParquetFileRule(BaseReadFileRule):
             Column is the name of a column in the input dataframe.
             Operation is one of: "==", "=", ">", ">=", "<", "<=", "!=", "in", "not in".
             Value is a scalar value, int, float, string, etc. When the operation is in or not in, the value must be a list, tuple or set of values.
+        dataset: When True, file_name is the root directory of a hive partitioned dataset (i.e. directories named
+            key=value, e.g. year=2023/month=1). The partition keys are added as columns (with types inferred from the
+            directory names) and the filters on the partition keys prune whole directories before any file is read.
+            Cannot be used with regex. Defaults to False.
+        manifest_file: The path of a json state file used to read the files incrementally. When set, only the files
+            which are new or changed (i.e. a different size or modification time) since the last successful run are read.
+            The state file is only updated when the whole plan runs successfully, so the files are read again
+            after a failed run. Changed files are read again entirely. When no files are new or changed, the result
+            is an empty dataframe with the columns of the last file matched (only its start or its schema is read).
+            Cannot be used with dataset. Optional.
+        manifest_hash: When True, the hashes of the contents of the files are also recorded in the manifest_file and
+            the files with unchanged contents (e.g. touched or copied again) are not read again. Defaults to False.
 
         named_output (Optional[str]): Give the output of this rule a name so it can be used by another rule as a named input. Optional.
             When not set, the result of this rule will be available as the main output.
@@ -176,23 +492,217 @@ class ReadParquetFileRule(BaseReadFileRule):
         strict (bool): When set to True, the rule does a stricter valiation. Default: True
 
     Raises:
-        IOError: raised when the file is not found.
+        IOError: raised when the file is not found or, with regex=True, when no files match the regular expression.
         ValueError: raised if filters are specified but the format is incorrect.
         MissingColumnError: raised if a column is specified in columns or filters but it doesn't exist in the input dataframe.
     
     Note:
         The parquet file can be compressed in which case the compression will be inferred from the file.
         The following compression algorithms are supported: "snappy", "gzip", "brotli", "lz4", "zstd".
+
+        The footers of the parquet files (schema, row groups and their min/max statistics) are cached for the lifetime
+        of the process, keyed by the path, the modification time and the size of the files. The files and the row groups
+        which cannot match the filters based on their statistics are skipped without being opened.
+        Set the ETLRULES_PARQUET_METADATA_CACHE_DIR environment variable to a directory to also persist the footers
+        on disk, between processes. The cache hits and misses are logged to the etlrules.perf logger.
     """
 
     SUPPORTED_FILTERS_OPS = {"==", "=", ">", ">=", "<", "<=", "!=", "in", "not in"}
 
-    def __init__(self, file_name: str, file_dir: str=".", columns: Optional[Sequence[str]]=None, filters:Optional[Union[List[Tuple], List[List[Tuple]]]]=None, regex: bool=False, named_output: Optional[str]=None, name: Optional[str]=None, description: Optional[str]=None, strict: bool=True):
+    # when True, the files matched by a regex which cannot match the filters are pruned before being read
+    PRUNE_FILES = True
+
+    def __init__(self, file_name: str, file_dir: str=".", columns: Optional[Sequence[str]]=None, filters:Optional[Union[List[Tuple], List[List[Tuple]]]]=None, regex: bool=False, max_workers: Optional[int]=None, dataset: bool=False, manifest_file: Optional[str]=None, manifest_hash: bool=False, named_output: Optional[str]=None, name: Optional[str]=None, description: Optional[str]=None, strict: bool=True):
         super().__init__(
-            file_name=file_name, file_dir=file_dir, regex=regex, named_output=named_output,
-            name=name, description=description, strict=strict)
+            file_name=file_name, file_dir=file_dir, regex=regex, max_workers=max_workers, manifest_file=manifest_file,
+            manifest_hash=manifest_hash, named_output=named_output, name=name, description=description, strict=strict)
         self.columns = columns
         self.filters = self._get_filters(filters) if filters is not None else None
+        self.dataset = bool(dataset)
+        if self.dataset and self.regex:
+            raise ValueError("Regex read not supported for datasets.")
+        if self.dataset and self.manifest_file is not None:
+            raise ValueError("Incremental reads (manifest_file) not supported for datasets.")
+
+    def _get_dataset(self, file_path: str):
+        """ Discovers the files and the hive partitions of a dataset, returning the pyarrow dataset and the filter expression.
+
+        The discovery only lists the directories (and reads the schema of one file). Use the filter expression
+        when scanning the dataset so that the partitions not matching the filters are pruned without being read.
+        """
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+        dataset = ds.dataset(file_path, format="parquet", partitioning="hive")
+        filter_expr = pq.filters_to_expression(self.filters) if self.filters else None
+        return dataset, filter_expr
+
+    def _read_dataset_table(self, file_path: str):
+        """ Reads a dataset into a pyarrow Table, pruning the partitions based on the filters. """
+        from pyarrow.lib import ArrowInvalid
+        dataset, filter_expr = self._get_dataset(file_path)
+        try:
+            return dataset.to_table(columns=self.columns, filter=filter_expr)
+        except ArrowInvalid as exc:
+            raise MissingColumnError(str(exc))
+
+    def _get_filters_dnf(self) -> List[List[Tuple]]:
+        """ Returns the filters as a list of AND-ed conditions which are OR-ed together. """
+        if not self.filters:
+            return []
+        if isinstance(self.filters[0], tuple):
+            # List[Tuple] form, all the conditions are AND-ed together
+            return [self.filters]
+        return self.filters
+
+    def _get_row_groups(self, file_path: str, metadata=None):
+        """ Returns the footer of a parquet file and the indices of its row groups which can match the filters.
+
+        The footer comes from the process-wide metadata cache (unless passed in), so the row groups (or the whole file)
+        which cannot match the filters based on their min/max statistics are excluded without opening the file.
+        """
+        if metadata is None:
+            metadata = PARQUET_METADATA_CACHE.get(file_path)
+        dnf = self._get_filters_dnf()
+        row_groups = [idx for idx in range(metadata.num_row_groups) if not dnf or row_group_may_match(metadata.row_group(idx), dnf)]
+        return metadata, row_groups
+
+    def _count_skipped(self, file_path: str, metadata, row_groups: List[int]) -> None:
+        skipped = metadata.num_row_groups - len(row_groups)
+        if self.filters and not row_groups:
+            PARQUET_METADATA_CACHE.count(files_skipped=1, row_groups_skipped=skipped)
+            perf_logger.info("Parquet file '%s' skipped: no row groups match the filters.", file_path)
+        elif skipped:
+            PARQUET_METADATA_CACHE.count(row_groups_skipped=skipped)
+            perf_logger.info("Parquet file '%s': %s of %s row groups skipped by the filters.", file_path, skipped, metadata.num_row_groups)
+
+    def _get_full_file_paths(self):
+        file_paths = super()._get_full_file_paths()
+        if not self.PRUNE_FILES or not self.regex or not self.filters:
+            yield from file_paths
+            return
+        # the files which cannot match the filters are not read at all
+        # the first file is still read when none match, for the schema of the (empty) result
+        skipped = []
+        has_matches = False
+        for file_path in file_paths:
+            metadata, row_groups = self._get_row_groups(file_path)
+            if row_groups:
+                has_matches = True
+                yield file_path
+            else:
+                skipped.append((file_path, metadata))
+        if not has_matches and skipped:
+            yield skipped.pop(0)[0]
+        for file_path, metadata in skipped:
+            self._count_skipped(file_path, metadata, [])
+
+    def _validate_columns(self, file_path: str, schema) -> None:
+        filter_columns = [tpl[0] for conditions in self._get_filters_dnf() for tpl in conditions]
+        missing = [col for col in [*(self.columns or []), *filter_columns] if col not in schema.names]
+        if missing:
+            raise MissingColumnError(f"Column(s) {sorted(set(missing))} not found in '{file_path}'.")
+
+    @contextlib.contextmanager
+    def _open_source(self, file_path: str):
+        """ Yields the source to read a parquet file from and its footer (None for the local files, see _get_row_groups).
+
+        The URIs are read with http range requests when the server supports them, so only the footer and the
+        column chunks of the columns and row groups read are downloaded. Otherwise, they are downloaded entirely.
+        """
+        import pyarrow.parquet as pq
+        if not is_uri(file_path):
+            yield file_path, None
+            return
+        with open_uri(file_path) as source:
+            yield source, pq.read_metadata(source)
+
+    def _read_table(self, file_path: str, use_pandas_metadata: bool=False):
+        """ Reads a parquet file into a pyarrow Table, skipping the row groups excluded by the filters (see _get_row_groups). """
+        with self._open_source(file_path) as (source, metadata):
+            return self._read_source_table(file_path, source, metadata, use_pandas_metadata)
+
+    def _read_source_table(self, file_path: str, source, metadata, use_pandas_metadata: bool):
+        import pyarrow.parquet as pq
+        from pyarrow.lib import ArrowInvalid
+        metadata, row_groups = self._get_row_groups(file_path, metadata)
+        self._count_skipped(file_path, metadata, row_groups)
+        schema = metadata.schema.to_arrow_schema()
+        self._validate_columns(file_path, schema)
+        dnf = self._get_filters_dnf()
+        filter_columns = [tpl[0] for conditions in dnf for tpl in conditions]
+        columns = None
+        if self.columns is not None:
+            columns = list(self.columns)
+            if use_pandas_metadata and schema.pandas_metadata:
+                # keep the index columns stored by pandas, like pandas.read_parquet
+                columns += [col for col in schema.pandas_metadata.get("index_columns", []) if isinstance(col, str)]
+        if dnf and not row_groups:
+            table = schema.empty_table()
+        else:
+            read_columns = None if columns is None else list(dict.fromkeys([*columns, *filter_columns]))
+            try:
+                parquet_file = pq.ParquetFile(source, metadata=metadata)
+                table = parquet_file.read_row_groups(row_groups, columns=read_columns, use_pandas_metadata=use_pandas_metadata)
+            except ArrowInvalid as exc:
+                raise MissingColumnError(str(exc))
+        if dnf:
+            table = table.filter(pq.filters_to_expression(self.filters))
+        if columns is not None:
+            table = table.select(columns)
+        return table
+
+    def _read_schema_table(self, file_path: str):
+        """ Returns an empty pyarrow Table with the columns of a parquet file, reading only its (cached) footer. """
+        with self._open_source(file_path) as (_, metadata):
+            if metadata is None:
+                metadata = PARQUET_METADATA_CACHE.get(file_path)
+        schema = metadata.schema.to_arrow_schema()
+        self._validate_columns(file_path, schema)
+        table = schema.empty_table()
+        return table.select(self.columns) if self.columns is not None else table
+
+    def _iter_record_batches(self, file_path: str, batch_size: int) -> Iterator:
+        """ Yields pyarrow record batches of (up to) batch_size rows from a file or a dataset.
+
+        Only one batch is materialized at a time. The columns and filters are pushed down to the scan.
+        """
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+        from pyarrow.lib import ArrowInvalid
+        if self.dataset:
+            dataset, filter_expr = self._get_dataset(file_path)
+        elif is_uri(file_path):
+            yield from self._iter_uri_record_batches(file_path, batch_size)
+            return
+        else:
+            dataset = ds.dataset(file_path, format="parquet")
+            filter_expr = pq.filters_to_expression(self.filters) if self.filters else None
+        try:
+            yield from dataset.to_batches(columns=self.columns, filter=filter_expr, batch_size=batch_size)
+        except ArrowInvalid as exc:
+            raise MissingColumnError(str(exc))
+
+    def _iter_uri_record_batches(self, file_path: str, batch_size: int) -> Iterator:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        from pyarrow.lib import ArrowInvalid
+        with self._open_source(file_path) as (source, metadata):
+            metadata, row_groups = self._get_row_groups(file_path, metadata)
+            self._count_skipped(file_path, metadata, row_groups)
+            self._validate_columns(file_path, metadata.schema.to_arrow_schema())
+            filter_columns = [tpl[0] for conditions in self._get_filters_dnf() for tpl in conditions]
+            read_columns = None if self.columns is None else list(dict.fromkeys([*self.columns, *filter_columns]))
+            filter_expr = pq.filters_to_expression(self.filters) if self.filters else None
+            try:
+                for batch in pq.ParquetFile(source, metadata=metadata).iter_batches(batch_size, row_groups=row_groups, columns=read_columns):
+                    table = pa.Table.from_batches([batch])
+                    if filter_expr is not None:
+                        table = table.filter(filter_expr)
+                    if self.columns is not None:
+                        table = table.select(self.columns)
+                    yield from table.to_batches()
+            except ArrowInvalid as exc:
+                raise MissingColumnError(str(exc))
 
     def _raise_filters_invalid(self, error: str) -> NoReturn:
         raise ValueError(f"Invalid filters. It must be a List[Tuple] or List[List[Tuple]] with each Tuple being (column, op, value): {error}")
@@ -238,6 +748,369 @@ class ReadParquetFileRule(BaseReadFileRule):
         return lst
 
 
+class ReadArrowFileRule(BaseReadFileRule):
+    r""" Reads one or multiple Arrow IPC (Feather v2) files from a directory and persists it as a dataframe for subsequent rules to operate on.
+
+    The Arrow IPC format is the in-memory format of Arrow written to disk. Reading it requires no parsing or
+    decoding, which makes it suited for passing intermediate data between plans.
+
+    Basic usage::
+
+        # reads a file data.arrow and persists it as the main output of the rule
+        rule = ReadArrowFileRule("data.arrow", "/home/myuser/")
+        rule.apply(data)
+
+        # reads only the A,B,C columns from the file data.arrow
+        rule = ReadArrowFileRule("data.arrow", "/home/myuser/", columns=["A", "B", "C"], named_output="input_data")
+        rule.apply(data)
+
+        # reads all the files with the .arrow extension from the home dir of myuser and
+        # concatenates them into a single dataframe
+        rule = ReadArrowFileRule(".*\.arrow", "/home/myuser/", regex=True, named_output="input_data")
+        rule.apply(data)
+
+    Args:
+        file_name: The name of the Arrow IPC file to load (e.g. data.arrow or data.feather).
+            file_name can also be a regular expression (specify regex=True in that case).
+            The reader will find all the files in the file_dir directory that match the regular expression and extract
+            all those files and concatenate them into a single dataframe.
+        file_dir: The file directory where the file_name is located. When file_name is a regular expression and 
+            the regex parameter is True, file_dir is the directory that is inspected for any files that match the
+            regular expression.
+            Defaults to . (ie the current directory).
+        columns: A subset of the columns in the file to load.
+        regex: When True, the file_name is interpreted as a regular expression. Defaults to False.
+        max_workers: The maximum number of files read in parallel (in threads) when multiple files match the regular expression.
+            The files are concatenated in the order of their names. Defaults to None, which uses the Python default
+            for thread pools. Set it to 1 to read the files one by one.
+        memory_map: When True, the file is memory-mapped rather than read in memory. The data of uncompressed files is
+            then paged in by the operating system on demand, as it is used. Compressed files are decompressed in memory.
+            Defaults to True.
+        manifest_file: The path of a json state file used to read the files incrementally. When set, only the files
+            which are new or changed (i.e. a different size or modification time) since the last successful run are read.
+            The state file is only updated when the whole plan runs successfully, so the files are read again
+            after a failed run. Changed files are read again entirely. When no files are new or changed, the result
+            is an empty dataframe with the columns of the last file matched (only its start or its schema is read). Optional.
+        manifest_hash: When True, the hashes of the contents of the files are also recorded in the manifest_file and
+            the files with unchanged contents (e.g. touched or copied again) are not read again. Defaults to False.
+
+        named_output (Optional[str]): Give the output of this rule a name so it can be used by another rule as a named input. Optional.
+            When not set, the result of this rule will be available as the main output.
+            When set to a name (string), the result will be available as that named output.
+        name (Optional[str]): Give the rule a name. Optional.
+            Named rules are more descriptive as to what they're trying to do/the intent.
+        description (Optional[str]): Describe in detail what the rules does, how it does it. Optional.
+            Together with the name, the description acts as the documentation of the rule.
+        strict (bool): When set to True, the rule does a stricter valiation. Default: True
+
+    Raises:
+        IOError: raised when the file is not found or, with regex=True, when no files match the regular expression.
+        MissingColumnError: raised if a column is specified in columns but it doesn't exist in the file.
+
+    Note:
+        The polars backend shares the memory of the memory-mapped file (zero copy) for most types.
+        The pandas and dask backends convert the data to pandas types, which copies it in memory.
+    """
+
+    def __init__(self, file_name: str, file_dir: str=".", columns: Optional[Sequence[str]]=None, regex: bool=False, max_workers: Optional[int]=None, memory_map: bool=True, manifest_file: Optional[str]=None, manifest_hash: bool=False, named_output: Optional[str]=None, name: Optional[str]=None, description: Optional[str]=None, strict: bool=True):
+        super().__init__(
+            file_name=file_name, file_dir=file_dir, regex=regex, max_workers=max_workers, manifest_file=manifest_file,
+            manifest_hash=manifest_hash, named_output=named_output, name=name, description=description, strict=strict)
+        if self._is_uri():
+            raise ValueError("Reading Arrow files from URIs is not supported.")
+        self.columns = columns
+        self.memory_map = bool(memory_map)
+
+    def _open_file(self, file_path: str):
+        import pyarrow as pa
+        return pa.memory_map(file_path, "r") if self.memory_map else pa.OSFile(file_path, "rb")
+
+    def _select_columns(self, table):
+        if self.columns is None:
+            return table
+        try:
+            return table.select(self.columns)
+        except KeyError as exc:
+            raise MissingColumnError(str(exc))
+
+    def _read_table(self, file_path: str):
+        """ Reads an Arrow IPC file into a pyarrow Table. """
+        import pyarrow as pa
+        with self._open_file(file_path) as source:
+            return self._select_columns(pa.ipc.open_file(source).read_all())
+
+    def _read_schema_table(self, file_path: str):
+        """ Returns an empty pyarrow Table with the columns of an Arrow IPC file, reading only its schema. """
+        import pyarrow as pa
+        with self._open_file(file_path) as source:
+            return self._select_columns(pa.ipc.open_file(source).schema.empty_table())
+
+    def _iter_record_batches(self, file_path: str, batch_size: int) -> Iterator:
+        """ Yields the record batches of an Arrow IPC file, as they were written, split in up to batch_size rows. """
+        import pyarrow as pa
+        with self._open_file(file_path) as source:
+            reader = pa.ipc.open_file(source)
+            for idx in range(reader.num_record_batches):
+                table = self._select_columns(pa.Table.from_batches([reader.get_batch(idx)]))
+                yield from table.to_batches(max_chunksize=batch_size)
+
+
+class ReadJSONLinesFileRule(BaseReadFileRule):
+    r""" Reads one or multiple JSON Lines (newline delimited json) files from a directory and persists it as a dataframe for subsequent rules to operate on.
+
+    Each line of the file is a json object, which becomes a row in the dataframe. The fields of the objects become
+    the columns of the dataframe, the nested objects become struct columns (or flattened into columns, see flatten).
+
+    Basic usage::
+
+        # reads a file data.jsonl and persists it as the main output of the rule
+        rule = ReadJSONLinesFileRule("data.jsonl", "/home/myuser/")
+        rule.apply(data)
+
+        # reads a gzipped file with the types of A and B specified rather than inferred from the data and
+        # the nested objects flattened into columns (e.g. {"C": {"D": 1}} is read into a column named C.D)
+        rule = ReadJSONLinesFileRule("data.jsonl.gz", "/home/myuser/", column_types={"A": "int64", "B": "string"}, flatten=True)
+        rule.apply(data)
+
+        # reads all the files with the .jsonl extension from the home dir of myuser and
+        # concatenates them into a single dataframe
+        rule = ReadJSONLinesFileRule(".*\.jsonl", "/home/myuser/", regex=True, named_output="input_data")
+        rule.apply(data)
+
+    Args:
+        file_name: The name of the JSON Lines file to load. The compressed files are decompressed as they are parsed,
+            the compression is inferred from the extension of the file: .gz, .bz2, .xz or .zst (e.g. data.jsonl.gz).
+            file_name can also be a regular expression (specify regex=True in that case).
+            The reader will find all the files in the file_dir directory that match the regular expression and extract
+            all those files and concatenate them into a single dataframe.
+        file_dir: The file directory where the file_name is located. When file_name is a regular expression and 
+            the regex parameter is True, file_dir is the directory that is inspected for any files that match the
+            regular expression.
+            Defaults to . (ie the current directory).
+        columns: A subset of the columns to load. When flatten is True, the names of the flattened columns
+            can be used (e.g. C.D). Optional.
+        column_types: A mapping of (top level) fields and their types. The types of the fields are inferred from the data
+            when this parameter is not specified. Specifying the types skips the inference for those fields and keeps
+            the types stable when the values in the files change (e.g. a field with null values in all the rows).
+            The fields not in the mapping are still inferred. The fields in the mapping but not in the file are read as
+            columns with null values.
+        flatten: When True, the nested objects are flattened into columns named as the path of the field, separated by
+            dots (e.g. {"C": {"D": 1, "E": 2}} is read into the columns C.D and C.E). Defaults to False.
+        regex: When True, the file_name is interpreted as a regular expression. Defaults to False.
+        max_workers: The maximum number of files read in parallel (in threads) when multiple files match the regular expression.
+            The files are concatenated in the order of their names. Defaults to None, which uses the Python default
+            for thread pools. Set it to 1 to read the files one by one.
+        manifest_file: The path of a json state file used to read the files incrementally. When set, only the files
+            which are new or changed (i.e. a different size or modification time) since the last successful run are read.
+            The state file is only updated when the whole plan runs successfully, so the files are read again
+            after a failed run. Changed files are read again entirely. When no files are new or changed, the result
+            is an empty dataframe with the columns of the last file matched (only its start or its schema is read). Optional.
+        manifest_hash: When True, the hashes of the contents of the files are also recorded in the manifest_file and
+            the files with unchanged contents (e.g. touched or copied again) are not read again. Defaults to False.
+
+        named_output (Optional[str]): Give the output of this rule a name so it can be used by another rule as a named input. Optional.
+            When not set, the result of this rule will be available as the main output.
+            When set to a name (string), the result will be available as that named output.
+        name (Optional[str]): Give the rule a name. Optional.
+            Named rules are more descriptive as to what they're trying to do/the intent.
+        description (Optional[str]): Describe in detail what the rules does, how it does it. Optional.
+            Together with the name, the description acts as the documentation of the rule.
+        strict (bool): When set to True, the rule does a stricter valiation. Default: True
+
+    Raises:
+        IOError: raised when the file is not found or, with regex=True, when no files match the regular expression.
+        MissingColumnError: raised if a column is specified in columns but it doesn't exist in the file.
+        UnsupportedTypeError: raised if column_types are specified and any of them are not supported.
+        ValueError: raised if the file_name is an URI.
+
+    Note:
+        The files are parsed by the multithreaded json parser of pyarrow, in all the backends.
+
+        In streaming mode, the files are parsed in blocks of 16MB and the types inferred from the first block
+        are used for the rest of the file, such that all the batches have the same columns and types
+        (except the fields with only null values in the first block, which are inferred from the next blocks, and the
+        numeric fields widened by the next blocks, e.g. int64 to float64, as when the whole file is read).
+        The dask backend reads each file into its own partition, the files are read in parallel by the dask scheduler.
+    """
+
+    COMPRESSION_EXT = {
+        '.gz': 'gzip',
+        '.bz2': 'bz2',
+        '.xz': 'xz',
+        '.zst': 'zstd',
+    }
+
+    # the names of the pyarrow types of the supported column types
+    ARROW_TYPES = {
+        'int8': 'int8', 'int16': 'int16', 'int32': 'int32', 'int64': 'int64',
+        'uint8': 'uint8', 'uint16': 'uint16', 'uint32': 'uint32', 'uint64': 'uint64',
+        'float32': 'float32', 'float64': 'float64',
+        'string': 'string',
+        'boolean': 'bool_',
+    }
+
+    # the size of the blocks the files are parsed in when read in batches
+    BATCH_BLOCK_SIZE = 16 * 1024 * 1024
+
+    def __init__(self, file_name: str, file_dir: str=".", columns: Optional[Sequence[str]]=None, column_types: Optional[Mapping[str, str]]=None,
+                 flatten: bool=False, regex: bool=False, max_workers: Optional[int]=None, manifest_file: Optional[str]=None, manifest_hash: bool=False,
+                 named_output: Optional[str]=None, name: Optional[str]=None, description: Optional[str]=None, strict: bool=True):
+        super().__init__(
+            file_name=file_name, file_dir=file_dir, regex=regex, max_workers=max_workers, manifest_file=manifest_file,
+            manifest_hash=manifest_hash, named_output=named_output, name=name, description=description, strict=strict)
+        if self._is_uri():
+            raise ValueError("Reading JSON Lines files from URIs is not supported.")
+        self.columns = columns
+        self.column_types = column_types
+        self._validate_column_types()
+        self.flatten = bool(flatten)
+
+    def _validate_column_types(self):
+        if self.column_types is not None:
+            for column, column_type in self.column_types.items():
+                if column_type not in SUPPORTED_TYPES:
+                    raise UnsupportedTypeError(f"Type '{column_type}' for column '{column}' is not supported.")
+
+    def _open_input(self, stack: contextlib.ExitStack, file_path: str):
+        """ Opens a (compressed) file for reading its decompressed contents as a stream. """
+        import pyarrow as pa
+        _, ext = os.path.splitext(file_path)
+        compression = self.COMPRESSION_EXT.get(ext)
+        if compression == "xz":
+            # arrow is usually built without lzma support
+            return stack.enter_context(lzma.open(file_path, "rb"))
+        source = stack.enter_context(pa.OSFile(file_path, "rb"))
+        if compression is not None:
+            # decompressed by arrow in C++, as the file is parsed
+            return stack.enter_context(pa.CompressedInputStream(source, compression))
+        return source
+
+    def _get_parse_options(self, schema=None):
+        import pyarrow as pa
+        import pyarrow.json as pj
+        if schema is None and self.column_types:
+            schema = pa.schema([
+                (column, getattr(pa, self.ARROW_TYPES[column_type])()) for column, column_type in self.column_types.items()
+            ])
+        return pj.ParseOptions(explicit_schema=schema, unexpected_field_behavior="infer")
+
+    def _get_field_order(self, data: bytes) -> List[str]:
+        """ Returns the names of the fields of the first json object in data, in the order they are in the file. """
+        data = data.lstrip()
+        end = data.find(b"\n")
+        try:
+            obj = json.loads(data[:end] if end >= 0 else data)
+        except ValueError:
+            return []
+        return list(obj) if isinstance(obj, dict) else []
+
+    def _read_first_line(self, file_path: str) -> bytes:
+        with contextlib.ExitStack() as stack:
+            source = self._open_input(stack, file_path)
+            data = b""
+            while True:
+                chunk = source.read(64 * 1024)
+                data += chunk
+                if not chunk or b"\n" in data.lstrip():
+                    return data
+
+    def _order_columns(self, table, field_order: Sequence[str]):
+        """ Restores the order of the fields in the file, as arrow reads the fields in the explicit schema first. """
+        names = [name for name in field_order if name in table.column_names]
+        names += [name for name in table.column_names if name not in names]
+        return table.select(names)
+
+    def _flatten_table(self, table):
+        import pyarrow as pa
+        if self.flatten:
+            # each flatten only expands one level of nesting
+            while any(pa.types.is_struct(field.type) for field in table.schema):
+                table = table.flatten()
+        if self.columns is None:
+            return table
+        try:
+            return table.select(self.columns)
+        except KeyError as exc:
+            raise MissingColumnError(str(exc))
+
+    def _read_table(self, file_path: str):
+        """ Reads a JSON Lines file into a pyarrow Table. """
+        import pyarrow.json as pj
+        with contextlib.ExitStack() as stack:
+            # the types inferred from different blocks are unified (e.g. int64 and double into double)
+            table = pj.read_json(self._open_input(stack, file_path), parse_options=self._get_parse_options())
+        if self.column_types:
+            table = self._order_columns(table, self._get_field_order(self._read_first_line(file_path)))
+        return self._flatten_table(table)
+
+    def _widen_type(self, type1, type2):
+        """ Returns the type both types can be converted to without loss, as inferred from a whole file (e.g. int64 and double into double). """
+        import pyarrow as pa
+        if type1 == type2 or pa.types.is_null(type2):
+            return type1
+        if pa.types.is_null(type1):
+            return type2
+        if pa.types.is_integer(type1) and pa.types.is_integer(type2):
+            return pa.int64()
+        if (pa.types.is_integer(type1) or pa.types.is_floating(type1)) and (pa.types.is_integer(type2) or pa.types.is_floating(type2)):
+            return pa.float64()
+        raise TypeError(f"Cannot convert between {type1} and {type2}.")
+
+    def _widen_table(self, table, schema):
+        """ Converts a table parsed without the types inferred so far (schema) to the wider types of both. """
+        import pyarrow as pa
+        types = {field.name: field.type for field in schema}
+        for field in table.schema:
+            types[field.name] = self._widen_type(types[field.name], field.type) if field.name in types else field.type
+        return pa.Table.from_arrays([
+            table.column(name).cast(field_type) if name in table.column_names else pa.nulls(len(table), field_type)
+            for name, field_type in types.items()
+        ], names=list(types))
+
+    def _iter_record_batches(self, file_path: str, batch_size: int) -> Iterator:
+        """ Yields the record batches of a JSON Lines file, parsed in blocks of BATCH_BLOCK_SIZE bytes, split in up to batch_size rows. """
+        import pyarrow as pa
+        import pyarrow.json as pj
+        parse_options = self._get_parse_options()
+        first_block = True
+        with contextlib.ExitStack() as stack:
+            source = self._open_input(stack, file_path)
+            remainder = b""
+            while True:
+                data = source.read(self.BATCH_BLOCK_SIZE)
+                block = remainder + data
+                if data:
+                    # the block is cut after its last full line, the rest is parsed with the next block
+                    end = block.rfind(b"\n") + 1
+                    block, remainder = block[:end], block[end:]
+                if block.strip():
+                    try:
+                        table = pj.read_json(pa.BufferReader(block), parse_options=parse_options)
+                    except pa.ArrowInvalid as exc:
+                        if first_block:
+                            raise
+                        # the values no longer match the types inferred so far (e.g. a double in an int64 field),
+                        # the block is parsed with the types inferred from it and the types are widened
+                        table = pj.read_json(pa.BufferReader(block), parse_options=self._get_parse_options())
+                        try:
+                            table = self._widen_table(table, parse_options.explicit_schema)
+                        except TypeError:
+                            raise exc
+                        perf_logger.info("The types of '%s' were widened to %s.", file_path, table.schema)
+                    if first_block and self.column_types:
+                        table = self._order_columns(table, self._get_field_order(block))
+                    first_block = False
+                    if parse_options.explicit_schema is None or parse_options.explicit_schema != table.schema:
+                        # the types of the next blocks are the types of the previous ones, except the fields with
+                        # only nulls so far, which are still inferred
+                        parse_options = self._get_parse_options(pa.schema([
+                            field for field in table.schema if not pa.types.is_null(field.type)
+                        ]))
+                    yield from self._flatten_table(table).to_batches(max_chunksize=batch_size)
+                if not data:
+                    break
+
+
 class BaseWriteFileRule(UnaryOpBaseRule):
 
     EXCLUDE_FROM_SERIALIZE = ("named_output", )
@@ -250,13 +1123,30 @@ class BaseWriteFileRule(UnaryOpBaseRule):
     def has_output(self):
         return False
 
+    def is_streamable(self):
+        return True
+
     def do_write(self, file_name: str, file_dir: str, df) -> None:
         raise NotImplementedError("Have you imported the rules from etlrules.backends.<your_backend> and not common?")
 
+    def do_write_batches(self, file_name: str, file_dir: str, dfs: Iterable) -> None:
+        raise NotImplementedError("Have you imported the rules from etlrules.backends.<your_backend> and not common?")
+
+    def write(self, file_name: str, file_dir: str, df) -> None:
+        """ Writes the dataframe to file_name in file_dir. """
+        self.do_write(file_name, file_dir, df)
+
     def apply(self, data):
         super().apply(data)
         df = self._get_input_df(data)
-        self.do_write(subst_string(self.file_name), subst_string(self.file_dir), df)
+        self.write(subst_string(self.file_name), subst_string(self.file_dir), df)
+
+    def write_batches(self, dfs: Iterable) -> None:
+        """ Writes the dataframes one by one, appending them to the same output.
+
+        Used by the streaming mode of the RuleEngine to process inputs larger than the available memory.
+        """
+        self.do_write_batches(subst_string(self.file_name), subst_string(self.file_dir), dfs)
 
 
 class WriteCSVFileRule(BaseWriteFileRule):
@@ -290,6 +1180,24 @@ class WriteCSVFileRule(BaseWriteFileRule):
             gzip - file_name must end with .gz (e.g. output.csv.gz), will produced a gzipped csv file
             bz2 - file_name must end with .bz2 (e.g. output.csv.bz2), will produced a bzipped csv 
             xz - file_name must end with .xz (e.g. output.csv.xz), will produced a xz-compressed csv file
+            zstd - file_name must end with .zst (e.g. output.csv.zst), will produced a zstd-compressed csv file
+                (reading the zstd files with the dask backend requires the zstandard package)
+        partitioned: When True, file_name is a directory (created if needed) and the data is written into multiple csv
+            files in it, named part-0.csv, part-1.csv, etc (plus the extension of the compression, e.g. part-0.csv.gz).
+            Each file has its own header and can be read back with ReadCSVFileRule("part-[0-9]+\\.csv", file_dir=..., regex=True).
+            The dask backend writes one file per partition, in parallel. The pandas and polars backends write one file
+            per batch in streaming mode and a single part-0.csv otherwise.
+            The part files written by a previous run are removed first. Defaults to False.
+        use_pyarrow: When True, the pyarrow csv writer is used by the backends which support it (pandas and dask).
+            The dataframe is converted to arrow and written in batches, which is faster than the pandas csv writer.
+            The output differs slightly from the pandas writer: the column names and the strings are quoted, the booleans are written
+            as true/false and the datetimes with a fractional part. The polars csv writer is already multithreaded
+            and polars ignores this option. Defaults to False.
+        max_workers: The maximum number of threads compressing the file in parallel. The gzip, bz2, xz and zstd files
+            are compressed in blocks of 8MB, in parallel, while the csv is being written. The blocks are written
+            as multiple gzip members, bz2/xz streams or zstd frames, which are readable by the standard tools.
+            Defaults to None, which uses the Python default for thread pools. The dask backend compresses
+            the partitions in parallel instead and ignores this option.
 
         named_input (Optional[str]): Select by name the dataframe to write from the input data.
             Optional. When not specified, the main output of the previous rule will be written.
@@ -298,6 +1206,12 @@ class WriteCSVFileRule(BaseWriteFileRule):
         description (Optional[str]): Describe in detail what the rules does, how it does it. Optional.
             Together with the name, the description acts as the documentation of the rule.
         strict (bool): When set to True, the rule does a stricter valiation. Default: True.
+
+    Note:
+        When writing a single file, the dask backend writes the partitions in parallel into temporary part files
+        (next to the output file) which are then appended byte by byte into the output file, with a single header.
+        The compressed parts are appended as multiple gzip members, bz2/xz streams or zstd frames, which are readable
+        by the standard tools. The zip compression cannot be appended and the partitions are written one after another.
     """
 
     COMPRESSIONS = {
@@ -305,22 +1219,89 @@ class WriteCSVFileRule(BaseWriteFileRule):
         'gzip': '.gz',
         'bz2': '.bz2',
         'xz': '.xz',
+        'zstd': '.zst',
     }
 
-    def __init__(self, file_name: str, file_dir: str=".", separator: str=",", header: bool=True, compression: Optional[str]=None, named_input: Optional[str]=None, name: Optional[str]=None, description: Optional[str]=None, strict: bool=True):
+    PART_FILE_PATTERN = re.compile(r"part-[0-9]+\.csv(\.zip|\.gz|\.bz2|\.xz|\.zst)?")
+
+    def __init__(self, file_name: str, file_dir: str=".", separator: str=",", header: bool=True, compression: Optional[str]=None,
+                 partitioned: bool=False, use_pyarrow: bool=False, max_workers: Optional[int]=None,
+                 named_input: Optional[str]=None, name: Optional[str]=None, description: Optional[str]=None, strict: bool=True):
         super().__init__(
             file_name=file_name, file_dir=file_dir, named_input=named_input, 
             name=name, description=description, strict=strict)
         self.separator = separator
         self.header = header
         assert compression is None or compression in self.COMPRESSIONS.keys(), f"Unsupported compression '{compression}'. It must be one of: {self.COMPRESSIONS.keys()}."
-        if compression:
+        self.partitioned = bool(partitioned)
+        if compression and not self.partitioned:
             assert file_name.endswith(self.COMPRESSIONS[compression]), f"The file name {file_name} must have the extension {self.COMPRESSIONS[compression]} when the compression is set to {compression}."
         self.compression = compression
+        self.use_pyarrow = bool(use_pyarrow)
+        assert max_workers is None or (isinstance(max_workers, int) and max_workers > 0), "max_workers must be a positive integer."
+        self.max_workers = max_workers
+
+    def _open_output(self, stack: contextlib.ExitStack, file_path: str, max_workers: Optional[int]=None):
+        """ Opens the file for writing as a binary stream, compressed in parallel blocks (except zip, see the backends). """
+        if self.compression is not None:
+            return stack.enter_context(ParallelCompressedWriter(file_path, self.compression, max_workers or self.max_workers))
+        return stack.enter_context(open(file_path, "wb"))
+
+    def _write_arrow_tables(self, f, tables: Iterable, header: bool) -> None:
+        """ Writes pyarrow tables as csv to a binary stream with the pyarrow csv writer.
+
+        The schema is taken from the first table, the subsequent tables are cast to it.
+        """
+        import pyarrow.csv as pcsv
+        options = pcsv.WriteOptions(include_header=header, batch_size=ARROW_CSV_BATCH_SIZE, delimiter=self.separator)
+        writer = None
+        schema = None
+        try:
+            for table in tables:
+                if writer is None:
+                    schema = table.schema
+                    writer = pcsv.CSVWriter(f, schema, write_options=options)
+                elif not table.schema.equals(schema, check_metadata=False):
+                    table = table.cast(schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+
+    def _get_part_file_name(self, idx: int) -> str:
+        return f"part-{idx}.csv{self.COMPRESSIONS[self.compression] if self.compression else ''}"
+
+    def _prepare_parts_dir(self, path: str) -> None:
+        """ Creates the directory of the part files and removes the part files written by a previous run. """
+        os.makedirs(path, exist_ok=True)
+        for file_name in os.listdir(path):
+            if self.PART_FILE_PATTERN.fullmatch(file_name):
+                os.remove(os.path.join(path, file_name))
+
+    def do_write_parts(self, path: str, df) -> None:
+        """ Writes the dataframe into part files in the path directory. """
+        self.do_write(self._get_part_file_name(0), path, df)
+
+    def write(self, file_name: str, file_dir: str, df) -> None:
+        if not self.partitioned:
+            super().write(file_name, file_dir, df)
+            return
+        path = os.path.join(file_dir, file_name)
+        self._prepare_parts_dir(path)
+        self.do_write_parts(path, df)
+
+    def write_batches(self, dfs: Iterable) -> None:
+        if not self.partitioned:
+            super().write_batches(dfs)
+            return
+        path = os.path.join(subst_string(self.file_dir), subst_string(self.file_name))
+        self._prepare_parts_dir(path)
+        for idx, df in enumerate(dfs):
+            self.do_write(self._get_part_file_name(idx), path, df)
 
 
 class WriteParquetFileRule(BaseWriteFileRule):
-    """ Writes an existing dataframe to a parquet file on disk.
+    """ Writes an existing dataframe to a parquet file (or a hive partitioned dataset) on disk.
 
     The rule is a final rule, which means it produces no additional outputs, it takes any of the existing outputs and writes it to disk.
 
@@ -334,13 +1315,33 @@ class WriteParquetFileRule(BaseWriteFileRule):
         rule = WriteParquetFileRule("test_data.parquet", "/home/myuser/", named_input="input_data")
         rule.apply(data)
 
+        # writes a hive partitioned dataset in the directory /home/myuser/lake
+        # e.g. /home/myuser/lake/year=2023/desk=fx/part-0.parquet
+        # with the rows sorted by trade_date for tight row group statistics
+        rule = WriteParquetFileRule("lake", "/home/myuser/", partition_by=["year", "desk"], sort_by=["trade_date"])
+        rule.apply(data)
+
     Args:
         file_name: The name of the parquet file to write to disk. It will be written in the directory
             specified by the file_dir parameter.
+            When partition_by or max_rows_per_file are specified, file_name is the name of the directory where
+            the dataset is written, which can be read back with ReadParquetFileRule(file_name, dataset=True).
         file_dir: The file directory where the file_name should be written.
             Defaults to . (ie the current directory).
         compression: Compress the parquet file using a supported compression algorithms. Optional.
             The following compression algorithms are supported: "snappy", "gzip", "brotli", "lz4", "zstd".
+        partition_by: A list of columns to partition the data by, in a hive layout: one directory per distinct value
+            (e.g. year=2023/desk=fx). The values of the partition columns are stored in the names of the directories
+            and not in the files. Readers filtering on these columns skip the directories not matching the filters.
+        row_group_size: The maximum number of rows in each row group. Optional.
+            Smaller row groups allow finer grained skipping using the row group statistics when reading with filters,
+            at the expense of a larger file and less efficient compression.
+        max_rows_per_file: The maximum number of rows written in a file, in which case multiple files are written
+            (in each partition) as a dataset. Optional.
+        sort_by: A list of columns to sort the data by (ascending) before writing. Optional.
+            Sorting makes the min/max statistics of the row groups tight, such that the readers filtering on the sorted
+            columns can skip most of the row groups.
+            The dask backend sorts each partition, which is written to its own file(s).
 
         named_input (Optional[str]): Select by name the dataframe to write from the input data.
             Optional. When not specified, the main output of the previous rule will be written.
@@ -349,10 +1350,152 @@ class WriteParquetFileRule(BaseWriteFileRule):
         description (Optional[str]): Describe in detail what the rules does, how it does it. Optional.
             Together with the name, the description acts as the documentation of the rule.
         strict (bool): When set to True, the rule does a stricter valiation. Default: True.
+
+    Raises:
+        MissingColumnError: raised if any of the partition_by or sort_by columns don't exist in the input dataframe.
+
+    Note:
+        When writing a dataset, the parquet files written by a previous run (named part-*.parquet) are removed.
     """
 
     COMPRESSIONS = ("snappy", "gzip", "brotli", "lz4", "zstd")
 
+    DATASET_FILE_PATTERN = re.compile(r"part-[0-9-]+\.parquet")
+
+    def __init__(self, file_name: str, file_dir: str=".", compression: Optional[str]=None, partition_by: Optional[Sequence[str]]=None,
+                 row_group_size: Optional[int]=None, max_rows_per_file: Optional[int]=None, sort_by: Optional[Sequence[str]]=None,
+                 named_input: Optional[str]=None, name: Optional[str]=None, description: Optional[str]=None, strict: bool=True):
+        super().__init__(
+            file_name=file_name, file_dir=file_dir, named_input=named_input, 
+            name=name, description=description, strict=strict)
+        assert compression is None or compression in self.COMPRESSIONS, f"Unsupported compression '{compression}'. It must be one of: {self.COMPRESSIONS}."
+        self.compression = compression
+        self.partition_by = [col for col in partition_by] if partition_by else None
+        if self.partition_by is not None:
+            assert all(isinstance(col, str) for col in self.partition_by), "partition_by must be a list of strings."
+        assert row_group_size is None or (isinstance(row_group_size, int) and row_group_size > 0), "row_group_size must be a positive integer."
+        self.row_group_size = row_group_size
+        assert max_rows_per_file is None or (isinstance(max_rows_per_file, int) and max_rows_per_file > 0), "max_rows_per_file must be a positive integer."
+        self.max_rows_per_file = max_rows_per_file
+        if row_group_size is not None and max_rows_per_file is not None and row_group_size > max_rows_per_file:
+            raise ValueError("row_group_size cannot be greater than max_rows_per_file.")
+        self.sort_by = [col for col in sort_by] if sort_by else None
+        if self.sort_by is not None:
+            assert all(isinstance(col, str) for col in self.sort_by), "sort_by must be a list of strings."
+
+    def is_streamable(self):
+        # sorting needs all the rows
+        return self.sort_by is None
+
+    def _is_dataset(self) -> bool:
+        return self.partition_by is not None or self.max_rows_per_file is not None
+
+    def _clear_dataset_dir(self, path: str) -> None:
+        """ Removes the files written in a previous run to the dataset directory (only the files named as this rule names them). """
+        if not os.path.isdir(path):
+            return
+        for root, _, file_names in os.walk(path):
+            for file_name in file_names:
+                if self.DATASET_FILE_PATTERN.fullmatch(file_name):
+                    os.remove(os.path.join(root, file_name))
+
+    def _prepare_table(self, table):
+        """ Validates the partition and sort columns exist and sorts the table when sort_by is specified. """
+        missing_columns = [col for col in (self.partition_by or []) + (self.sort_by or []) if col not in table.column_names]
+        if missing_columns:
+            raise MissingColumnError(f"Columns {missing_columns} are missing from the input dataframe.")
+        if self.sort_by:
+            table = table.sort_by([(col, "ascending") for col in self.sort_by])
+        return table
+
+    def _write_dataset(self, path: str, table, basename_template: str) -> None:
+        """ Writes a pyarrow table as a (hive partitioned) dataset of parquet files in the path directory. """
+        import pyarrow.dataset as ds
+        max_rows_per_group = self.row_group_size or 1024 * 1024
+        if self.max_rows_per_file is not None:
+            max_rows_per_group = min(max_rows_per_group, self.max_rows_per_file)
+        ds.write_dataset(
+            table, path, format="parquet",
+            partitioning=self.partition_by, partitioning_flavor="hive" if self.partition_by else None,
+            basename_template=basename_template,
+            file_options=ds.ParquetFileFormat().make_write_options(compression=self.compression or "none"),
+            max_rows_per_file=self.max_rows_per_file or 0,
+            min_rows_per_group=self.row_group_size or 0, max_rows_per_group=max_rows_per_group,
+            # a single thread keeps the order of the rows (e.g. sorted) in the files
+            use_threads=False,
+            existing_data_behavior="overwrite_or_ignore",
+        )
+
+    def _write_table(self, file_path: str, table) -> None:
+        """ Writes a pyarrow table to a parquet file or a dataset (see partition_by and max_rows_per_file). """
+        import pyarrow.parquet as pq
+        table = self._prepare_table(table)
+        if self._is_dataset():
+            self._clear_dataset_dir(file_path)
+            self._write_dataset(file_path, table, "part-{i}.parquet")
+        else:
+            pq.write_table(table, file_path, compression=self.compression or "none", row_group_size=self.row_group_size)
+
+    def _write_tables(self, file_path: str, tables: Iterable) -> None:
+        """ Writes pyarrow tables to a single parquet file, appending each table as new row groups.
+
+        The schema of the file is taken from the first table, the subsequent tables are cast to it.
+        When writing a dataset, each table is written to its own file(s) in the dataset.
+        """
+        import pyarrow.parquet as pq
+        if self._is_dataset():
+            self._clear_dataset_dir(file_path)
+            for idx, table in enumerate(tables):
+                self._write_dataset(file_path, self._prepare_table(table), f"part-{idx}-{{i}}.parquet")
+            return
+        writer = None
+        try:
+            for table in tables:
+                if writer is None:
+                    writer = pq.ParquetWriter(file_path, table.schema, compression=self.compression or "none")
+                elif not table.schema.equals(writer.schema, check_metadata=False):
+                    table = table.cast(writer.schema)
+                writer.write_table(table, row_group_size=self.row_group_size)
+        finally:
+            if writer is not None:
+                writer.close()
+
+
+class WriteArrowFileRule(BaseWriteFileRule):
+    """ Writes an existing dataframe to an Arrow IPC (Feather v2) file on disk.
+
+    The rule is a final rule, which means it produces no additional outputs, it takes any of the existing outputs and writes it to disk.
+
+    Basic usage::
+
+        # writes a file data.arrow and persists the main output of the previous rule to it
+        rule = WriteArrowFileRule("data.arrow", "/home/myuser/")
+        rule.apply(data)
+
+        # writes a file test_data.arrow compressed with zstd and persists the dataframe named input_data into it
+        rule = WriteArrowFileRule("test_data.arrow", "/home/myuser/", compression="zstd", named_input="input_data")
+        rule.apply(data)
+
+    Args:
+        file_name: The name of the Arrow IPC file to write to disk. It will be written in the directory
+            specified by the file_dir parameter.
+        file_dir: The file directory where the file_name should be written.
+            Defaults to . (ie the current directory).
+        compression: Compress the file using a supported compression algorithms. Optional.
+            The following compression algorithms are supported: "lz4", "zstd".
+            Uncompressed files are faster to read as they can be memory-mapped.
+
+        named_input (Optional[str]): Select by name the dataframe to write from the input data.
+            Optional. When not specified, the main output of the previous rule will be written.
+        name (Optional[str]): Give the rule a name. Optional.
+            Named rules are more descriptive as to what they're trying to do/the intent.
+        description (Optional[str]): Describe in detail what the rules does, how it does it. Optional.
+            Together with the name, the description acts as the documentation of the rule.
+        strict (bool): When set to True, the rule does a stricter valiation. Default: True.
+    """
+
+    COMPRESSIONS = ("lz4", "zstd")
+
     def __init__(self, file_name: str, file_dir: str=".", compression: Optional[str]=None, named_input: Optional[str]=None, name: Optional[str]=None, description: Optional[str]=None, strict: bool=True):
         super().__init__(
             file_name=file_name, file_dir=file_dir, named_input=named_input, 
@@ -360,3 +1503,94 @@ class WriteParquetFileRule(BaseWriteFileRule):
         assert compression is None or compression in self.COMPRESSIONS, f"Unsupported compression '{compression}'. It must be one of: {self.COMPRESSIONS}."
         self.compression = compression
 
+    def _write_tables(self, file_path: str, tables: Iterable) -> None:
+        """ Writes pyarrow tables to a single Arrow IPC file, appending each table as new record batches.
+
+        The schema of the file is taken from the first table, the subsequent tables are cast to it.
+        """
+        import pyarrow as pa
+        options = pa.ipc.IpcWriteOptions(compression=self.compression)
+        writer = None
+        schema = None
+        try:
+            for table in tables:
+                if writer is None:
+                    schema = table.schema
+                    writer = pa.ipc.new_file(file_path, schema, options=options)
+                elif not table.schema.equals(schema, check_metadata=False):
+                    table = table.cast(schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+
+
+class WriteJSONLinesFileRule(BaseWriteFileRule):
+    """ Writes an existing dataframe to a JSON Lines (newline delimited json) file (optionally compressed) on disk.
+
+    Each row of the dataframe is written as a json object on its own line.
+
+    The rule is a final rule, which means it produces no additional outputs, it takes any of the existing outputs and writes it to disk.
+
+    Basic usage::
+
+        # writes a file data.jsonl and persists the main output of the previous rule to it
+        rule = WriteJSONLinesFileRule("data.jsonl", "/home/myuser/")
+        rule.apply(data)
+
+        # writes a gzipped file test_data.jsonl.gz and persists the dataframe named input_data into it
+        rule = WriteJSONLinesFileRule("test_data.jsonl.gz", "/home/myuser/", compression="gzip", named_input="input_data")
+        rule.apply(data)
+
+    Args:
+        file_name: The name of the JSON Lines file to write to disk. It will be written in the directory
+            specified by the file_dir parameter.
+        file_dir: The file directory where the file_name should be written.
+            Defaults to . (ie the current directory).
+        compression: Compress the file using a supported compression algorithms. Optional.
+            When the compression is specified, the file_name must end with the extension associate with that
+            compression format. The following options are supported:
+            gzip - file_name must end with .gz (e.g. output.jsonl.gz)
+            bz2 - file_name must end with .bz2 (e.g. output.jsonl.bz2)
+            xz - file_name must end with .xz (e.g. output.jsonl.xz)
+            zstd - file_name must end with .zst (e.g. output.jsonl.zst)
+
+        named_input (Optional[str]): Select by name the dataframe to write from the input data.
+            Optional. When not specified, the main output of the previous rule will be written.
+        name (Optional[str]): Give the rule a name. Optional.
+            Named rules are more descriptive as to what they're trying to do/the intent.
+        description (Optional[str]): Describe in detail what the rules does, how it does it. Optional.
+            Together with the name, the description acts as the documentation of the rule.
+        strict (bool): When set to True, the rule does a stricter valiation. Default: True.
+
+    Note:
+        In streaming mode, the batches are appended to the file (and compressed) as they are written.
+        The dask backend writes the partitions in parallel into temporary part files (next to the output file)
+        which are then appended byte by byte into the output file. The compressed parts are appended as multiple
+        gzip members, bz2/xz streams or zstd frames, which are readable by the standard tools.
+    """
+
+    COMPRESSIONS = {
+        'gzip': '.gz',
+        'bz2': '.bz2',
+        'xz': '.xz',
+        'zstd': '.zst',
+    }
+
+    def __init__(self, file_name: str, file_dir: str=".", compression: Optional[str]=None, named_input: Optional[str]=None, name: Optional[str]=None, description: Optional[str]=None, strict: bool=True):
+        super().__init__(
+            file_name=file_name, file_dir=file_dir, named_input=named_input, 
+            name=name, description=description, strict=strict)
+        assert compression is None or compression in self.COMPRESSIONS.keys(), f"Unsupported compression '{compression}'. It must be one of: {self.COMPRESSIONS.keys()}."
+        if compression:
+            assert file_name.endswith(self.COMPRESSIONS[compression]), f"The file name {file_name} must have the extension {self.COMPRESSIONS[compression]} when the compression is set to {compression}."
+        self.compression = compression
+
+    def _open_output(self, stack: contextlib.ExitStack, file_path: str):
+        """ Opens a (compressed) file for writing as a binary stream. """
+        if self.compression == "zstd":
+            import pyarrow as pa
+            # arrow's zstd codec, the zstd module is not part of the standard library
+            return stack.enter_context(pa.CompressedOutputStream(file_path, "zstd"))
+        opener = {"gzip": gzip.open, "bz2": bz2.open, "xz": lzma.open}.get(self.compression, open)
+        return stack.enter_context(opener(file_path, "wb"))
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import urllib.error
+from typing import Optional
+from urllib.parse import urlsplit
+
+from etlrules.backends.common.io.http_download import download
+
+
+perf_logger = logging.getLogger("etlrules.perf")
+
+
+def get_http_cache_dir() -> Optional[str]:
+    """ Returns the directory where the files read from http(s) URIs are cached or None when not cached.
+
+    It's set via the ETLRULES_HTTP_CACHE_DIR environment variable (the directory is created if needed).
+    When not set, the files are downloaded on every read.
+    """
+    return os.environ.get("ETLRULES_HTTP_CACHE_DIR") or None
+
+
+class HttpCache:
+    """ A local cache of the files read from http(s) URIs, revalidated with the server on every read.
+
+    Each file is stored in the cache directory together with its ETag and Last-Modified response headers.
+    When the file is read again, a conditional GET (If-None-Match/If-Modified-Since) is sent to the server
+    and the local copy is used when the server replies 304 Not Modified. Otherwise, the new contents of the
+    file are downloaded and replace the local copy. The files served without ETag or Last-Modified headers
+    cannot be revalidated and are downloaded every time. The files are downloaded with parallel range
+    requests when the server supports them (see etlrules.backends.common.io.http_download.download).
+
+    The revalidations (304), the downloads and the bytes downloaded are counted (see get_stats) and logged
+    to the etlrules.perf logger.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = self._empty_stats()
+
+    def _empty_stats(self) -> dict:
+        return {"not_modified": 0, "downloads": 0, "bytes_downloaded": 0}
+
+    def count(self, **counts: int) -> None:
+        with self._lock:
+            for key, value in counts.items():
+                self._stats[key] += value
+
+    def get_stats(self) -> dict:
+        """ Returns the counters of the cache: not_modified (served from the local copy), downloads and bytes_downloaded. """
+        with self._lock:
+            return dict(self._stats)
+
+    def clear_stats(self) -> None:
+        """ Resets the counters. The files cached on disk are kept. """
+        with self._lock:
+            self._stats = self._empty_stats()
+
+    def _get_paths(self, cache_dir: str, url: str):
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        # the name of the file is kept (e.g. data.csv.gz) so the format and compression can be inferred from it
+        base_name = re.sub(r"[^A-Za-z0-9._-]", "_", os.path.basename(urlsplit(url).path))
+        data_path = os.path.join(cache_dir, f"{digest}-{base_name}" if base_name else digest)
+        return data_path, os.path.join(cache_dir, f"{digest}.json")
+
+    def _load_entry(self, data_path: str, meta_path: str) -> Optional[dict]:
+        if not os.path.exists(data_path) or not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path, "rt") as f:
+                entry = json.load(f)
+        except ValueError:
+            return None
+        if not isinstance(entry, dict) or entry.get("size") != os.path.getsize(data_path):
+            # an incomplete or corrupt local copy is downloaded again
+            return None
+        return entry
+
+    def _write_entry(self, meta_path: str, entry: dict) -> None:
+        tmp_path = f"{meta_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wt") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, meta_path)
+
+    def get(self, url: str, cache_dir: str) -> str:
+        """ Returns the path of the local copy of the file at url, downloading it only when it changed on the server. """
+        os.makedirs(cache_dir, exist_ok=True)
+        data_path, meta_path = self._get_paths(cache_dir, url)
+        entry = self._load_entry(data_path, meta_path)
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        tmp_path = f"{data_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            response_headers = download(url, tmp_path, headers)
+            # atomic, so concurrent readers never see a partially written file
+            os.replace(tmp_path, data_path)
+        except urllib.error.HTTPError as exc:
+            if exc.code == 304 and entry is not None:
+                self.count(not_modified=1)
+                perf_logger.info("Using the cached copy of '%s' (not modified).", url)
+                return data_path
+            raise
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        entry = {
+            "url": url,
+            "etag": response_headers.get("ETag"),
+            "last_modified": response_headers.get("Last-Modified"),
+            "size": os.path.getsize(data_path),
+        }
+        # written after the data, a stale entry only causes the file to be downloaded again
+        self._write_entry(meta_path, entry)
+        self.count(downloads=1, bytes_downloaded=entry["size"])
+        perf_logger.info("Downloaded '%s' (%d bytes) to the http cache.", url, entry["size"])
+        return data_path
+
+
+HTTP_CACHE = HttpCache()
+
+
+def get_http_cache_stats() -> dict:
+    """ Returns the counters of the process-wide http cache. """
+    return HTTP_CACHE.get_stats()
+
+
+def clear_http_cache_stats() -> None:
+    """ Resets the counters of the process-wide http cache. """
+    HTTP_CACHE.clear_stats()
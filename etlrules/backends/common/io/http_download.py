@@ -0,0 +1,217 @@
+import contextlib
+import io
+import os
+import re
+import shutil
+import tempfile
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional, Union
+
+from etlrules.data import get_temp_dir
+
+
+# the size of the chunks the downloads are written to disk in
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# the size of the ranges a file is downloaded in, the files up to this size are downloaded with a single request
+RANGE_SIZE = 8 * 1024 * 1024
+
+# the maximum number of ranges downloaded in parallel
+RANGE_DOWNLOAD_WORKERS = 8
+
+# the timeout in seconds of the http requests
+HTTP_TIMEOUT = 60
+
+CONTENT_RANGE_RE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+
+
+def _request(url: str, headers: dict):
+    return urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=HTTP_TIMEOUT)
+
+
+def _get_total_size(response) -> Optional[int]:
+    """ Returns the size of the whole file from the Content-Range of a 206 response or None. """
+    if response.status != 206:
+        return None
+    match = CONTENT_RANGE_RE.match(response.headers.get("Content-Range", ""))
+    if match is None or match.group(3) == "*":
+        return None
+    return int(match.group(3))
+
+
+def _get_validator(headers) -> Optional[str]:
+    # the ranges are only served if the file is unchanged since the first request (If-Range)
+    # the weak ETags (W/"...") cannot be used with If-Range, the servers reply with the whole file
+    etag = headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("Last-Modified")
+
+
+def _open_first_range(url: str, headers: dict, length: int):
+    try:
+        return _request(url, {**headers, "Range": f"bytes=0-{length - 1}"})
+    except urllib.error.HTTPError as exc:
+        if exc.code != 416:
+            raise
+        # range not satisfiable (e.g. an empty file)
+        return _request(url, headers)
+
+
+def _write_response(response, file_path: str, total_size: Optional[int]) -> None:
+    with open(file_path, "wb") as f:
+        shutil.copyfileobj(response, f, DOWNLOAD_CHUNK_SIZE)
+        if total_size is not None:
+            f.truncate(total_size)
+
+
+def download(url: str, file_path: str, headers: Optional[dict]=None, max_workers: int=RANGE_DOWNLOAD_WORKERS):
+    """ Downloads the file at url into file_path and returns the headers of the (first) response.
+
+    The first range of the file is requested with a Range header. When the server supports range requests
+    (206 Partial Content) and the file is larger than RANGE_SIZE, the rest of the file is downloaded as
+    ranges of RANGE_SIZE bytes over up to max_workers parallel connections, each range written at its offset
+    in the file. Otherwise, the whole file is streamed from the first response. When the server doesn't
+    report the size of the file with the range, the whole file is requested again without a range.
+
+    Args:
+        url: The http(s) URI of the file.
+        file_path: The local path to download the file to.
+        headers: Additional request headers (e.g. for conditional requests). Optional.
+        max_workers: The maximum number of parallel connections. Default: 8.
+
+    Raises:
+        urllib.error.HTTPError: raised for the error responses (including 304 Not Modified for conditional requests).
+        IOError: raised if the file changes on the server during the download.
+    """
+    headers = dict(headers or {})
+    with _open_first_range(url, headers, RANGE_SIZE) as response:
+        response_headers = response.headers
+        total_size = _get_total_size(response)
+        size_unknown = response.status == 206 and total_size is None
+        if not size_unknown:
+            _write_response(response, file_path, total_size)
+    if size_unknown:
+        # a range of a file of unknown size (Content-Range: bytes 0-N/*), the whole file is downloaded instead
+        with _request(url, headers) as response:
+            response_headers = response.headers
+            _write_response(response, file_path, None)
+        return response_headers
+    if total_size is None or total_size <= RANGE_SIZE:
+        return response_headers
+
+    validator = _get_validator(response_headers)
+    fd = os.open(file_path, os.O_WRONLY)
+    try:
+        def download_range(start: int):
+            end = min(start + RANGE_SIZE, total_size) - 1
+            range_headers = {"Range": f"bytes={start}-{end}"}
+            if validator:
+                range_headers["If-Range"] = validator
+            with _request(url, range_headers) as response:
+                # without a validator, a changed file is only detected by its size
+                if response.status != 206 or _get_total_size(response) != total_size:
+                    raise IOError(f"The file '{url}' changed on the server during the download.")
+                offset = start
+                for chunk in iter(lambda: response.read(DOWNLOAD_CHUNK_SIZE), b""):
+                    os.pwrite(fd, chunk, offset)
+                    offset += len(chunk)
+            if offset != end + 1:
+                raise IOError(f"Incomplete download of '{url}': range {start}-{end} ended at {offset}.")
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(download_range, range(RANGE_SIZE, total_size, RANGE_SIZE)))
+    finally:
+        os.close(fd)
+    return response_headers
+
+
+@contextlib.contextmanager
+def downloaded_file(url: str) -> Iterator[str]:
+    """ Yields the path of a temporary copy (in the etlrules temp dir) of the file at url, removed on exit. """
+    suffix = os.path.basename(urllib.parse.urlsplit(url).path)
+    fd, temp_path = tempfile.mkstemp(prefix="etlrules_download_", suffix=f"_{suffix}" if suffix else "", dir=get_temp_dir())
+    os.close(fd)
+    try:
+        download(url, temp_path)
+        yield temp_path
+    finally:
+        os.remove(temp_path)
+
+
+class HttpRangeFile(io.RawIOBase):
+    """ A read-only, seekable file over http, which fetches only the ranges of the file which are read.
+
+    Used to read the footer and only the required column chunks of the remote parquet files.
+    The server must support range requests (see open_uri).
+    """
+
+    def __init__(self, url: str, size: int, validator: Optional[str]=None):
+        super().__init__()
+        self.url = url
+        self.size = size
+        self.validator = validator
+        self._pos = 0
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int=io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence {whence}.")
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        start = self._pos
+        end = min(start + len(buffer), self.size) - 1
+        if end < start:
+            return 0
+        headers = {"Range": f"bytes={start}-{end}"}
+        if self.validator:
+            headers["If-Range"] = self.validator
+        with _request(self.url, headers) as response:
+            if response.status != 206 or _get_total_size(response) != self.size:
+                raise IOError(f"The file '{self.url}' changed on the server while being read.")
+            data = response.read()
+        if len(data) != end - start + 1:
+            raise IOError(f"Incomplete read of '{self.url}': range {start}-{end} returned {len(data)} bytes.")
+        buffer[:len(data)] = data
+        self._pos += len(data)
+        self.bytes_read += len(data)
+        return len(data)
+
+
+@contextlib.contextmanager
+def open_uri(url: str) -> Iterator[Union[HttpRangeFile, str]]:
+    """ Yields a HttpRangeFile for url when the server supports range requests or the path of a downloaded copy otherwise. """
+    try:
+        response = _request(url, {"Range": "bytes=0-0"})
+    except urllib.error.HTTPError as exc:
+        if exc.code != 416:
+            raise
+        response = None
+    if response is not None:
+        with response:
+            total_size = _get_total_size(response)
+            validator = _get_validator(response.headers)
+        if total_size is not None:
+            yield HttpRangeFile(url, total_size, validator)
+            return
+    with downloaded_file(url) as file_path:
+        yield file_path
@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Sequence, Tuple
+
+
+MANIFEST_VERSION = 1
+
+# the files are hashed in chunks of this many bytes
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def get_file_hash(file_path: str) -> str:
+    """ Returns the sha256 hash of the contents of a file. """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FileManifest:
+    """ A manifest of the files already processed by a reader, persisted as a json state file.
+
+    Each file is recorded with its size, modification time and (optionally) the hash of its contents.
+    A file is new if it's not in the manifest and changed if its size or modification time differ from the manifest.
+    When the hashes are used, a file whose size or modification time differ but with the same contents
+    (e.g. touched or copied again) is not considered changed.
+
+    The manifest is only updated on disk when commit is called, such that a failed run leaves
+    the manifest unchanged and the same files are processed again by the next run.
+
+    Args:
+        manifest_file: The path of the json state file. It's created on the first commit.
+        use_hash: When True, the hashes of the files are recorded and compared. Default: False.
+    """
+
+    def __init__(self, manifest_file: str, use_hash: bool=False):
+        self.manifest_file = manifest_file
+        self.use_hash = use_hash
+
+    def load(self) -> Dict[str, dict]:
+        """ Returns the files recorded in the manifest as a mapping of absolute path to size, mtime_ns and hash. """
+        if not os.path.exists(self.manifest_file):
+            return {}
+        with open(self.manifest_file, "rt") as f:
+            try:
+                manifest = json.load(f)
+            except ValueError as exc:
+                raise ValueError(f"Invalid manifest file '{self.manifest_file}': {exc}")
+        if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"Invalid manifest file '{self.manifest_file}': unsupported version.")
+        return manifest.get("files", {})
+
+    def get_new_or_changed(self, file_paths: Sequence[str]) -> Tuple[List[str], Dict[str, dict]]:
+        """ Returns the files which are new or changed since the last commit and the manifest entries for all the files.
+
+        The entries should be passed to commit once the files have been processed successfully.
+        The files which are no longer found are dropped from the entries.
+        """
+        previous = self.load()
+        new_or_changed = []
+        entries = {}
+        for file_path in file_paths:
+            abs_path = os.path.abspath(file_path)
+            stat = os.stat(file_path)
+            entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            previous_entry = previous.get(abs_path)
+            changed = previous_entry is None or any(previous_entry.get(key) != value for key, value in entry.items())
+            if self.use_hash:
+                if changed:
+                    entry["hash"] = get_file_hash(file_path)
+                    changed = previous_entry is None or previous_entry.get("hash") != entry["hash"]
+                else:
+                    entry["hash"] = previous_entry.get("hash") or get_file_hash(file_path)
+            if changed:
+                new_or_changed.append(file_path)
+            entries[abs_path] = entry
+        return new_or_changed, entries
+
+    def commit(self, entries: Dict[str, dict]) -> None:
+        """ Writes the entries to the manifest file, replacing its previous contents atomically. """
+        manifest_dir = os.path.dirname(os.path.abspath(self.manifest_file))
+        os.makedirs(manifest_dir, exist_ok=True)
+        tmp_file = f"{self.manifest_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "wt") as f:
+            json.dump({"version": MANIFEST_VERSION, "files": entries}, f, indent=1, sort_keys=True)
+        os.replace(tmp_file, self.manifest_file)
@@ -0,0 +1,188 @@
+import hashlib
+import logging
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+
+perf_logger = logging.getLogger("etlrules.perf")
+
+# maximum number of parquet footers kept in the process-wide cache
+PARQUET_METADATA_CACHE_SIZE = 1024
+
+
+def get_metadata_cache_dir() -> Optional[str]:
+    """ Returns the directory where the parquet footers are persisted between processes or None when not persisted.
+
+    It's set via the ETLRULES_PARQUET_METADATA_CACHE_DIR environment variable (the directory is created if needed).
+    When not set, the footers are only cached in memory, for the lifetime of the process.
+    """
+    return os.environ.get("ETLRULES_PARQUET_METADATA_CACHE_DIR") or None
+
+
+class ParquetMetadataCache:
+    """ A process-wide cache of the parquet footers (schema, row groups and their min/max statistics).
+
+    The footers are keyed by the absolute path, the modification time and the size of the files
+    so a file which is rewritten is never served a stale footer. Optionally, the footers are also
+    persisted on disk (see get_metadata_cache_dir) so that they survive the process.
+
+    The hits and misses are counted (see get_stats) and logged to the etlrules.perf logger.
+    """
+
+    def __init__(self, maxsize: int=PARQUET_METADATA_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = self._empty_stats()
+
+    def _empty_stats(self) -> dict:
+        return {"hits": 0, "disk_hits": 0, "misses": 0, "files_skipped": 0, "row_groups_skipped": 0}
+
+    def count(self, **counts: int) -> None:
+        with self._lock:
+            for key, value in counts.items():
+                self._stats[key] += value
+
+    def get_stats(self) -> dict:
+        """ Returns the counters of the cache: hits (in memory), disk_hits, misses and the files and row groups skipped. """
+        with self._lock:
+            return dict(self._stats)
+
+    def clear(self) -> None:
+        """ Clears the footers cached in memory and resets the counters. The footers persisted on disk are kept. """
+        with self._lock:
+            self._cache.clear()
+            self._stats = self._empty_stats()
+
+    def _get_disk_path(self, cache_dir: str, key: tuple) -> str:
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(cache_dir, f"{digest}.metadata")
+
+    def _load_from_disk(self, cache_dir: str, key: tuple):
+        import pyarrow.parquet as pq
+        from pyarrow.lib import ArrowException
+        disk_path = self._get_disk_path(cache_dir, key)
+        if not os.path.exists(disk_path):
+            return None
+        try:
+            return pq.read_metadata(disk_path)
+        except (OSError, ArrowException):
+            # a corrupt or truncated cache file is treated as a miss and rewritten
+            return None
+
+    def _save_to_disk(self, cache_dir: str, key: tuple, metadata) -> None:
+        os.makedirs(cache_dir, exist_ok=True)
+        disk_path = self._get_disk_path(cache_dir, key)
+        tmp_path = f"{disk_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            metadata.write_metadata_file(tmp_path)
+            # atomic, so concurrent readers never see a partially written file
+            os.replace(tmp_path, disk_path)
+        except OSError:
+            perf_logger.warning("Cannot persist the parquet footer cache to '%s'.", cache_dir)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def get(self, file_path: str):
+        """ Returns the pyarrow FileMetaData of a parquet file, reading the footer of the file only on a cache miss. """
+        import pyarrow.parquet as pq
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        key = (file_path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            metadata = self._cache.get(key)
+            if metadata is not None:
+                self._cache.move_to_end(key)
+                self._stats["hits"] += 1
+                return metadata
+        cache_dir = get_metadata_cache_dir()
+        metadata = self._load_from_disk(cache_dir, key) if cache_dir else None
+        if metadata is not None:
+            self.count(disk_hits=1)
+        else:
+            self.count(misses=1)
+            metadata = pq.read_metadata(file_path)
+            if cache_dir:
+                self._save_to_disk(cache_dir, key, metadata)
+        with self._lock:
+            self._cache[key] = metadata
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return metadata
+
+
+PARQUET_METADATA_CACHE = ParquetMetadataCache()
+
+
+def get_parquet_metadata_cache_stats() -> dict:
+    """ Returns the counters of the process-wide parquet footers cache. """
+    return PARQUET_METADATA_CACHE.get_stats()
+
+
+def clear_parquet_metadata_cache() -> None:
+    """ Clears the process-wide cache of parquet footers and resets its counters. """
+    PARQUET_METADATA_CACHE.clear()
+
+
+def _condition_may_match(statistics, physical_type: str, op: str, value: Any) -> bool:
+    """ Returns False only when the min/max statistics prove no value in the column chunk satisfies the condition. """
+    if statistics is None or not statistics.has_min_max or value is None:
+        return True
+    min_value, max_value = statistics.min, statistics.max
+    try:
+        if op in ("==", "="):
+            return min_value <= value <= max_value
+        elif op == ">":
+            return max_value > value
+        elif op == ">=":
+            return max_value >= value
+        elif op == "<":
+            return min_value < value
+        elif op == "<=":
+            return min_value <= value
+        elif op == "in":
+            return any(val is None or min_value <= val <= max_value for val in value)
+        elif physical_type in ("FLOAT", "DOUBLE"):
+            # the NaNs are not part of the min/max statistics and they are != to any value
+            return True
+        elif op == "!=":
+            return not (min_value == max_value == value)
+        elif op == "not in":
+            return not (min_value == max_value and min_value in value)
+    except TypeError:
+        # values not comparable with the statistics (e.g. timezone aware vs naive datetimes)
+        return True
+    return True
+
+
+def row_group_may_match(row_group, filters: List[List[Tuple]]) -> bool:
+    """ Returns False when the statistics of a row group prove none of its rows match the filters.
+
+    The filters are in disjunctive normal form: a list of AND-ed conditions which are OR-ed together.
+    The row groups without statistics, or with conditions which cannot be checked against the statistics,
+    are assumed to match.
+    """
+    if row_group.num_rows == 0:
+        return False
+    columns = {}
+    for idx in range(row_group.num_columns):
+        column = row_group.column(idx)
+        columns[column.path_in_schema] = column
+    for conditions in filters:
+        matches = True
+        for col, op, value in conditions:
+            column = columns.get(col)
+            if column is None:
+                continue
+            if isinstance(value, float) and math.isnan(value):
+                continue
+            if not _condition_may_match(column.statistics, column.physical_type, op, value):
+                matches = False
+                break
+        if matches:
+            return True
+    return False
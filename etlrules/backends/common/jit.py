@@ -0,0 +1,154 @@
+import ast
+import copy
+import logging
+import numpy as np
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Sequence
+
+try:
+    import numba
+    from numba.core.errors import NumbaError
+    from numba.np.numpy_support import as_dtype
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+perf_logger = logging.getLogger("etlrules.perf")
+
+# compiling a kernel takes a fraction of a second, which is more than evaluating
+# small dataframes row by row, so only jit compile for larger inputs
+JIT_MIN_ROWS = 100_000
+
+# numpy dtype kinds supported as kernel inputs: bool, signed/unsigned ints, floats
+JIT_DTYPE_KINDS = {"b", "i", "u", "f"}
+
+
+class _NotJitCompatibleError(Exception):
+    ...
+
+
+class JitTranslator(ast.NodeTransformer):
+    """ Rewrites a numeric-only row level expression into the body of a scalar function.
+
+    The columns referenced as df['COL'] are replaced with the arguments c0, c1, etc. and the
+    context values referenced as context.VAL or context['VAL'] with the arguments k0, k1, etc.
+    Only arithmetic, bitwise, comparison, boolean operators and conditional expressions over
+    numeric/boolean constants are allowed. Expressions using anything else (function calls,
+    strings, attributes, etc.) are not compatible and the translated source is None.
+    """
+
+    BIN_OPS = (
+        ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod,
+        ast.BitAnd, ast.BitOr, ast.BitXor, ast.LShift, ast.RShift,
+    )
+    UNARY_OPS = (ast.USub, ast.UAdd, ast.Not)
+    ALLOWED_NODES = (
+        ast.Expression, ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp, ast.Load,
+        ast.And, ast.Or, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+    ) + BIN_OPS + UNARY_OPS
+
+    def __init__(self, ast_expr: ast.Expression, columns: Sequence[str], context_values: Sequence[str]):
+        self.columns = {col: f"c{idx}" for idx, col in enumerate(columns)}
+        self.context_values = {val: f"k{idx}" for idx, val in enumerate(context_values)}
+        try:
+            body = self.visit(copy.deepcopy(ast_expr)).body
+            self.source = ast.unparse(body)
+        except _NotJitCompatibleError:
+            self.source = None
+
+    def _get_arg(self, node) -> Optional[str]:
+        if isinstance(node, (ast.Subscript, ast.Attribute)) and isinstance(node.value, ast.Name):
+            if isinstance(node, ast.Subscript) and isinstance(node.slice, ast.Constant):
+                key = node.slice.value
+            elif isinstance(node, ast.Attribute):
+                key = node.attr
+            else:
+                return None
+            if node.value.id == "df" and isinstance(node, ast.Subscript):
+                return self.columns.get(key)
+            elif node.value.id == "context":
+                return self.context_values.get(key)
+        return None
+
+    def generic_visit(self, node):
+        arg = self._get_arg(node)
+        if arg is not None:
+            return ast.Name(id=arg, ctx=ast.Load())
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float, bool):
+            return node
+        if not isinstance(node, self.ALLOWED_NODES):
+            raise _NotJitCompatibleError()
+        return super().generic_visit(node)
+
+
+class JitKernel:
+    """ A numba compiled loop evaluating a scalar expression over numpy arrays. """
+
+    def __init__(self, source: str, nb_args: int, nb_context_args: int, arg_types: tuple):
+        args = [f"c{idx}" for idx in range(nb_args)]
+        context_args = [f"k{idx}" for idx in range(nb_context_args)]
+        all_args = ", ".join(args + context_args)
+        namespace = {}
+        exec(f"def _scalar({all_args}):\n    return {source}\n", namespace)
+        # the numpy error model, as the row-wise evaluation: a division by zero gives inf or nan, not ZeroDivisionError
+        scalar_func = numba.njit(namespace["_scalar"], error_model="numpy")
+        scalar_func.compile(arg_types)
+        self.dtype = as_dtype(scalar_func.nopython_signatures[-1].return_type)
+        if self.dtype.kind not in JIT_DTYPE_KINDS:
+            raise TypeError(f"Unsupported result type {self.dtype} for jit compiled expressions.")
+        items = ", ".join([f"{arg}[i]" for arg in args] + context_args)
+        namespace = {"_scalar": scalar_func}
+        exec(
+            f"def _loop(out, {all_args}):\n"
+            f"    for i in range(out.shape[0]):\n"
+            f"        out[i] = _scalar({items})\n",
+            namespace
+        )
+        self._loop = numba.njit(namespace["_loop"], error_model="numpy")
+
+    def __call__(self, columns_values: Sequence[np.ndarray], context_values: Sequence[Any]) -> np.ndarray:
+        out = np.empty(len(columns_values[0]), dtype=self.dtype)
+        self._loop(out, *columns_values, *context_values)
+        return out
+
+
+# LRU of the compiled kernels (and the failures to compile), bounded by EXPRESSIONS_CACHE_SIZE
+_JIT_KERNELS = OrderedDict()
+_JIT_KERNELS_LOCK = threading.Lock()
+
+
+def clear_jit_kernels() -> None:
+    """ Clears the process-wide cache of compiled kernels. """
+    with _JIT_KERNELS_LOCK:
+        _JIT_KERNELS.clear()
+
+
+def get_jit_kernel(source: str, columns_values: Sequence[np.ndarray], context_values: Sequence[Any]) -> Optional[JitKernel]:
+    """ Returns a compiled kernel for the given translated source and input types or None if it cannot be compiled.
+
+    The kernels (and the failures to compile) are cached by the source and the types of the inputs,
+    in a process-wide LRU cache bounded to EXPRESSIONS_CACHE_SIZE entries.
+    """
+    from etlrules.backends.common.expressions import EXPRESSIONS_CACHE_SIZE
+    arg_types = tuple(numba.from_dtype(values.dtype) for values in columns_values) + tuple(
+        numba.typeof(value) for value in context_values
+    )
+    key = (source, arg_types)
+    with _JIT_KERNELS_LOCK:
+        if key in _JIT_KERNELS:
+            _JIT_KERNELS.move_to_end(key)
+            return _JIT_KERNELS[key]
+    try:
+        kernel = JitKernel(source, len(columns_values), len(context_values), arg_types)
+        perf_logger.info("Expression '%s' was jit compiled for the input types: %s", source, arg_types)
+    except (NumbaError, TypeError, NotImplementedError) as exc:
+        perf_logger.info("Expression '%s' cannot be jit compiled for the input types %s: %s", source, arg_types, exc)
+        kernel = None
+    with _JIT_KERNELS_LOCK:
+        _JIT_KERNELS[key] = kernel
+        _JIT_KERNELS.move_to_end(key)
+        while len(_JIT_KERNELS) > EXPRESSIONS_CACHE_SIZE:
+            _JIT_KERNELS.popitem(last=False)
+    return kernel
@@ -58,6 +58,10 @@ class AddNewColumnRule(UnaryOpBaseRule):
     Note:
         The implementation will try to use dataframe operations for performance, but when those are not supported it
         will fallback to row level operations.
+        When numba is installed, row level expressions operating only on numeric/boolean columns (without NAs) are
+        jit compiled into a loop over the column values for large dataframes.
+        Other row level expressions on large dataframes can be evaluated in parallel in a pool of worker processes
+        by setting the ETLRULES_EXPRESSION_WORKERS environment variable to the number of processes to use.
     
     Note:
         NA are treated slightly differently between dataframe level operations and row level.
@@ -77,6 +81,9 @@ class AddNewColumnRule(UnaryOpBaseRule):
         self.column_type = column_type
         self._column_expression = self.get_column_expression()
 
+    def is_streamable(self):
+        return True
+
     def _validate_columns(self, df_columns):
         if self.strict and self.output_column in df_columns:
             raise ColumnAlreadyExistsError(f"Column {self.output_column} already exists in the input dataframe.")
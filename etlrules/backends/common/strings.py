@@ -399,3 +399,6 @@ class StrExtractRule(UnaryOpBaseRule, ColumnsInOutMixin):
         if groups > 1 and self.output_columns is None:
             raise ValueError(f"The regular expression has more than 1 groups in which case output_columns must be specified (one per group).")
         self.keep_original_value = keep_original_value
+
+    def is_streamable(self):
+        return True
@@ -55,6 +55,8 @@ class TypeConversionRule(UnaryOpBaseRule):
             if type_str not in SUPPORTED_TYPES:
                 raise UnsupportedTypeError(f"Type '{type_str}' for column '{column_name}' is not currently supported.")
 
+    def is_streamable(self):
+        return True
 
     def do_type_conversion(self, df, col, dtype):
         raise NotImplementedError("Have you imported the rules from etlrules.backends.<your_backend> and not common?")
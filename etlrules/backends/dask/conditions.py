@@ -1,7 +1,10 @@
 import dask.array as da
+import numpy as np
+import pandas as pd
 
 from etlrules.backends.common.conditions import (
     IfThenElseRule as IfThenElseRuleBase,
+    CaseWhenRule as CaseWhenRuleBase,
     FilterRule as FilterRuleBase
 )
 from .expressions import Expression
@@ -10,7 +13,7 @@ from .expressions import Expression
 class IfThenElseRule(IfThenElseRuleBase):
 
     def get_condition_expression(self):
-        return Expression(self.condition_expression, filename=f'{self.output_column}.py')
+        return Expression.get(self.condition_expression, filename=f'{self.output_column}.py')
 
     def apply(self, data):
         df = self._get_input_df(data)
@@ -26,10 +29,46 @@ class IfThenElseRule(IfThenElseRuleBase):
         self._set_output_df(data, df)
 
 
+class CaseWhenRule(CaseWhenRuleBase):
+
+    def get_condition_expression(self, condition_expression, idx):
+        return Expression.get(condition_expression, filename=f'{self.output_column}_case_{idx}.py')
+
+    def _select(self, df: pd.DataFrame, condition_columns: list[str]) -> pd.Series:
+        conditions = [
+            df[col].fillna(False).to_numpy(dtype=bool) for col in condition_columns
+        ]
+        choices = [
+            case["then_value"] if "then_value" in case else df[case["then_column"]]
+            for case in self.cases
+        ]
+        else_value = self.else_value if self.else_column is None else df[self.else_column]
+        result = pd.Series(np.select(conditions, choices, else_value), index=df.index)
+        if self._has_str_values():
+            # all the partitions (including the empty ones) are string typed, as the meta
+            result = result.astype("string")
+        return result
+
+    def apply(self, data):
+        df = self._get_input_df(data)
+        df_columns = set(df.columns)
+        self._validate_columns(df_columns)
+        # the conditions are added as temporary columns so that all the cases are combined in one pass per partition
+        condition_columns = [f"__{self.output_column}_case_{idx}" for idx in range(len(self.cases))]
+        df_conds = df.assign(**{
+            col: condition_expression.eval(df)
+            for col, condition_expression in zip(condition_columns, self._condition_expressions)
+        })
+        meta_dtype = self._select(df_conds._meta_nonempty, condition_columns).dtype
+        result = df_conds.map_partitions(self._select, condition_columns, meta=(self.output_column, meta_dtype))
+        df = df.assign(**{self.output_column: result})
+        self._set_output_df(data, df)
+
+
 class FilterRule(FilterRuleBase):
 
     def get_condition_expression(self):
-        return Expression(self.condition_expression, filename="FilterRule.py")
+        return Expression.get(self.condition_expression, filename="FilterRule.py")
 
     def apply(self, data):
         df = self._get_input_df(data)
@@ -1,25 +1,93 @@
 import dask.dataframe as dd
 import logging
+import numpy as np
 import pandas as pd
+from typing import Optional
 
-from etlrules.backends.common.expressions import Expression as ExpressionBase
+from etlrules.backends.common.expressions import (
+    Expression as ExpressionBase,
+    EVAL_MODE_ROWWISE,
+    EVAL_MODE_VECTORIZED,
+)
+from etlrules.backends.pandas.expressions import to_jit_array, to_row_values
 from etlrules.data import context
 
 perf_logger = logging.getLogger("etlrules.perf")
 
+# the type of the result when the expression cannot be evaluated on the dummy values of the meta dataframe
+META_FALLBACK_DTYPE = np.dtype("object")
+
 
 class Expression(ExpressionBase):
 
+    def __init__(self, expression_str: str, filename: Optional[str]) -> None:
+        super().__init__(expression_str, filename)
+        self._meta_dtypes = {}
+
+    def _to_meta_dtype(self, result: pd.Series, dtype) -> pd.Series:
+        # the partitions of a result with the fallback (object) meta are object typed too
+        if dtype == META_FALLBACK_DTYPE and result.dtype != dtype:
+            return result.astype(dtype)
+        return result
+
+    def _eval_partition(self, df: pd.DataFrame, columns: list[str], dtype) -> pd.Series:
+        if df.empty:
+            return pd.Series([], dtype=dtype, index=df.index)
+        if self._can_eval_rows_jit(len(df)):
+            result = self._eval_rows_jit([to_jit_array(df[col]) for col in columns])
+            if result is not None:
+                return self._to_meta_dtype(pd.Series(result, index=df.index), dtype)
+        # the partitions are already evaluated in parallel by the dask scheduler
+        result = pd.Series(self._eval_rows([to_row_values(df[col]) for col in columns], parallel=False), index=df.index)
+        return self._to_meta_dtype(result, dtype)
+
+    def _eval_apply(self, df: pd.DataFrame, dtype) -> pd.Series:
+        if df.empty:
+            return pd.Series([], dtype=dtype, index=df.index)
+        expr = self._compiled_expr
+        return self._to_meta_dtype(df.apply(lambda df: eval(expr, {}, {'df': df, 'context': context}), axis=1), dtype)
+
+    def _get_meta_dtype(self, df: dd.DataFrame, schema_key: Optional[tuple], eval_meta):
+        """ Infers the type of the result without computing any data.
+
+        The expression is evaluated on the dummy, dtype-accurate, non-empty meta dataframe dask keeps
+        for every dataframe, again without the dummy <NA> values if it fails. When the expression fails on
+        the dummy values (e.g. int() of a dummy string), the type is object (META_FALLBACK_DTYPE) and the
+        partitions are converted to it. Any error from
+        the data is raised when the partitions are computed. The dtype is reused for all the partitions
+        and cached by the schema key.
+        """
+        dtype = self._meta_dtypes.get(schema_key) if schema_key is not None else None
+        if dtype is None:
+            meta = df._meta_nonempty
+            try:
+                dtype = eval_meta(meta).dtype
+            except Exception:
+                # the dummy values of the nullable types include <NA>, which fail most row level expressions
+                meta = meta.dropna()
+                try:
+                    dtype = eval_meta(meta).dtype if not meta.empty else META_FALLBACK_DTYPE
+                except Exception:
+                    dtype = META_FALLBACK_DTYPE
+            if schema_key is not None:
+                self._meta_dtypes[schema_key] = dtype
+        return dtype
+
     def eval(self, df):
-        try:
-            expr_series = eval(self._compiled_expr, {}, {'df': df, 'context': context})
-        except (TypeError, ValueError):
-            # attempt to run a slower apply
-            expr = self._compiled_expr
-            if len(df.index) == 0:
-                expr_series = dd.from_pandas(pd.Series([], dtype="string"), npartitions=1)
-            else:
-                perf_logger.warning("Evaluating expression '%s' is not vectorized and might hurt the overall performance.", self.expression_str)
-                pandas_expr_series = df.head().apply(lambda df: eval(expr, {}, {'df': df, 'context': context}), axis=1)
-                expr_series = df.apply(lambda df: eval(expr, {}, {'df': df, 'context': context}), axis=1, meta=("", pandas_expr_series.dtype))
-        return expr_series
+        schema_key = self._get_schema_key(df)
+        if self._get_eval_mode(schema_key) != EVAL_MODE_ROWWISE:
+            try:
+                expr_series = eval(self._compiled_expr, {}, {'df': df, 'context': context})
+                self._set_eval_mode(schema_key, EVAL_MODE_VECTORIZED)
+                return expr_series
+            except (TypeError, ValueError):
+                self._set_eval_mode(schema_key, EVAL_MODE_ROWWISE)
+        # attempt to run a slower apply
+        perf_logger.warning("Evaluating expression '%s' is not vectorized and might hurt the overall performance.", self.expression_str)
+        if self._columns:
+            columns = list(self._columns)
+            df = df[columns]
+            dtype = self._get_meta_dtype(df, schema_key, lambda df: self._eval_partition(df, columns, None))
+            return df.map_partitions(self._eval_partition, columns, dtype, meta=("", dtype))
+        dtype = self._get_meta_dtype(df, schema_key, lambda df: self._eval_apply(df, None))
+        return df.map_partitions(self._eval_apply, dtype, meta=("", dtype))
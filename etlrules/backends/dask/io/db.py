@@ -47,6 +47,10 @@ class WriteSQLTableRule(WriteSQLTableRuleBase):
 
     METHOD = 'multi'
 
+    def is_streamable(self):
+        # dask already processes the data by partitions
+        return False
+
     def apply(self, data):
         super().apply(data)
         df = self._get_input_df(data)
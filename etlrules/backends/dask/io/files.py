@@ -1,23 +1,107 @@
+import contextlib
+import dask
+import glob
 import os
+import shutil
+from typing import Callable, Mapping, Optional, Sequence, Union
 import dask.dataframe as dd
+import pandas as pd
 
 from etlrules.exceptions import MissingColumnError
+from etlrules.backends.dask.types import MAP_TYPES
+from etlrules.backends.pandas.io.csv_read import PandasCSVReadMixin
+from etlrules.backends.pandas.io.jsonl_read import PandasJSONLinesReadMixin
+from etlrules.backends.common.io.parquet_metadata import PARQUET_METADATA_CACHE
 
 from etlrules.backends.common.io.files import (
+    EMPTY_READ_ROWS,
+    is_uri,
+    ReadArrowFileRule as ReadArrowFileRuleBase,
     ReadCSVFileRule as ReadCSVFileRuleBase,
+    ReadJSONLinesFileRule as ReadJSONLinesFileRuleBase,
     ReadParquetFileRule as ReadParquetFileRuleBase,
+    WriteArrowFileRule as WriteArrowFileRuleBase,
     WriteCSVFileRule as WriteCSVFileRuleBase,
+    WriteJSONLinesFileRule as WriteJSONLinesFileRuleBase,
     WriteParquetFileRule as WriteParquetFileRuleBase,
 )
 
 
-class ReadCSVFileRule(ReadCSVFileRuleBase):
-    def do_read(self, file_path: str) -> dd.DataFrame:
-        return dd.read_csv(
-            file_path, blocksize=None, sep=self.separator, header='infer' if self.header else None,
-            skiprows=self.skip_header_rows,
-            index_col=False
-        )
+# the size of the chunks copied when appending the partitions written in parallel into a single file
+STITCH_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+def write_stitched(file_name: str, file_dir: str, df: dd.DataFrame, write_partition: Callable[[pd.DataFrame, str, int], None]) -> None:
+    """ Writes the partitions in parallel into temporary part files and appends their bytes into a single file.
+
+    write_partition(partition, part_path, idx) writes a partition to a part file. The part files are written next to
+    the output file (on the same file system) and the output file is replaced atomically once all the parts are appended.
+    """
+    file_path = os.path.join(file_dir, file_name)
+    tmp_prefix = os.path.join(file_dir, f".{file_name}.{os.getpid()}")
+    part_paths = [f"{tmp_prefix}.part-{idx}" for idx in range(df.npartitions)]
+    try:
+        dask.compute(*[
+            dask.delayed(write_partition)(partition, part_path, idx)
+            for idx, (partition, part_path) in enumerate(zip(df.to_delayed(), part_paths))
+        ])
+        with open(f"{tmp_prefix}.tmp", "wb") as f:
+            for part_path in part_paths:
+                with open(part_path, "rb") as part:
+                    shutil.copyfileobj(part, f, STITCH_CHUNK_SIZE)
+                os.remove(part_path)
+        os.replace(f"{tmp_prefix}.tmp", file_path)
+    finally:
+        for tmp_path in part_paths + [f"{tmp_prefix}.tmp"]:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+class ReadCSVFileRule(PandasCSVReadMixin, ReadCSVFileRuleBase):
+    def is_streamable(self):
+        # dask already processes the data by partitions
+        return False
+
+    # the number of rows at the start of the first file checked against the cached column types
+    SCHEMA_CHECK_ROWS = 1000
+
+    def _get_blocksize(self, file_paths: Sequence[str]):
+        from fsspec.utils import infer_compression
+        if any(is_uri(file_path) or infer_compression(file_path) for file_path in file_paths):
+            # the compressed files cannot be split into blocks
+            return None
+        return self.blocksize
+
+    def _check_column_types(self, file_path: str, cached_types: Mapping[str, str]) -> None:
+        # the partitions are parsed lazily, the start of the file is parsed eagerly to detect a changed schema
+        with contextlib.ExitStack() as stack:
+            if file_path.endswith(".zst"):
+                import pyarrow as pa
+                file_path = stack.enter_context(pa.CompressedInputStream(pa.OSFile(file_path), "zstd"))
+            # the pyarrow engine doesn't support nrows
+            pd.read_csv(file_path, nrows=self.SCHEMA_CHECK_ROWS, **self._get_read_options(False, cached_types))
+
+    def _read(self, file_path: Union[str, Sequence[str]], cached_types: Optional[Mapping[str, str]]) -> dd.DataFrame:
+        file_paths = [file_path] if isinstance(file_path, str) else list(file_path)
+        if cached_types:
+            self._check_column_types(file_paths[0], cached_types)
+        df = dd.read_csv(file_path, blocksize=self._get_blocksize(file_paths), **self._get_read_options(self.use_pyarrow, cached_types))
+        return self._convert_types(df, self.use_pyarrow)
+
+    def do_read(self, file_path: Union[str, Sequence[str]]) -> dd.DataFrame:
+        # the schema of all the files is keyed by the first file, dask reads all the files with the same types
+        first_path = file_path if isinstance(file_path, str) else file_path[0]
+        return self._read_with_schema_cache(first_path, lambda cached_types: self._read(file_path, cached_types))
+
+    def do_read_files(self, file_paths: Sequence[str]) -> dd.DataFrame:
+        # a single graph for all the files, the partitions (blocks) of all the files are read in parallel by dask
+        return self.do_read(file_paths)
+
+    def do_concat(self, dfs: Sequence[dd.DataFrame]) -> dd.DataFrame:
+        return dd.concat(dfs, axis=0, ignore_index=True)
+
+    def do_empty(self, df: dd.DataFrame) -> dd.DataFrame:
+        return dd.from_pandas(df._meta, npartitions=1)
 
 
 def parquet_file_name_split(file_name: str) -> tuple[str, str]:
@@ -27,13 +111,59 @@ def parquet_file_name_split(file_name: str) -> tuple[str, str]:
 
 class ReadParquetFileRule(ReadParquetFileRuleBase):
 
+    # the parts of a file are matched and pruned in do_read
+    PRUNE_FILES = False
+
+    def is_streamable(self):
+        return False
+
+    def do_read_dataset(self, file_path: str) -> dd.DataFrame:
+        from pyarrow.lib import ArrowInvalid
+        dataset, filter_expr = self._get_dataset(file_path)
+        schema = dataset.schema
+        try:
+            meta = schema.empty_table()
+            if filter_expr is not None:
+                meta = meta.filter(filter_expr)
+            meta = meta.select(self.columns or schema.names)
+        except (ArrowInvalid, KeyError) as exc:
+            raise MissingColumnError(str(exc))
+        # one partition per file, the files from the partitions not matching the filters are pruned without being read
+        fragments = list(dataset.get_fragments(filter=filter_expr))
+        if not fragments:
+            return dd.from_pandas(meta.to_pandas(), npartitions=1)
+        return dd.from_map(
+            lambda fragment: fragment.to_table(schema=schema, columns=self.columns, filter=filter_expr).to_pandas(),
+            fragments, meta=meta.to_pandas(), enforce_metadata=False
+        )
+
     def do_read(self, file_path: str) -> dd.DataFrame:
         from pyarrow.lib import ArrowInvalid
+        if self.dataset:
+            return self.do_read_dataset(file_path)
         file_dir, file_name = os.path.split(file_path)
         fn, ext = parquet_file_name_split(file_name)
+        path = os.path.join(file_dir, f"{fn}*.{ext}")
+        if self.filters and not is_uri(file_path):
+            file_paths = sorted(glob.glob(path))
+            if file_paths:
+                # the files which cannot match the filters (based on the cached statistics) are not opened
+                path = []
+                for part_path in file_paths:
+                    metadata, row_groups = self._get_row_groups(part_path)
+                    self._count_skipped(part_path, metadata, row_groups)
+                    if row_groups:
+                        path.append(part_path)
+                if not path:
+                    schema = PARQUET_METADATA_CACHE.get(file_paths[0]).schema.to_arrow_schema()
+                    self._validate_columns(file_paths[0], schema)
+                    empty_table = schema.empty_table()
+                    if self.columns is not None:
+                        empty_table = empty_table.select(self.columns)
+                    return dd.from_pandas(empty_table.to_pandas(), npartitions=1)
         try:
             return dd.read_parquet(
-                os.path.join(file_dir, f"{fn}*.{ext}"), engine="pyarrow", columns=self.columns, filters=self.filters
+                path, engine="pyarrow", columns=self.columns, filters=self.filters
             )
         except ArrowInvalid as exc:
             raise MissingColumnError(str(exc))
@@ -42,23 +172,157 @@ class ReadParquetFileRule(ReadParquetFileRuleBase):
                 raise MissingColumnError(str(exc))
             raise
 
+    def do_concat(self, dfs: Sequence[dd.DataFrame]) -> dd.DataFrame:
+        return dd.concat(dfs, axis=0, ignore_index=True)
+
+    def do_empty(self, df: dd.DataFrame) -> dd.DataFrame:
+        return dd.from_pandas(df._meta, npartitions=1)
+
+
+class ReadArrowFileRule(ReadArrowFileRuleBase):
+
+    def is_streamable(self):
+        return False
+
+    def _read_partition(self, file_path: str, idx: int):
+        import pyarrow as pa
+        with self._open_file(file_path) as source:
+            batch = pa.ipc.open_file(source).get_batch(idx)
+            return self._select_columns(pa.Table.from_batches([batch])).to_pandas()
+
+    def do_read(self, file_path: str) -> dd.DataFrame:
+        import pyarrow as pa
+        with self._open_file(file_path) as source:
+            reader = pa.ipc.open_file(source)
+            num_batches = reader.num_record_batches
+            meta = self._select_columns(reader.schema.empty_table()).to_pandas()
+        if not num_batches:
+            return dd.from_pandas(meta, npartitions=1)
+        # one partition per record batch, read lazily
+        return dd.from_map(
+            self._read_partition, [file_path] * num_batches, range(num_batches),
+            meta=meta, enforce_metadata=False
+        )
+
+    def do_concat(self, dfs: Sequence[dd.DataFrame]) -> dd.DataFrame:
+        return dd.concat(dfs, axis=0, ignore_index=True)
+
+    def do_empty(self, df: dd.DataFrame) -> dd.DataFrame:
+        return dd.from_pandas(df._meta, npartitions=1)
+
+
+class ReadJSONLinesFileRule(PandasJSONLinesReadMixin, ReadJSONLinesFileRuleBase):
+
+    def is_streamable(self):
+        return False
+
+    def _read_partition(self, file_path: str, meta: pd.DataFrame) -> pd.DataFrame:
+        df = self._to_pandas(self._read_table(file_path))
+        if list(df.columns) != list(meta.columns) or list(df.dtypes) != list(meta.dtypes):
+            raise ValueError(
+                f"The columns of '{file_path}' {dict(df.dtypes)} differ from the columns of the first file {dict(meta.dtypes)}. "
+                "Specify the column_types of the columns with different types."
+            )
+        return df
+
+    def do_read(self, file_path: Union[str, Sequence[str]]) -> dd.DataFrame:
+        file_paths = [file_path] if isinstance(file_path, str) else list(file_path)
+        # the columns and types are those of the whole first file (the types of the later blocks can widen the
+        # types inferred from the first block), which is read again as the first partition
+        meta = self._to_pandas(self._read_table(file_paths[0])).head(0)
+        # one partition per file, read lazily
+        return dd.from_map(self._read_partition, file_paths, meta=meta, enforce_metadata=False, args=(meta, ))
+
+    def do_read_files(self, file_paths: Sequence[str]) -> dd.DataFrame:
+        # a single graph for all the files, the files are read in parallel by dask
+        return self.do_read(file_paths)
+
+    def do_read_empty(self, file_path: str) -> dd.DataFrame:
+        # the meta of do_read comes from the whole first file, only its first block is read instead
+        with contextlib.closing(self._iter_record_batches(file_path, EMPTY_READ_ROWS)) as batches:
+            for batch in batches:
+                return dd.from_pandas(self._to_pandas(batch).head(0), npartitions=1)
+        return self.do_empty(self.do_read(file_path))
+
+    def do_concat(self, dfs: Sequence[dd.DataFrame]) -> dd.DataFrame:
+        return dd.concat(dfs, axis=0, ignore_index=True)
+
+    def do_empty(self, df: dd.DataFrame) -> dd.DataFrame:
+        return dd.from_pandas(df._meta, npartitions=1)
+
 
 class WriteCSVFileRule(WriteCSVFileRuleBase):
 
+    def is_streamable(self):
+        return False
+
+    def _write_partition(self, df: pd.DataFrame, file_path: str, header: bool) -> None:
+        if self.use_pyarrow and self.compression != "zip":
+            import pyarrow as pa
+            with contextlib.ExitStack() as stack:
+                # a single compression thread per partition, the partitions are already written in parallel
+                f = self._open_output(stack, file_path, max_workers=1)
+                self._write_arrow_tables(f, [pa.Table.from_pandas(df, preserve_index=False)], header)
+        elif self.compression == "zstd":
+            # arrow's zstd codec, pandas needs the optional zstandard package
+            import pyarrow as pa
+            with pa.CompressedOutputStream(file_path, "zstd") as f:
+                df.to_csv(f, sep=self.separator, header=header, index=False)
+        else:
+            df.to_csv(file_path, sep=self.separator, header=header, compression=self.compression, index=False)
+
+    def do_write_parts(self, path: str, df: dd.DataFrame) -> None:
+        dask.compute(*[
+            dask.delayed(self._write_partition)(partition, os.path.join(path, self._get_part_file_name(idx)), self.header)
+            for idx, partition in enumerate(df.to_delayed())
+        ])
+
     def do_write(self, file_name: str, file_dir: str,  df: dd.DataFrame) -> None:
-        df.to_csv(
-            os.path.join(file_dir, file_name),
-            single_file=True,
-            sep=self.separator,
-            header=self.header,
-            compression=self.compression,
-            index=False,
+        file_path = os.path.join(file_dir, file_name)
+        if self.compression == "zip":
+            # a zip archive cannot be appended to, the partitions are written one after another
+            df.to_csv(
+                file_path,
+                single_file=True,
+                sep=self.separator,
+                header=self.header,
+                compression=self.compression,
+                index=False,
+            )
+            return
+        # the partitions are written in parallel and their bytes are appended into the final file,
+        # the header is only written by the first partition
+        write_stitched(
+            file_name, file_dir, df,
+            lambda partition, part_path, idx: self._write_partition(partition, part_path, self.header and idx == 0)
         )
 
 
 class WriteParquetFileRule(WriteParquetFileRuleBase):
 
+    def is_streamable(self):
+        return False
+
+    def _write_partition(self, df: pd.DataFrame, path: str, idx: int) -> None:
+        import pyarrow as pa
+        table = self._prepare_table(pa.Table.from_pandas(df, preserve_index=False))
+        self._write_dataset(path, table, f"part-{idx}-{{i}}.parquet")
+
     def do_write(self, file_name: str, file_dir: str, df: dd.DataFrame) -> None:
+        if self._is_dataset():
+            path = os.path.join(file_dir, file_name)
+            self._clear_dataset_dir(path)
+            # the partitions are written in parallel, each to its own file(s)
+            dask.compute(*[
+                dask.delayed(self._write_partition)(partition, path, idx)
+                for idx, partition in enumerate(df.to_delayed())
+            ])
+            return
+        if self.sort_by:
+            missing_columns = [col for col in self.sort_by if col not in df.columns]
+            if missing_columns:
+                raise MissingColumnError(f"Columns {missing_columns} are missing from the input dataframe.")
+            df = df.map_partitions(lambda part: part.sort_values(self.sort_by), meta=df._meta)
         fn, ext = parquet_file_name_split(file_name)
         df.to_parquet(
             path=file_dir,
@@ -66,6 +330,34 @@ class WriteParquetFileRule(WriteParquetFileRuleBase):
             write_metadata_file=False,
             name_function=lambda idx: f"{fn}_part_{idx}.{ext}",
             compression=self.compression,
-            write_index=False
+            write_index=False,
+            row_group_size=self.row_group_size,
         )
 
+
+class WriteArrowFileRule(WriteArrowFileRuleBase):
+
+    def is_streamable(self):
+        return False
+
+    def do_write(self, file_name: str, file_dir: str, df: dd.DataFrame) -> None:
+        import pyarrow as pa
+        # the partitions are computed and appended to the file one by one
+        self._write_tables(
+            os.path.join(file_dir, file_name),
+            (pa.Table.from_pandas(partition.compute(), preserve_index=False) for partition in df.to_delayed())
+        )
+
+
+class WriteJSONLinesFileRule(WriteJSONLinesFileRuleBase):
+
+    def is_streamable(self):
+        return False
+
+    def _write_partition(self, df: pd.DataFrame, file_path: str, idx: int) -> None:
+        with contextlib.ExitStack() as stack:
+            df.to_json(self._open_output(stack, file_path), orient="records", lines=True, date_format="iso")
+
+    def do_write(self, file_name: str, file_dir: str, df: dd.DataFrame) -> None:
+        # the partitions are written (and compressed) in parallel and their bytes are appended into the final file
+        write_stitched(file_name, file_dir, df, self._write_partition)
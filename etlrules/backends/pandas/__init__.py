@@ -2,7 +2,7 @@ from .aggregate import AggregateRule
 from etlrules.backends.common.basic import ProjectRule
 from .basic import DedupeRule, ExplodeValuesRule, RenameRule, ReplaceRule, SortRule
 from .concat import VConcatRule, HConcatRule
-from .conditions import IfThenElseRule, FilterRule
+from .conditions import IfThenElseRule, CaseWhenRule, FilterRule
 from .datetime import (
     DateTimeLocalNowRule, DateTimeUTCNowRule, DateTimeToStrFormatRule,
     DateTimeRoundRule, DateTimeRoundDownRule, DateTimeRoundUpRule,
@@ -22,7 +22,10 @@ from .types import TypeConversionRule
 from etlrules.backends.common.basic import RulesBlock
 
 ## IO - extractors and loaders
-from .io.files import ReadCSVFileRule, ReadParquetFileRule, WriteCSVFileRule, WriteParquetFileRule
+from .io.files import (
+    ReadArrowFileRule, ReadCSVFileRule, ReadJSONLinesFileRule, ReadParquetFileRule,
+    WriteArrowFileRule, WriteCSVFileRule, WriteJSONLinesFileRule, WriteParquetFileRule,
+)
 from .io.db import ReadSQLQueryRule, WriteSQLTableRule
 
 
@@ -30,7 +33,7 @@ __all__ = [
     'AggregateRule',
     'DedupeRule', 'ExplodeValuesRule', 'ProjectRule', 'RenameRule', 'ReplaceRule', 'SortRule',
     'VConcatRule', 'HConcatRule',
-    'IfThenElseRule', 'FilterRule',
+    'IfThenElseRule', 'CaseWhenRule', 'FilterRule',
     'DateTimeLocalNowRule', 'DateTimeUTCNowRule', 'DateTimeToStrFormatRule',
     'DateTimeRoundRule', 'DateTimeRoundDownRule', 'DateTimeRoundUpRule',
     'DateTimeExtractComponentRule', 'DateTimeAddRule', 'DateTimeSubstractRule',
@@ -44,6 +47,7 @@ __all__ = [
     'TypeConversionRule',
     'RulesBlock',
     # IO extractors and loaders
-    'ReadCSVFileRule', 'ReadParquetFileRule', 'WriteCSVFileRule', 'WriteParquetFileRule',
+    'ReadArrowFileRule', 'ReadCSVFileRule', 'ReadJSONLinesFileRule', 'ReadParquetFileRule',
+    'WriteArrowFileRule', 'WriteCSVFileRule', 'WriteJSONLinesFileRule', 'WriteParquetFileRule',
     'ReadSQLQueryRule', 'WriteSQLTableRule',
 ]
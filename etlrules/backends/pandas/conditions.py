@@ -1,7 +1,9 @@
 import numpy as np
+from pandas import Series
 
 from etlrules.backends.common.conditions import (
     IfThenElseRule as IfThenElseRuleBase,
+    CaseWhenRule as CaseWhenRuleBase,
     FilterRule as FilterRuleBase
 )
 from .expressions import Expression
@@ -10,7 +12,7 @@ from .expressions import Expression
 class IfThenElseRule(IfThenElseRuleBase):
 
     def get_condition_expression(self):
-        return Expression(self.condition_expression, filename=f'{self.output_column}.py')
+        return Expression.get(self.condition_expression, filename=f'{self.output_column}.py')
 
     def apply(self, data):
         df = self._get_input_df(data)
@@ -26,10 +28,37 @@ class IfThenElseRule(IfThenElseRuleBase):
         self._set_output_df(data, df)
 
 
+class CaseWhenRule(CaseWhenRuleBase):
+
+    def get_condition_expression(self, condition_expression, idx):
+        return Expression.get(condition_expression, filename=f'{self.output_column}_case_{idx}.py')
+
+    def apply(self, data):
+        df = self._get_input_df(data)
+        df_columns = set(df.columns)
+        self._validate_columns(df_columns)
+        conditions = []
+        for condition_expression in self._condition_expressions:
+            cond_series = condition_expression.eval(df)
+            if isinstance(cond_series, Series):
+                cond_series = cond_series.fillna(False).to_numpy(dtype=bool)
+            conditions.append(np.broadcast_to(cond_series, (len(df.index), )))
+        choices = [
+            case["then_value"] if "then_value" in case else df[case["then_column"]]
+            for case in self.cases
+        ]
+        else_value = self.else_value if self.else_column is None else df[self.else_column]
+        result = np.select(conditions, choices, else_value)
+        df = df.assign(**{self.output_column: result})
+        if df.empty and self._has_str_values():
+            df = df.astype({self.output_column: "string"})
+        self._set_output_df(data, df)
+
+
 class FilterRule(FilterRuleBase):
 
     def get_condition_expression(self):
-        return Expression(self.condition_expression, filename="FilterRule.py")
+        return Expression.get(self.condition_expression, filename="FilterRule.py")
 
     def apply(self, data):
         df = self._get_input_df(data)
@@ -1,24 +1,183 @@
+import ast
 import logging
+import numpy as np
 from pandas import Series
+from typing import Optional, Sequence
 
-from etlrules.backends.common.expressions import Expression as ExpressionBase
+try:
+    import numexpr
+    HAS_NUMEXPR = True
+except ImportError:
+    HAS_NUMEXPR = False
+
+from etlrules.backends.common.expressions import (
+    Expression as ExpressionBase,
+    EVAL_MODE_ROWWISE,
+    EVAL_MODE_VECTORIZED,
+)
 from etlrules.data import context
 
 
 perf_logger = logging.getLogger("etlrules.perf")
 
 
+class _NotTranslatableError(Exception):
+    ...
+
+
+class NumExprTranslator:
+    """ Translates a python expression operating on a dataframe into a numexpr expression.
+
+    Only a conservative subset of operations is translated: the arithmetic operators
+    +, -, *, / and single (non-chained) comparisons between columns, numeric constants and
+    numeric context values. The operators with different semantics in numexpr compared to
+    numpy (e.g. % and // for negative numbers, ** for integers, bitwise operators) are
+    not translated so that the vectorized result is identical to the plain pandas result.
+
+    Columns are referred to as df['COL'] or df["COL"] in the expression, context values as
+    context.VAL or context['VAL']. They are replaced with generated variable names in the
+    resulting numexpr expression.
+    """
+
+    BIN_OPS = {
+        ast.Add: "+",
+        ast.Sub: "-",
+        ast.Mult: "*",
+        ast.Div: "/",
+    }
+
+    CMP_OPS = {
+        ast.Gt: ">",
+        ast.GtE: ">=",
+        ast.Lt: "<",
+        ast.LtE: "<=",
+        ast.Eq: "==",
+        ast.NotEq: "!=",
+    }
+
+    UNARY_OPS = {
+        ast.USub: "-",
+        ast.UAdd: "+",
+    }
+
+    def __init__(self, ast_expr: ast.Expression):
+        self.columns = {}
+        self.context_values = {}
+        try:
+            self.expression = self._translate(ast_expr.body)
+        except _NotTranslatableError:
+            self.expression = None
+
+    def _get_name(self, node, name: str) -> Optional[str]:
+        if not isinstance(node, ast.Name) or node.id != name:
+            return None
+        return node.id
+
+    def _get_attr_or_key(self, node, name: str) -> Optional[str]:
+        if isinstance(node, ast.Subscript) and self._get_name(node.value, name):
+            if isinstance(node.slice, ast.Constant) and isinstance(node.slice.value, str):
+                return node.slice.value
+        elif isinstance(node, ast.Attribute) and name == "context" and self._get_name(node.value, name):
+            return node.attr
+        return None
+
+    def _translate(self, node) -> str:
+        if isinstance(node, ast.BinOp) and type(node.op) in self.BIN_OPS:
+            return f"({self._translate(node.left)} {self.BIN_OPS[type(node.op)]} {self._translate(node.right)})"
+        elif isinstance(node, ast.Compare) and len(node.ops) == 1 and type(node.ops[0]) in self.CMP_OPS:
+            return f"({self._translate(node.left)} {self.CMP_OPS[type(node.ops[0])]} {self._translate(node.comparators[0])})"
+        elif isinstance(node, ast.UnaryOp) and type(node.op) in self.UNARY_OPS:
+            return f"({self.UNARY_OPS[type(node.op)]}{self._translate(node.operand)})"
+        elif isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            return repr(node.value)
+        column = self._get_attr_or_key(node, "df")
+        if column is not None:
+            if column not in self.columns:
+                self.columns[column] = f"c{len(self.columns)}"
+            return self.columns[column]
+        context_value = self._get_attr_or_key(node, "context")
+        if context_value is not None:
+            if context_value not in self.context_values:
+                self.context_values[context_value] = f"k{len(self.context_values)}"
+            return self.context_values[context_value]
+        raise _NotTranslatableError()
+
+
+# numexpr doesn't support all the numpy types (e.g. unsigned ints) and it upcasts the smaller types
+# only operate on the types for which the results are guaranteed to be identical to numpy's
+NUMEXPR_DTYPES = {"int64", "float64"}
+
+
+def to_jit_array(series: Series) -> Optional[np.ndarray]:
+    """ Returns the values of a series as a numpy array to be used in jit compiled expressions or None if not possible. """
+    if isinstance(series.dtype, np.dtype):
+        return series.to_numpy()
+    numpy_dtype = getattr(series.dtype, "numpy_dtype", None)
+    if numpy_dtype is None or series.isna().any():
+        return None
+    return series.to_numpy(dtype=numpy_dtype)
+
+
+def to_row_values(series: Series) -> Sequence:
+    """ Returns the values of a series for the row by row evaluation, with the scalar types df.apply(axis=1) gives.
+
+    The numeric and boolean numpy columns give numpy scalars (e.g. a division by zero gives inf/nan rather than
+    raising ZeroDivisionError), the other columns give python objects (e.g. str, Timestamp or pd.NA).
+    """
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind in "biuf":
+        return series.to_numpy()
+    return series.tolist()
+
+
 class Expression(ExpressionBase):
 
+    def __init__(self, expression_str: str, filename: Optional[str]) -> None:
+        super().__init__(expression_str, filename)
+        self._numexpr = NumExprTranslator(self._ast_expr) if HAS_NUMEXPR else None
+
+    def _eval_numexpr(self, df) -> Optional[Series]:
+        """ Evaluates the expression with numexpr or returns None when that's not possible or safe. """
+        if self._numexpr is None or self._numexpr.expression is None or not self._numexpr.columns:
+            return None
+        if not df.columns.is_unique:
+            return None
+        local_dict = {}
+        for column, var_name in self._numexpr.columns.items():
+            if column not in df.columns or str(df[column].dtype) not in NUMEXPR_DTYPES:
+                return None
+            local_dict[var_name] = df[column].to_numpy()
+        for context_value, var_name in self._numexpr.context_values.items():
+            try:
+                value = context[context_value]
+            except (KeyError, RuntimeError):
+                return None
+            if type(value) not in (int, float):
+                return None
+            local_dict[var_name] = value
+        result = numexpr.evaluate(self._numexpr.expression, local_dict=local_dict)
+        return Series(result, index=df.index)
+
     def eval(self, df):
-        try:
-            expr_series = eval(self._compiled_expr, {}, {'df': df, 'context': context})
-        except (TypeError, ValueError):
-            # attempt to run a slower apply
-            expr = self._compiled_expr
-            if df.empty:
-                expr_series = Series([], dtype="string")
-            else:
-                perf_logger.warning("Evaluating expression '%s' is not vectorized and might hurt the overall performance.", self.expression_str)
-                expr_series = df.apply(lambda df: eval(expr, {}, {'df': df, 'context': context}), axis=1)
-        return expr_series
+        expr_series = self._eval_numexpr(df)
+        if expr_series is not None:
+            return expr_series
+        schema_key = self._get_schema_key(df)
+        if self._get_eval_mode(schema_key) != EVAL_MODE_ROWWISE:
+            try:
+                expr_series = eval(self._compiled_expr, {}, {'df': df, 'context': context})
+                self._set_eval_mode(schema_key, EVAL_MODE_VECTORIZED)
+                return expr_series
+            except (TypeError, ValueError):
+                self._set_eval_mode(schema_key, EVAL_MODE_ROWWISE)
+        # attempt to run a slower apply
+        if df.empty:
+            return Series([], dtype="string")
+        perf_logger.warning("Evaluating expression '%s' is not vectorized and might hurt the overall performance.", self.expression_str)
+        if self._columns:
+            if self._can_eval_rows_jit(len(df)):
+                result = self._eval_rows_jit([to_jit_array(df[col]) for col in self._columns])
+                if result is not None:
+                    return Series(result, index=df.index)
+            return Series(self._eval_rows([to_row_values(df[col]) for col in self._columns]), index=df.index)
+        expr = self._compiled_expr
+        return df.apply(lambda df: eval(expr, {}, {'df': df, 'context': context}), axis=1)
@@ -0,0 +1,70 @@
+from typing import Dict, Mapping, Optional
+
+import pandas as pd
+
+from etlrules.backends.pandas.types import MAP_TYPES
+
+
+class PandasCSVReadMixin:
+    """ The read_csv options and the type conversions shared by the pandas and dask ReadCSVFileRule. """
+
+    def _get_read_options(self, use_pyarrow: bool, cached_types: Optional[Mapping[str, str]]=None) -> dict:
+        options = {"sep": self.separator}
+        if use_pyarrow:
+            # the pyarrow engine ignores skiprows when the header is inferred
+            options["engine"] = "pyarrow"
+            if self.header:
+                options["header"] = self.skip_header_rows or 0
+            else:
+                options.update(header=None, skiprows=self.skip_header_rows)
+        else:
+            options.update(header='infer' if self.header else None, skiprows=self.skip_header_rows, index_col=False)
+        if self.column_types:
+            if use_pyarrow:
+                options["dtype"] = {col: MAP_TYPES[col_type] for col, col_type in self.column_types.items()}
+            else:
+                # the c parser is a lot slower with the nullable types so only the strings are kept
+                # as strings while parsing (e.g. 001 not parsed as 1) and the types are converted after
+                options["dtype"] = {col: str for col, col_type in self.column_types.items() if col_type == "string"}
+        if cached_types:
+            # the cached types are the numpy types inferred by the parsers, which skip the inference when given
+            options["dtype"] = {
+                **{col: _get_parser_type(col_type) for col, col_type in cached_types.items()},
+                **options.get("dtype", {}),
+            }
+        if self.date_formats:
+            options["parse_dates"] = list(self.date_formats)
+            date_format = {col: fmt for col, fmt in self.date_formats.items() if fmt is not None}
+            if date_format:
+                options["date_format"] = date_format
+        return options
+
+    def _get_inferred_types(self, df) -> Dict[str, str]:
+        inferred_types = {}
+        for col, dtype in df.dtypes.items():
+            if pd.api.types.is_bool_dtype(dtype):
+                inferred_types[col] = "boolean"
+            elif pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_float_dtype(dtype):
+                if str(dtype).lower() in MAP_TYPES:
+                    inferred_types[col] = str(dtype).lower()
+            elif pd.api.types.is_string_dtype(dtype):
+                inferred_types[col] = "string"
+        return inferred_types
+
+    def _convert_types(self, df, use_pyarrow: bool):
+        if use_pyarrow:
+            if self.date_formats:
+                # pyarrow infers the unit of the timestamps (e.g. seconds)
+                df = df.astype({col: "datetime64[ns]" for col in self.date_formats if col in df.columns})
+        elif self.column_types:
+            df = df.astype({col: MAP_TYPES[col_type] for col, col_type in self.column_types.items() if col in df.columns})
+        return df
+
+
+def _get_parser_type(column_type: str):
+    if column_type == "boolean":
+        return "bool"
+    if column_type == "string":
+        # the values are kept as parsed (str), faster than dtype=str which converts each value
+        return object
+    return column_type
@@ -26,11 +26,11 @@ class WriteSQLTableRule(WriteSQLTableRuleBase):
 
     METHOD = 'multi'
 
-    def _do_apply(self, connection, df):
+    def _do_apply(self, connection, df, if_exists=None):
         df.to_sql(
             self._get_sql_table(),
             connection,
-            if_exists=self.if_exists,
+            if_exists=if_exists or self.if_exists,
             index=False,
             method=self.METHOD
         )
@@ -38,11 +38,15 @@ class WriteSQLTableRule(WriteSQLTableRuleBase):
     def apply(self, data):
         super().apply(data)
         df = self._get_input_df(data)
+        self.write_batches([df])
+
+    def write_batches(self, dfs):
         engine = SQLAlchemyEngines.get_engine(self._get_sql_engine())
         import sqlalchemy as sa
         with engine.connect() as connection:
             try:
-                self._do_apply(connection, df)
+                for idx, df in enumerate(dfs):
+                    self._do_apply(connection, df, if_exists=None if idx == 0 else self.IF_EXISTS_OPTIONS.APPEND)
             except sa.exc.SQLAlchemyError as exc:
                 raise SQLError(str(exc))
             connection.commit()
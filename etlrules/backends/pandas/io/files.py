@@ -1,39 +1,112 @@
+import contextlib
 import os
+import zipfile
+from typing import Iterable, Iterator, Mapping, Optional, Sequence
 import pandas as pd
 
 from etlrules.exceptions import MissingColumnError
+from etlrules.backends.pandas.io.csv_read import PandasCSVReadMixin
+from etlrules.backends.pandas.io.jsonl_read import PandasJSONLinesReadMixin
 
 from etlrules.backends.common.io.files import (
+    ReadArrowFileRule as ReadArrowFileRuleBase,
     ReadCSVFileRule as ReadCSVFileRuleBase,
+    ReadJSONLinesFileRule as ReadJSONLinesFileRuleBase,
     ReadParquetFileRule as ReadParquetFileRuleBase,
+    WriteArrowFileRule as WriteArrowFileRuleBase,
     WriteCSVFileRule as WriteCSVFileRuleBase,
+    WriteJSONLinesFileRule as WriteJSONLinesFileRuleBase,
     WriteParquetFileRule as WriteParquetFileRuleBase,
 )
 
 
-class ReadCSVFileRule(ReadCSVFileRuleBase):
+class ReadCSVFileRule(PandasCSVReadMixin, ReadCSVFileRuleBase):
+
+    DOWNLOAD_URIS = True
+
+    def _open_file(self, stack: contextlib.ExitStack, file_path: str):
+        if file_path.endswith(".zst"):
+            import pyarrow as pa
+            # decompressed by arrow as it's parsed, pandas needs the optional zstandard package otherwise
+            return stack.enter_context(pa.CompressedInputStream(pa.OSFile(file_path), "zstd"))
+        return file_path
+
+    def _read(self, file_path: str, cached_types: Optional[Mapping[str, str]]) -> pd.DataFrame:
+        with contextlib.ExitStack() as stack:
+            df = pd.read_csv(self._open_file(stack, file_path), **self._get_read_options(self.use_pyarrow, cached_types))
+        return self._convert_types(df, self.use_pyarrow)
+
+    def _read_batches(self, file_path: str, batch_size: int, cached_types: Optional[Mapping[str, str]]) -> Iterator[pd.DataFrame]:
+        # the pyarrow engine doesn't support reading in chunks
+        with contextlib.ExitStack() as stack:
+            with pd.read_csv(self._open_file(stack, file_path), chunksize=batch_size, **self._get_read_options(False, cached_types)) as reader:
+                for df in reader:
+                    yield self._convert_types(df, False)
+
     def do_read(self, file_path: str) -> pd.DataFrame:
-        return pd.read_csv(
-            file_path, sep=self.separator, header='infer' if self.header else None,
-            skiprows=self.skip_header_rows,
-            index_col=False
-        )
+        return self._read_with_schema_cache(file_path, lambda cached_types: self._read(file_path, cached_types))
+
+    def do_read_batches(self, file_path: str, batch_size: int) -> Iterator[pd.DataFrame]:
+        yield from self._read_batches_with_schema_cache(
+            file_path, lambda cached_types: self._read_batches(file_path, batch_size, cached_types))
+
+    def do_concat(self, dfs: Sequence[pd.DataFrame]) -> pd.DataFrame:
+        return pd.concat(dfs, axis=0, ignore_index=True)
 
 
 class ReadParquetFileRule(ReadParquetFileRuleBase):
     def do_read(self, file_path: str) -> pd.DataFrame:
-        from pyarrow.lib import ArrowInvalid
-        try:
-            return pd.read_parquet(
-                file_path, engine="pyarrow", columns=self.columns, filters=self.filters
-            )
-        except ArrowInvalid as exc:
-            raise MissingColumnError(str(exc))
+        if self.dataset:
+            return self._read_dataset_table(file_path).to_pandas()
+        # the URIs are read with range requests (only the footer and the column chunks read are downloaded)
+        return self._read_table(file_path, use_pandas_metadata=True).to_pandas()
+
+    def do_read_batches(self, file_path: str, batch_size: int) -> Iterator[pd.DataFrame]:
+        for batch in self._iter_record_batches(file_path, batch_size):
+            yield batch.to_pandas()
+
+    def do_read_empty(self, file_path: str) -> pd.DataFrame:
+        return self._read_schema_table(file_path).to_pandas()
+
+    def do_concat(self, dfs: Sequence[pd.DataFrame]) -> pd.DataFrame:
+        return pd.concat(dfs, axis=0, ignore_index=True)
+
+
+class ReadArrowFileRule(ReadArrowFileRuleBase):
+    def do_read(self, file_path: str) -> pd.DataFrame:
+        return self._read_table(file_path).to_pandas()
+
+    def do_read_batches(self, file_path: str, batch_size: int) -> Iterator[pd.DataFrame]:
+        for batch in self._iter_record_batches(file_path, batch_size):
+            yield batch.to_pandas()
+
+    def do_read_empty(self, file_path: str) -> pd.DataFrame:
+        return self._read_schema_table(file_path).to_pandas()
+
+    def do_concat(self, dfs: Sequence[pd.DataFrame]) -> pd.DataFrame:
+        return pd.concat(dfs, axis=0, ignore_index=True)
+
+
+class ReadJSONLinesFileRule(PandasJSONLinesReadMixin, ReadJSONLinesFileRuleBase):
+
+    def do_read(self, file_path: str) -> pd.DataFrame:
+        return self._to_pandas(self._read_table(file_path))
+
+    def do_read_batches(self, file_path: str, batch_size: int) -> Iterator[pd.DataFrame]:
+        for batch in self._iter_record_batches(file_path, batch_size):
+            yield self._to_pandas(batch)
+
+    def do_concat(self, dfs: Sequence[pd.DataFrame]) -> pd.DataFrame:
+        return pd.concat(dfs, axis=0, ignore_index=True)
 
 
 class WriteCSVFileRule(WriteCSVFileRuleBase):
 
     def do_write(self, file_name: str, file_dir: str,  df: pd.DataFrame) -> None:
+        if self.use_pyarrow or self.compression not in (None, "zip"):
+            # pandas compresses in the same thread as it writes, the blocks are compressed in parallel instead
+            self.do_write_batches(file_name, file_dir, [df])
+            return
         df.to_csv(
             os.path.join(file_dir, file_name),
             sep=self.separator,
@@ -42,14 +115,63 @@ class WriteCSVFileRule(WriteCSVFileRuleBase):
             index=False,
         )
 
+    def _open_compressed(self, stack: contextlib.ExitStack, file_name: str, file_path: str):
+        if self.compression == "zip":
+            zarch = stack.enter_context(zipfile.ZipFile(file_path, "w", compression=zipfile.ZIP_DEFLATED))
+            return stack.enter_context(zarch.open(file_name[:-len(".zip")], "w"))
+        return self._open_output(stack, file_path)
+
+    def do_write_batches(self, file_name: str, file_dir: str, dfs: Iterable[pd.DataFrame]) -> None:
+        with contextlib.ExitStack() as stack:
+            f = self._open_compressed(stack, file_name, os.path.join(file_dir, file_name))
+            if self.use_pyarrow:
+                import pyarrow as pa
+                self._write_arrow_tables(f, (pa.Table.from_pandas(df, preserve_index=False) for df in dfs), self.header)
+                return
+            for idx, df in enumerate(dfs):
+                df.to_csv(
+                    f,
+                    sep=self.separator,
+                    header=self.header and idx == 0,
+                    index=False,
+                )
+
 
 class WriteParquetFileRule(WriteParquetFileRuleBase):
 
     def do_write(self, file_name: str, file_dir: str, df: pd.DataFrame) -> None:
-        df.to_parquet(
-            path=os.path.join(file_dir, file_name),
-            engine="pyarrow",
-            compression=self.compression,
-            index=False
+        import pyarrow as pa
+        self._write_table(os.path.join(file_dir, file_name), pa.Table.from_pandas(df, preserve_index=False))
+
+    def do_write_batches(self, file_name: str, file_dir: str, dfs: Iterable[pd.DataFrame]) -> None:
+        import pyarrow as pa
+        self._write_tables(
+            os.path.join(file_dir, file_name),
+            (pa.Table.from_pandas(df, preserve_index=False) for df in dfs)
         )
 
+
+class WriteArrowFileRule(WriteArrowFileRuleBase):
+
+    def do_write(self, file_name: str, file_dir: str, df: pd.DataFrame) -> None:
+        self.do_write_batches(file_name, file_dir, [df])
+
+    def do_write_batches(self, file_name: str, file_dir: str, dfs: Iterable[pd.DataFrame]) -> None:
+        import pyarrow as pa
+        self._write_tables(
+            os.path.join(file_dir, file_name),
+            (pa.Table.from_pandas(df, preserve_index=False) for df in dfs)
+        )
+
+
+class WriteJSONLinesFileRule(WriteJSONLinesFileRuleBase):
+
+    def do_write(self, file_name: str, file_dir: str, df: pd.DataFrame) -> None:
+        self.do_write_batches(file_name, file_dir, [df])
+
+    def do_write_batches(self, file_name: str, file_dir: str, dfs: Iterable[pd.DataFrame]) -> None:
+        with contextlib.ExitStack() as stack:
+            f = self._open_output(stack, os.path.join(file_dir, file_name))
+            for df in dfs:
+                # each batch ends with a new line so the batches are appended as lines
+                df.to_json(f, orient="records", lines=True, date_format="iso")
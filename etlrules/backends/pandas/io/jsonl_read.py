@@ -0,0 +1,14 @@
+import pandas as pd
+
+from etlrules.backends.pandas.types import MAP_TYPES
+
+
+class PandasJSONLinesReadMixin:
+    """ The conversion of the arrow tables to pandas shared by the pandas and dask ReadJSONLinesFileRule. """
+
+    def _to_pandas(self, table) -> pd.DataFrame:
+        df = table.to_pandas()
+        if self.column_types:
+            # nullable pandas types, as the other readers
+            df = df.astype({col: MAP_TYPES[col_type] for col, col_type in self.column_types.items() if col in df.columns})
+        return df
@@ -2,6 +2,7 @@ import polars as pl
 
 from etlrules.backends.common.conditions import (
     IfThenElseRule as IfThenElseRuleBase,
+    CaseWhenRule as CaseWhenRuleBase,
     FilterRule as FilterRuleBase
 )
 
@@ -11,7 +12,7 @@ from etlrules.backends.polars.expressions import Expression
 class IfThenElseRule(IfThenElseRuleBase):
 
     def get_condition_expression(self):
-        return Expression(self.condition_expression, filename=f'{self.output_column}.py')
+        return Expression.get(self.condition_expression, filename=f'{self.output_column}.py')
 
     def apply(self, data):
         df = self._get_input_df(data)
@@ -28,10 +29,33 @@ class IfThenElseRule(IfThenElseRuleBase):
         self._set_output_df(data, df)
 
 
+class CaseWhenRule(CaseWhenRuleBase):
+
+    def get_condition_expression(self, condition_expression, idx):
+        return Expression.get(condition_expression, filename=f'{self.output_column}_case_{idx}.py')
+
+    def apply(self, data):
+        df = self._get_input_df(data)
+        df_columns = set(df.columns)
+        self._validate_columns(df_columns)
+        result = pl
+        for case, condition_expression in zip(self.cases, self._condition_expressions):
+            try:
+                cond_series = condition_expression.eval(df)
+            except pl.exceptions.ColumnNotFoundError as exc:
+                raise KeyError(str(exc))
+            then_value = pl.lit(case["then_value"]) if "then_value" in case else pl.col(case["then_column"])
+            result = result.when(cond_series).then(then_value)
+        else_value = pl.lit(self.else_value) if self.else_column is None else pl.col(self.else_column)
+        result = result.otherwise(else_value)
+        df = df.with_columns(**{self.output_column: result})
+        self._set_output_df(data, df)
+
+
 class FilterRule(FilterRuleBase):
 
     def get_condition_expression(self):
-        return Expression(self.condition_expression, filename="FilterRule.py")
+        return Expression.get(self.condition_expression, filename="FilterRule.py")
 
     def apply(self, data):
         df = self._get_input_df(data)
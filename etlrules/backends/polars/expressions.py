@@ -1,25 +1,47 @@
 import logging
+import numpy as np
 import polars as pl
+from typing import Optional
 
-from etlrules.backends.common.expressions import Expression as ExpressionBase
+from etlrules.backends.common.expressions import (
+    Expression as ExpressionBase,
+    EVAL_MODE_ROWWISE,
+    EVAL_MODE_VECTORIZED,
+)
 from etlrules.data import context
 
 perf_logger = logging.getLogger("etlrules.perf")
 
 
+def to_jit_array(series: pl.Series) -> Optional[np.ndarray]:
+    """ Returns the values of a series as a numpy array to be used in jit compiled expressions or None if not possible. """
+    if not (series.is_numeric() or series.dtype == pl.Boolean) or series.null_count() > 0:
+        return None
+    return series.to_numpy()
+
+
 class Expression(ExpressionBase):
 
     def eval(self, df):
-        try:
-            expr_series = eval(self._compiled_expr, {}, {'df': df, 'context': context})
-        except (TypeError, pl.exceptions.SchemaError):
-            # attempt to run a slower apply
-            expr = self._compiled_expr
-            if df.is_empty():
-                expr_series = pl.Series([], dtype=pl.Utf8)
-            else:
-                columns = list(df.columns)
-                perf_logger.warning("Evaluating expression '%s' is not vectorized and might hurt the overall performance.", self.expression_str)
-                df_out = df.map_rows(lambda df: eval(expr, {}, {'df': dict(zip(columns, df)), 'context': context}))
-                expr_series = df_out[df_out.columns[0]]
-        return expr_series
+        schema_key = self._get_schema_key(df)
+        if self._get_eval_mode(schema_key) != EVAL_MODE_ROWWISE:
+            try:
+                expr_series = eval(self._compiled_expr, {}, {'df': df, 'context': context})
+                self._set_eval_mode(schema_key, EVAL_MODE_VECTORIZED)
+                return expr_series
+            except (TypeError, pl.exceptions.SchemaError):
+                self._set_eval_mode(schema_key, EVAL_MODE_ROWWISE)
+        # attempt to run a slower apply
+        if df.is_empty():
+            return pl.Series([], dtype=pl.Utf8)
+        perf_logger.warning("Evaluating expression '%s' is not vectorized and might hurt the overall performance.", self.expression_str)
+        if self._columns:
+            if self._can_eval_rows_jit(len(df)):
+                result = self._eval_rows_jit([to_jit_array(df[col]) for col in self._columns])
+                if result is not None:
+                    return pl.Series(result)
+            return pl.Series(self._eval_rows([df[col].to_list() for col in self._columns]))
+        expr = self._compiled_expr
+        columns = list(df.columns)
+        df_out = df.map_rows(lambda df: eval(expr, {}, {'df': dict(zip(columns, df)), 'context': context}))
+        return df_out[df_out.columns[0]]
@@ -25,12 +25,16 @@ class WriteSQLTableRule(WriteSQLTableRuleBase):
     def apply(self, data):
         super().apply(data)
         df = self._get_input_df(data)
+        self.write_batches([df])
+
+    def write_batches(self, dfs):
         import sqlalchemy as sa
         try:
-            df.write_database(
-                self._get_sql_table(),
-                self._get_sql_engine(),
-                if_exists=self.if_exists
-            )
+            for idx, df in enumerate(dfs):
+                df.write_database(
+                    self._get_sql_table(),
+                    self._get_sql_engine(),
+                    if_exists=self.if_exists if idx == 0 else self.IF_EXISTS_OPTIONS.APPEND
+                )
         except sa.exc.SQLAlchemyError as exc:
             raise SQLError(str(exc))
@@ -1,91 +1,253 @@
+import contextlib
+import lzma
 import os
+import shutil
+import tempfile
+from typing import Dict, Iterable, Iterator, Mapping, Optional, Sequence
 import polars as pl
 import zipfile
 
+from etlrules.data import get_temp_dir
 from etlrules.exceptions import MissingColumnError
+from etlrules.backends.polars.types import MAP_TYPES
 
 from etlrules.backends.common.io.files import (
+    ReadArrowFileRule as ReadArrowFileRuleBase,
     ReadCSVFileRule as ReadCSVFileRuleBase,
+    ReadJSONLinesFileRule as ReadJSONLinesFileRuleBase,
     ReadParquetFileRule as ReadParquetFileRuleBase,
+    WriteArrowFileRule as WriteArrowFileRuleBase,
     WriteCSVFileRule as WriteCSVFileRuleBase,
+    WriteJSONLinesFileRule as WriteJSONLinesFileRuleBase,
     WriteParquetFileRule as WriteParquetFileRuleBase,
 )
 
 
-COMPRESSION_MAP = {
-    'zip': zipfile.ZIP_DEFLATED,
-    'gzip': zipfile.ZIP_DEFLATED,
-    'bz2': zipfile.ZIP_BZIP2,
-    'xz': zipfile.ZIP_LZMA,
-}
-
 COMPRESSION_EXT = {
     '.zip': 'zip',
     '.gz': 'gzip',
     '.bz2': 'bz2',
     '.xz': 'xz',
+    '.zst': 'zstd',
 }
 
+# previous versions wrote zip archives for all the compressions, these are still read as zip archives
+ZIP_MAGIC = b"PK\x03\x04"
+
+# the size of the chunks in which the files are decompressed
+DECOMPRESS_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def _open_decompressed(stack: contextlib.ExitStack, file_path: str, compression: str):
+    """ Opens a compressed file for reading its decompressed contents as a stream. """
+    import pyarrow as pa
+    with open(file_path, "rb") as f:
+        is_zip = f.read(len(ZIP_MAGIC)) == ZIP_MAGIC
+    if is_zip:
+        zarch = stack.enter_context(zipfile.ZipFile(file_path, 'r'))
+        arch_files = zarch.namelist()
+        if len(arch_files) != 1:
+            raise RuntimeError(f"One a single csv file can be read from an archive. {file_path} has {len(arch_files)} files.")
+        return stack.enter_context(zarch.open(arch_files[0]))
+    if compression == "xz":
+        return stack.enter_context(lzma.open(file_path, "rb"))
+    # decompressed by arrow in C++, without holding the GIL
+    return stack.enter_context(pa.CompressedInputStream(pa.OSFile(file_path), compression))
+
+
+@contextlib.contextmanager
+def decompressed_file(file_path: str) -> Iterator[str]:
+    """ Yields the path of a decompressed copy of a compressed file or the path of the file itself if not compressed.
+
+    The file is decompressed in chunks to a temporary file (in the etlrules temp dir), which is removed on exit.
+    The polars csv parser memory maps the decompressed file rather than reading it all in memory.
+    """
+    _, ext = os.path.splitext(file_path)
+    compression = COMPRESSION_EXT.get(ext)
+    if compression is None:
+        yield file_path
+        return
+    fd, temp_path = tempfile.mkstemp(prefix="etlrules_csv_", suffix=".csv", dir=get_temp_dir())
+    try:
+        with contextlib.ExitStack() as stack:
+            dst = stack.enter_context(os.fdopen(fd, "wb"))
+            src = _open_decompressed(stack, file_path, compression)
+            shutil.copyfileobj(src, dst, DECOMPRESS_CHUNK_SIZE)
+        yield temp_path
+    finally:
+        os.remove(temp_path)
+
+
 class ReadCSVFileRule(ReadCSVFileRuleBase):
 
-    def do_read(self, file_path: str) -> pl.DataFrame:
-        _, ext = os.path.splitext(file_path)
-        compression = COMPRESSION_EXT.get(ext)
-        if compression is not None:
-            with zipfile.ZipFile(file_path, 'r', compression=COMPRESSION_MAP[compression]) as zarch:
-                arch_files = zarch.namelist()
-                if len(arch_files) != 1:
-                    raise RuntimeError(f"One a single csv file can be read from an archive. {file_path} has {len(arch_files)} files.")
-                with zarch.open(arch_files[0]) as zf:
-                    return pl.read_csv(
-                        zf, separator=self.separator, has_header=self.header,
-                        skip_rows=self.skip_header_rows or 0
-                    )
-        return pl.read_csv(
-            file_path, separator=self.separator, has_header=self.header,
+    DOWNLOAD_URIS = True
+
+    SCHEMA_MISMATCH_ERRORS = ReadCSVFileRuleBase.SCHEMA_MISMATCH_ERRORS + (pl.exceptions.ComputeError,)
+
+    def _get_read_options(self, cached_types: Optional[Mapping[str, str]]=None) -> dict:
+        options = dict(
+            separator=self.separator, has_header=self.header,
             skip_rows=self.skip_header_rows or 0
         )
+        dtypes = {}
+        for column_types in (cached_types, self.column_types):
+            if column_types:
+                dtypes.update({col: MAP_TYPES[col_type] for col, col_type in column_types.items()})
+        if self.date_formats:
+            # read as strings and parsed after with the given formats
+            dtypes.update({col: pl.Utf8 for col in self.date_formats})
+        if dtypes:
+            options["dtypes"] = dtypes
+        return options
+
+    def _parse_dates(self, df: pl.DataFrame) -> pl.DataFrame:
+        if not self.date_formats:
+            return df
+        return df.with_columns(
+            pl.col(col).str.to_datetime(format=fmt) for col, fmt in self.date_formats.items()
+        )
+
+    def _get_inferred_types(self, df: pl.DataFrame) -> Dict[str, str]:
+        inferred_types = {}
+        for col, dtype in df.schema.items():
+            for col_type, pl_type in MAP_TYPES.items():
+                if dtype == pl_type:
+                    inferred_types[col] = col_type
+                    break
+        return inferred_types
+
+    def _read(self, csv_path: str, cached_types: Optional[Mapping[str, str]]) -> pl.DataFrame:
+        return self._parse_dates(pl.read_csv(csv_path, **self._get_read_options(cached_types)))
+
+    def _read_batches(self, csv_path: str, batch_size: int, cached_types: Optional[Mapping[str, str]]) -> Iterator[pl.DataFrame]:
+        reader = pl.read_csv_batched(csv_path, batch_size=batch_size, **self._get_read_options(cached_types))
+        while True:
+            dfs = reader.next_batches(1)
+            if not dfs:
+                break
+            yield self._parse_dates(dfs[0])
+
+    def do_read(self, file_path: str) -> pl.DataFrame:
+        with decompressed_file(file_path) as csv_path:
+            return self._read_with_schema_cache(file_path, lambda cached_types: self._read(csv_path, cached_types))
+
+    def do_read_batches(self, file_path: str, batch_size: int) -> Iterator[pl.DataFrame]:
+        with decompressed_file(file_path) as csv_path:
+            yield from self._read_batches_with_schema_cache(
+                file_path, lambda cached_types: self._read_batches(csv_path, batch_size, cached_types))
+
+    def do_concat(self, dfs: Sequence[pl.DataFrame]) -> pl.DataFrame:
+        return pl.concat(dfs, how="vertical")
 
 
 class ReadParquetFileRule(ReadParquetFileRuleBase):
     def do_read(self, file_path: str) -> pl.DataFrame:
-        from pyarrow.lib import ArrowInvalid
-        try:
-            return pl.read_parquet(
-                file_path, use_pyarrow=True, columns=self.columns,
-                pyarrow_options={
-                    "filters": self.filters
-                }
-            )
-        except ArrowInvalid as exc:
-            raise MissingColumnError(str(exc))
+        if self.dataset:
+            return pl.from_arrow(self._read_dataset_table(file_path))
+        # the URIs are read with range requests (only the footer and the column chunks read are downloaded)
+        return pl.from_arrow(self._read_table(file_path))
+
+    def do_read_batches(self, file_path: str, batch_size: int) -> Iterator[pl.DataFrame]:
+        for batch in self._iter_record_batches(file_path, batch_size):
+            yield pl.from_arrow(batch)
+
+    def do_read_empty(self, file_path: str) -> pl.DataFrame:
+        return pl.from_arrow(self._read_schema_table(file_path))
+
+    def do_concat(self, dfs: Sequence[pl.DataFrame]) -> pl.DataFrame:
+        return pl.concat(dfs, how="vertical")
+
+
+class ReadArrowFileRule(ReadArrowFileRuleBase):
+    def do_read(self, file_path: str) -> pl.DataFrame:
+        return pl.from_arrow(self._read_table(file_path))
+
+    def do_read_batches(self, file_path: str, batch_size: int) -> Iterator[pl.DataFrame]:
+        for batch in self._iter_record_batches(file_path, batch_size):
+            yield pl.from_arrow(batch)
+
+    def do_read_empty(self, file_path: str) -> pl.DataFrame:
+        return pl.from_arrow(self._read_schema_table(file_path))
+
+    def do_concat(self, dfs: Sequence[pl.DataFrame]) -> pl.DataFrame:
+        return pl.concat(dfs, how="vertical")
+
+
+class ReadJSONLinesFileRule(ReadJSONLinesFileRuleBase):
+    # read_ndjson drops the fields with only nulls and cannot override the types of the fields missing from a file,
+    # arrow's multithreaded parser is used instead
+    def do_read(self, file_path: str) -> pl.DataFrame:
+        return pl.from_arrow(self._read_table(file_path))
+
+    def do_read_batches(self, file_path: str, batch_size: int) -> Iterator[pl.DataFrame]:
+        for batch in self._iter_record_batches(file_path, batch_size):
+            yield pl.from_arrow(batch)
+
+    def do_concat(self, dfs: Sequence[pl.DataFrame]) -> pl.DataFrame:
+        return pl.concat(dfs, how="vertical")
 
 
 class WriteCSVFileRule(WriteCSVFileRuleBase):
 
+    def _open_compressed(self, stack: contextlib.ExitStack, file_name: str, file_path: str):
+        if self.compression == "zip":
+            fname, _ = os.path.splitext(file_name)
+            zarch = stack.enter_context(zipfile.ZipFile(file_path, 'w', compression=zipfile.ZIP_DEFLATED))
+            return stack.enter_context(zarch.open(fname + ".csv", "w"))
+        # the blocks are compressed in parallel, as the csv is written
+        return self._open_output(stack, file_path)
+
+    def _write_csv_batches(self, f, dfs: Iterable[pl.DataFrame]) -> None:
+        for idx, df in enumerate(dfs):
+            df.write_csv(f,
+                separator=self.separator,
+                has_header=self.header and idx == 0,
+            )
+
     def do_write(self, file_name: str, file_dir: str, df: pl.DataFrame) -> None:
         file_path = os.path.join(file_dir, file_name)
-        if self.compression is not None:
-            fname, _ = os.path.splitext(file_name)
-            fname_csv = fname + ".csv"
-            with zipfile.ZipFile(file_path, 'w', compression=COMPRESSION_MAP[self.compression]) as zarch:
-                with zarch.open(fname_csv, "w") as zf:
-                    df.write_csv(zf,
-                        separator=self.separator,
-                        has_header=self.header,
-                    )
-        else:
+        if self.compression is None:
             df.write_csv(file_path,
                 separator=self.separator,
                 has_header=self.header,
             )
+        else:
+            self.do_write_batches(file_name, file_dir, [df])
+
+    def do_write_batches(self, file_name: str, file_dir: str, dfs: Iterable[pl.DataFrame]) -> None:
+        with contextlib.ExitStack() as stack:
+            f = self._open_compressed(stack, file_name, os.path.join(file_dir, file_name))
+            self._write_csv_batches(f, dfs)
 
 
 class WriteParquetFileRule(WriteParquetFileRuleBase):
 
     def do_write(self, file_name: str, file_dir: str, df: pl.DataFrame) -> None:
-        df.write_parquet(
-            os.path.join(file_dir, file_name),
-            use_pyarrow=True,
-            compression=self.compression or "uncompressed",
-        )
+        self._write_table(os.path.join(file_dir, file_name), df.to_arrow())
+
+    def do_write_batches(self, file_name: str, file_dir: str, dfs: Iterable[pl.DataFrame]) -> None:
+        self._write_tables(os.path.join(file_dir, file_name), (df.to_arrow() for df in dfs))
+
+
+class WriteArrowFileRule(WriteArrowFileRuleBase):
+
+    def do_write(self, file_name: str, file_dir: str, df: pl.DataFrame) -> None:
+        self.do_write_batches(file_name, file_dir, [df])
+
+    def do_write_batches(self, file_name: str, file_dir: str, dfs: Iterable[pl.DataFrame]) -> None:
+        self._write_tables(os.path.join(file_dir, file_name), (df.to_arrow() for df in dfs))
+
+
+class WriteJSONLinesFileRule(WriteJSONLinesFileRuleBase):
+
+    def do_write(self, file_name: str, file_dir: str, df: pl.DataFrame) -> None:
+        if self.compression is None:
+            df.write_ndjson(os.path.join(file_dir, file_name))
+        else:
+            self.do_write_batches(file_name, file_dir, [df])
+
+    def do_write_batches(self, file_name: str, file_dir: str, dfs: Iterable[pl.DataFrame]) -> None:
+        with contextlib.ExitStack() as stack:
+            f = self._open_output(stack, os.path.join(file_dir, file_name))
+            for df in dfs:
+                df.write_ndjson(f)
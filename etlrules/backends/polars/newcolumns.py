@@ -11,7 +11,7 @@ from etlrules.backends.polars.types import MAP_TYPES
 class AddNewColumnRule(AddNewColumnRuleBase):
 
     def get_column_expression(self):
-        return Expression(self.column_expression, filename=f'{self.output_column}_expression.py')
+        return Expression.get(self.column_expression, filename=f'{self.output_column}_expression.py')
 
     def apply(self, data):
         df = self._get_input_df(data)
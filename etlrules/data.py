@@ -1,5 +1,5 @@
 from contextlib import contextmanager
-from typing import Generator, Mapping, Optional, Union
+from typing import Callable, Generator, Mapping, Optional, Union
 
 
 class RuleData:
@@ -16,6 +16,7 @@ class RuleData:
         )
         self.context = {k: v for k, v in context.items()} if context is not None else {}
         self.lineage_info = {}
+        self.pending_commits = []
 
     def get_main_output(self):
         return self.main_output
@@ -40,6 +41,23 @@ class RuleData:
     def get_context(self) -> dict[str, Union[str, int, float, bool]]:
         return self.context
 
+    def add_pending_commit(self, commit: Callable[[], None]) -> None:
+        """ Registers a callable to be called only after the whole plan ran successfully (see commit).
+
+        Used by the rules which keep a state between runs (e.g. the files already read) to only persist
+        the state when all the rules in the plan succeeded.
+        """
+        self.pending_commits.append(commit)
+
+    def commit(self) -> None:
+        """ Calls the pending commits in the order they were added and clears them.
+
+        The RuleEngine calls it at the end of a successful run. Call it explicitly when applying the rules directly.
+        """
+        pending_commits, self.pending_commits = self.pending_commits, []
+        for commit in pending_commits:
+            commit()
+
 
 class Context:
 
@@ -77,3 +95,12 @@ class Context:
 
 
 context = Context()
+
+
+def get_temp_dir() -> Optional[str]:
+    """ Returns the etlrules temp dir of the running plan (see the runner) or None, the system temp dir,
+    when not running as part of a plan. """
+    try:
+        return context.etlrules_tempdir
+    except (KeyError, RuntimeError):
+        return None
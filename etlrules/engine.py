@@ -1,9 +1,13 @@
 import graphlib
-from typing import Optional, Tuple, Union
+from typing import Iterator, Optional, Sequence, Tuple, Union
 
 from .data import RuleData, context
 from .exceptions import GraphRuntimeError, InvalidPlanError
 from .plan import PlanMode, Plan
+from .rule import BaseRule
+
+
+DEFAULT_BATCH_SIZE = 100_000
 
 
 class RuleEngine:
@@ -21,6 +25,10 @@ class RuleEngine:
     At the end of a plan run, the RuleData instance passed in will contain the results of the run
     (ie new dataframes/transformed dataframes) which can be inspected/operated on outside of the
     rule engine.
+
+    Pipeline plans which read from a file, apply row level transformations and write the results
+    can also be run in streaming mode (see run_streaming), which processes the input in batches of rows
+    and keeps the memory usage bounded regardless of the size of the input.
     """
 
     def __init__(self, plan: Plan):
@@ -114,8 +122,78 @@ class RuleEngine:
             raise InvalidPlanError("An empty plan cannot be run.")
         mode = self.plan.get_mode()
         if mode == PlanMode.PIPELINE:
-            return self.run_pipeline(data)
+            self.run_pipeline(data)
         elif mode == PlanMode.GRAPH:
-            return self.run_graph(data)
+            self.run_graph(data)
         else:
             raise InvalidPlanError("Plan's mode cannot be determined.")
+        # the state kept by the rules between runs is only persisted when the whole plan succeeded
+        data.commit()
+        return data
+
+    def _get_streaming_rules(self) -> Tuple[BaseRule, Sequence[BaseRule], BaseRule]:
+        if self.plan.is_empty():
+            raise InvalidPlanError("An empty plan cannot be run.")
+        if self.plan.get_mode() != PlanMode.PIPELINE:
+            raise InvalidPlanError("Only pipeline plans can be run in streaming mode.")
+        rules = list(self.plan)
+        if len(rules) < 2 or rules[0].has_input() or rules[-1].has_output():
+            raise InvalidPlanError("A plan run in streaming mode must start with a reader rule and end with a writer rule.")
+        reader, transforms, writer = rules[0], rules[1:-1], rules[-1]
+        not_streamable = [
+            f"{rule.__class__.__name__}(name={rule.get_name()}, index={idx})"
+            for idx, rule in enumerate(rules)
+            if not rule.is_streamable() or (0 < idx < len(rules) - 1 and (not rule.has_input() or not rule.has_output()))
+        ]
+        if not_streamable:
+            raise InvalidPlanError(
+                f"The following rules cannot be applied on batches of rows: {', '.join(not_streamable)}. "
+                "Split the plan at these rules and run the part requiring all the data in normal mode."
+            )
+        return reader, transforms, writer
+
+    def _iter_transformed_batches(self, reader: BaseRule, transforms: Sequence[BaseRule], batch_size: int, data: RuleData) -> Iterator:
+        for df in reader.iter_batches(batch_size, data):
+            batch_data = RuleData(main_input=df, strict=data.strict)
+            for rule in transforms:
+                rule.apply(batch_data)
+            yield batch_data.get_main_output()
+
+    def validate_streaming(self) -> Tuple[bool, Optional[str]]:
+        try:
+            self._get_streaming_rules()
+        except InvalidPlanError as exc:
+            return False, str(exc)
+        return True, None
+
+    def run_streaming(self, data: RuleData, batch_size: int=DEFAULT_BATCH_SIZE) -> RuleData:
+        """ Runs the plan in streaming mode, applying the rules on batches of batch_size rows.
+
+        The first rule of the plan must be a reader and the last one a writer. The reader produces
+        the input in batches, each batch goes through all the rules in between and it's appended by the
+        writer to its output before the next batch is read, such that only one batch is held in memory.
+
+        All the rules must be streamable (see BaseRule.is_streamable), i.e. operate on each row independently.
+        Plans which need all the data at once (e.g. sort, aggregate, dedupe, joins) are rejected and should be
+        split in two plans: a streaming plan up to the rule needing all the data, writing an intermediate
+        output and a normal plan reading the intermediate output.
+
+        Args:
+            data: The RuleData instance providing the context. No dataframes are added to it.
+            batch_size: The (maximum) number of rows in a batch. Default: 100_000.
+
+        Raises:
+            InvalidPlanError: raised if the plan cannot be run in streaming mode.
+
+        Note:
+            The types of the columns are inferred for each batch separately for inputs which are not typed
+            (e.g. csv files) and, therefore, they can differ between batches (e.g. a batch containing only
+            missing values in a column).
+        """
+        assert isinstance(data, RuleData)
+        assert isinstance(batch_size, int) and batch_size > 0, "batch_size must be a positive integer."
+        reader, transforms, writer = self._get_streaming_rules()
+        with context.set(self._get_context(data)):
+            writer.write_batches(self._iter_transformed_batches(reader, transforms, batch_size, data))
+        data.commit()
+        return data
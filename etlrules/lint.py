@@ -0,0 +1,349 @@
+import argparse
+import ast
+import os
+import re
+import sys
+from typing import Iterator, Mapping, Optional, Sequence
+
+from .backends.common.aggregate import AggregateRule
+from .backends.common.basic import RulesBlock
+from .backends.common.conditions import CaseWhenRule, FilterRule, IfThenElseRule
+from .backends.common.expressions import compile_expression
+from .backends.common.io.db import ReadSQLQueryRule
+from .backends.common.io.files import BaseReadFileRule
+from .backends.common.newcolumns import AddNewColumnRule
+from .backends.common.strings import StrSplitRejoinRule, StrSplitRule
+from .backends.common.substitution import subst_string
+from .backends.common.types import SUPPORTED_TYPES
+from .data import context
+from .plan import Plan
+from .rule import BaseRule
+from .runner import load_plan
+
+
+SEVERITY_HIGH = "high"
+SEVERITY_MEDIUM = "medium"
+SEVERITY_LOW = "low"
+
+SEVERITIES = (SEVERITY_HIGH, SEVERITY_MEDIUM, SEVERITY_LOW)
+
+# the errors raised when an expression cannot be vectorized (the backends fall back to the row level evaluation)
+ROW_LEVEL_ERRORS = (TypeError, ValueError)
+try:
+    import polars
+    ROW_LEVEL_ERRORS += (polars.exceptions.SchemaError, )
+except ImportError:
+    pass
+
+# regex reads matching more files than this are reported
+REGEX_READ_MAX_FILES = 100
+
+# functions which cannot operate on whole columns and force the row level evaluation
+ROW_LEVEL_FUNCTIONS = {"str", "int", "float", "bool", "len"}
+
+# sample values used to build a small dataframe from a declared schema
+SAMPLE_VALUES = {
+    "int8": [1, 2], "int16": [1, 2], "int32": [1, 2], "int64": [1, 2],
+    "uint8": [1, 2], "uint16": [1, 2], "uint32": [1, 2], "uint64": [1, 2],
+    "float32": [1.5, 2.5], "float64": [1.5, 2.5],
+    "string": ["a", "b"],
+    "boolean": [True, False],
+}
+
+
+class LintFinding:
+    """ A construct in a plan which is known to be slow.
+
+    Args:
+        rule_idx: The index of the rule in the plan (rules inside a RulesBlock use the index of the block).
+        rule: The rule where the construct was found.
+        severity: One of high, medium or low.
+        message: What was found and why it is slow.
+        suggestion: A faster (vectorized) alternative.
+    """
+
+    def __init__(self, rule_idx: int, rule: BaseRule, severity: str, message: str, suggestion: str):
+        assert severity in SEVERITIES, f"Unknown severity {severity}"
+        self.rule_idx = rule_idx
+        self.rule = rule
+        self.severity = severity
+        self.message = message
+        self.suggestion = suggestion
+
+    def __str__(self) -> str:
+        rule_name = type(self.rule).__name__
+        if self.rule.get_name():
+            rule_name = f"{rule_name} '{self.rule.get_name()}'"
+        return f"Rule {self.rule_idx} {rule_name} [{self.severity}]: {self.message}\n    Suggestion: {self.suggestion}"
+
+    def __repr__(self) -> str:
+        return f"LintFinding({self.rule_idx}, {type(self.rule).__name__}, {self.severity!r}, {self.message!r})"
+
+
+def _get_row_level_constructs(ast_expr: ast.AST) -> list[str]:
+    """ Returns the constructs in an expression which can never be evaluated on whole columns. """
+    constructs = []
+    for node in ast.walk(ast_expr):
+        if isinstance(node, ast.IfExp):
+            constructs.append("if/else (use CaseWhenRule or IfThenElseRule)")
+        elif isinstance(node, ast.BoolOp):
+            op = "and" if isinstance(node.op, ast.And) else "or"
+            constructs.append(f"'{op}' (use '{'&' if op == 'and' else '|'}' with parenthesized operands)")
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            constructs.append("'not' (use '~')")
+        elif isinstance(node, ast.Compare) and len(node.ops) > 1:
+            constructs.append("chained comparison (split into comparisons combined with '&')")
+        elif isinstance(node, ast.Compare) and any(isinstance(op, (ast.In, ast.NotIn, ast.Is, ast.IsNot)) for op in node.ops):
+            constructs.append("in/is operators (use .isin() or .isna())")
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in ROW_LEVEL_FUNCTIONS:
+            constructs.append(f"{node.func.id}() (use .astype() or the .str accessor)")
+    return list(dict.fromkeys(constructs))
+
+
+def _get_expressions(rule: BaseRule) -> Iterator[tuple[str, str]]:
+    if isinstance(rule, AddNewColumnRule):
+        yield rule.output_column, rule.column_expression
+    elif isinstance(rule, IfThenElseRule):
+        yield rule.output_column, rule.condition_expression
+    elif isinstance(rule, CaseWhenRule):
+        for case in rule.cases:
+            yield rule.output_column, case["condition_expression"]
+    elif isinstance(rule, FilterRule):
+        yield "FilterRule", rule.condition_expression
+
+
+class PlanLinter:
+    """ Inspects a plan without running it and reports the constructs known to be slow.
+
+    Args:
+        plan: The plan to inspect.
+        sample_df: A sample (a few rows) of the input dataframe of the plan. Optional.
+            When given, the expressions are evaluated on the sample to find out whether they can be vectorized.
+            The columns added by the AddNewColumnRule rules are added to the sample as the plan is inspected.
+            The sample must be a dataframe of the same backend as the plan.
+            Without a sample, only the constructs which can never be vectorized are reported.
+    """
+
+    def __init__(self, plan: Plan, sample_df=None):
+        self.plan = plan
+        self.sample_df = sample_df
+
+    def _is_row_level(self, compiled_expr) -> tuple[Optional[bool], object]:
+        """ Returns whether the expression needs the row level evaluation on the sample and the vectorized result. """
+        if self.sample_df is None:
+            return None, None
+        try:
+            return False, eval(compiled_expr, {}, {'df': self.sample_df, 'context': context})
+        except ROW_LEVEL_ERRORS:
+            return True, None
+        except Exception:
+            # e.g. columns missing from the sample, undetermined
+            return None, None
+
+    def _lint_expressions(self, rule_idx: int, rule: BaseRule) -> Iterator[LintFinding]:
+        for output_column, expression in _get_expressions(rule):
+            try:
+                ast_expr, compiled_expr = compile_expression(expression, f"{output_column}.py")
+            except SyntaxError as exc:
+                yield LintFinding(rule_idx, rule, SEVERITY_HIGH, f"Expression '{expression}' has a syntax error: {exc}",
+                                  "Fix the syntax error.")
+                continue
+            constructs = _get_row_level_constructs(ast_expr)
+            is_row_level, result = self._is_row_level(compiled_expr)
+            if is_row_level is False and isinstance(rule, AddNewColumnRule) and rule.column_type is None:
+                self._add_sample_column(rule.output_column, result)
+            if is_row_level or (is_row_level is None and constructs):
+                suggestion = ("Rewrite the expression with vectorized column operations: " + ", ".join(constructs)
+                              if constructs else
+                              "Rewrite the expression with vectorized column operations (e.g. the .str/.dt accessors, "
+                              "& | ~ instead of and/or/not, CaseWhenRule instead of if/else).")
+                yield LintFinding(
+                    rule_idx, rule, SEVERITY_HIGH,
+                    f"Expression '{expression}' cannot be vectorized and is evaluated row by row.",
+                    suggestion
+                )
+
+    def _add_sample_column(self, column: str, result) -> None:
+        try:
+            if hasattr(self.sample_df, "with_columns"):
+                self.sample_df = self.sample_df.with_columns(**{column: result})
+            else:
+                self.sample_df = self.sample_df.assign(**{column: result})
+        except Exception:
+            # results which cannot be added as columns (e.g. scalars in some backends)
+            pass
+
+    def _lint_rule(self, rule_idx: int, rule: BaseRule) -> Iterator[LintFinding]:
+        yield from self._lint_expressions(rule_idx, rule)
+        if isinstance(rule, AggregateRule):
+            for col, agg_func in (getattr(rule, "aggregations", None) or {}).items():
+                if agg_func in ('list', 'csv'):
+                    yield LintFinding(
+                        rule_idx, rule, SEVERITY_MEDIUM,
+                        f"Aggregation '{agg_func}' for column '{col}' calls a Python function for each group.",
+                        "Use a vectorized aggregation (min, max, mean, count, countNoNA, sum, first, last) if the "
+                        "values are not needed as a list/csv."
+                    )
+            for col, agg_expr in (getattr(rule, "aggregation_expressions", None) or {}).items():
+                yield LintFinding(
+                    rule_idx, rule, SEVERITY_HIGH,
+                    f"Aggregation expression '{agg_expr}' for column '{col}' is evaluated in Python for each group.",
+                    "Use one of the vectorized aggregations (min, max, mean, count, countNoNA, sum, first, last), "
+                    "possibly after computing the input column with AddNewColumnRule."
+                )
+        elif isinstance(rule, StrSplitRejoinRule):
+            yield LintFinding(
+                rule_idx, rule, SEVERITY_MEDIUM,
+                "StrSplitRejoinRule splits and rejoins the strings in Python.",
+                "Use ReplaceRule (with regex=True if needed) to replace the separator when no sorting or limit is needed."
+            )
+        elif isinstance(rule, StrSplitRule) and type(rule).__module__.startswith("etlrules.backends.dask"):
+            yield LintFinding(
+                rule_idx, rule, SEVERITY_MEDIUM,
+                "StrSplitRule is not vectorized in the dask backend.",
+                "Use StrExtractRule to extract the needed substrings or run the plan with the pandas/polars backends."
+            )
+        elif isinstance(rule, ReadSQLQueryRule) and not rule.column_types:
+            yield LintFinding(
+                rule_idx, rule, SEVERITY_MEDIUM,
+                "ReadSQLQueryRule has no column_types, the types are inferred from the data.",
+                "Specify column_types for the columns in the query."
+            )
+        elif isinstance(rule, BaseReadFileRule) and rule.regex and rule.manifest_file is None:
+            # the incremental reads (with a manifest_file) only read the new files
+            yield from self._lint_regex_read(rule_idx, rule)
+
+    def _lint_regex_read(self, rule_idx: int, rule: BaseReadFileRule) -> Iterator[LintFinding]:
+        try:
+            file_dir = subst_string(rule.file_dir or ".")
+            pattern = re.compile(subst_string(rule.file_name))
+            nb_files = sum(1 for fn in os.listdir(file_dir) if pattern.match(fn))
+        except (KeyError, AttributeError, OSError, re.error):
+            # unresolvable substitutions, missing directories, etc.
+            return
+        if nb_files > REGEX_READ_MAX_FILES:
+            yield LintFinding(
+                rule_idx, rule, SEVERITY_MEDIUM,
+                f"The regex file read matches {nb_files} files in '{file_dir}', each file is opened and parsed separately "
+                "(with a per file overhead) before being concatenated.",
+                "Consolidate the files into fewer, larger files (e.g. partitioned parquet), narrow down the regex "
+                "or set a manifest_file to only read the files which are new since the last run."
+            )
+
+    def lint(self) -> list[LintFinding]:
+        """ Returns the findings for the whole plan. """
+        findings = []
+        with context.set(self.plan.get_context()):
+            for rule_idx, rule in enumerate(self.plan):
+                rules = rule._rules if isinstance(rule, RulesBlock) else [rule]
+                for sub_rule in rules:
+                    findings.extend(self._lint_rule(rule_idx, sub_rule))
+        return findings
+
+
+def get_sample_df_from_schema(schema: Mapping[str, str], backend: str):
+    """ Builds a small sample dataframe with the given column types.
+
+    Args:
+        schema: A mapping of column names to types. The supported types are: int8, int16, int32, int64,
+            uint8, uint16, uint32, uint64, float32, float64, string and boolean.
+        backend: The backend of the dataframe (pandas, polars or dask).
+    """
+    from .backends.pandas.types import MAP_TYPES
+    import pandas as pd
+    unsupported = [col_type for col_type in schema.values() if col_type not in SUPPORTED_TYPES]
+    if unsupported:
+        raise ValueError(f"Unsupported types in schema: {unsupported}")
+    df = pd.DataFrame({col: SAMPLE_VALUES[col_type] for col, col_type in schema.items()})
+    df = df.astype({col: MAP_TYPES[col_type] for col, col_type in schema.items()})
+    return _from_pandas(df, backend)
+
+
+def get_sample_df_from_file(file_path: str, backend: str, nb_rows: int=100):
+    """ Reads the first rows of a csv or parquet file to be used as a sample. """
+    import pandas as pd
+    if file_path.lower().endswith(".parquet"):
+        df = pd.read_parquet(file_path).head(nb_rows)
+    else:
+        df = pd.read_csv(file_path, nrows=nb_rows)
+    df = df.convert_dtypes()
+    return _from_pandas(df, backend)
+
+
+def _from_pandas(df, backend: str):
+    if backend == "polars":
+        import polars as pl
+        return pl.from_pandas(df)
+    elif backend == "dask":
+        import dask.dataframe as dd
+        return dd.from_pandas(df, npartitions=1)
+    return df
+
+
+def lint_plan(plan: Plan, sample_df=None) -> list[LintFinding]:
+    """ Inspects a plan without running it and reports the constructs known to be slow.
+
+    Basic usage:
+
+        from etlrules.lint import lint_plan
+        for finding in lint_plan(plan):
+            print(finding)
+
+    Args:
+        plan: The plan to inspect.
+        sample_df: A sample of the input dataframe used to find out which expressions can be vectorized. Optional.
+
+    Returns:
+        A list of LintFinding, each with a severity and a suggested alternative.
+    """
+    return PlanLinter(plan, sample_df).lint()
+
+
+def get_args_parser(args: Optional[Sequence[str]]=None) -> dict:
+    parser = argparse.ArgumentParser(description="Reports the constructs known to be slow in a plan without running it.")
+    parser.add_argument(
+        "-p",
+        "--plan",
+        help='Specify a yaml file containing a plan to lint.',
+        required=True,
+    )
+    parser.add_argument(
+        "-b",
+        "--backend",
+        help="The backend the plan is meant to run with.",
+        choices=["pandas", "polars", "dask"],
+        required=False,
+        default="pandas"
+    )
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        "--schema",
+        help="The column types of the input as a comma separated list of column:type (e.g. A:int64,B:string).",
+        required=False,
+    )
+    group.add_argument(
+        "--sample",
+        help="A csv or parquet file with a sample of the input.",
+        required=False,
+    )
+    return vars(parser.parse_args(args))
+
+
+def run() -> None:
+    args = get_args_parser()
+    plan = load_plan(args["plan"], args["backend"])
+    sample_df = None
+    if args["schema"]:
+        schema = dict(item.split(":", 1) for item in args["schema"].split(","))
+        sample_df = get_sample_df_from_schema(schema, args["backend"])
+    elif args["sample"]:
+        sample_df = get_sample_df_from_file(args["sample"], args["backend"])
+    findings = lint_plan(plan, sample_df)
+    for finding in findings:
+        print(finding)
+    print(f"{len(findings)} finding(s).")
+    sys.exit(1 if findings else 0)
+
+
+if __name__ == "__main__":
+    run()
@@ -18,6 +18,8 @@ class BaseRule:
         to a persistent repository and therefore has no dataframe output
     get_all_named_inputs: override to return the named inputs (if any) as strings
     get_all_named_outputs: override in case of multiple named outputs and return them as strings
+    is_streamable: defaults to False, override and return True if your rule can be applied
+        independently on batches of rows (see RuleEngine.run_streaming)
 
     named_output (Optional[str]): Give the output of this rule a name so it can be used by another rule as a named input. Optional.
         When not set, the result of this rule will be available as the main output.
@@ -114,6 +116,20 @@ class BaseRule:
         """
         return True
 
+    def is_streamable(self) -> bool:
+        """ Returns True if the rule can be applied in a streaming plan, False otherwise.
+
+        By default, it returns False. It should be overriden to return True for those rules which
+        operate on each row independently (e.g. adding a new column or filtering rows), such that
+        applying the rule to batches of rows and concatenating the results is the same as applying
+        it to the whole dataframe. Rules which need all the rows (e.g. sort, aggregate, dedupe, joins)
+        must not be streamable.
+
+        Reader and writer rules returning True must also implement iter_batches and write_batches
+        respectively.
+        """
+        return False
+
     def has_named_output(self) -> bool:
         return bool(self.named_output)
 
@@ -162,6 +162,27 @@ def test_write_sql_table_scenarios(input_df, input_astypes, sql_table, if_exists
             assert False
 
 
+
+@pytest.mark.skipif(not HAS_SQL_ALCHEMY, reason="sqlalchemy not installed.")
+def test_write_sql_table_batches(sqlite3_db, backend):
+    if backend.name == "dask":
+        pytest.skip("dask doesn't write in batches.")
+    dfs = [
+        backend.DataFrame([{"Id": 10, "FirstName": "Joe", "LastName": "Doe"}], astype={"Id": "Int64"}),
+        backend.DataFrame([{"Id": 11, "FirstName": "Craig", "LastName": "David"}], astype={"Id": "Int64"}),
+    ]
+    rule = backend.rules.WriteSQLTableRule(f"sqlite:///{sqlite3_db}", "Author", if_exists="replace")
+    assert rule.is_streamable()
+    rule.write_batches(iter(dfs))
+    engine = SQLAlchemyEngines.get_engine(f"sqlite:///{sqlite3_db}")
+    with engine.connect() as connection:
+        res = connection.execute(sa.text("SELECT * FROM Author"))
+        actual = [dict(zip(res.keys(), row)) for row in res]
+    assert actual == [
+        {"Id": 10, "FirstName": "Joe", "LastName": "Doe"},
+        {"Id": 11, "FirstName": "Craig", "LastName": "David"},
+    ]
+
 def test_sql_engine_env_substitution(backend):
     user = os.environ.get("DB_USER")
     pswd = os.environ.get("DB_PASSWORD")
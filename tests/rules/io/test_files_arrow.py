@@ -0,0 +1,84 @@
+import datetime
+import pytest
+
+from etlrules.data import RuleData, context
+from etlrules.engine import RuleEngine
+from etlrules.exceptions import MissingColumnError
+from etlrules.plan import Plan
+from etlrules.backends.common.io.files import WriteArrowFileRule
+from tests.utils.data import assert_frame_equal, get_test_data, read_incremental_twice
+
+
+TEST_DF = [
+    {"A": 1, "B": True, "C": "c1", "D": datetime.datetime(2023, 5, 23, 10, 30, 45)},
+    {"A": 2, "B": False, "C": "c2", "D": datetime.datetime(2023, 5, 24, 11, 30, 45)},
+    {"A": 3, "B": True, "C": "c3", "D": datetime.datetime(2023, 5, 25, 12, 30, 45)},
+    {"B": False, "D": datetime.datetime(2023, 5, 26, 13, 30, 45)},
+    {"A": 4, "C": "c4"},
+    {}
+]
+
+
+@pytest.mark.parametrize("compression,memory_map", [
+    [None, True],
+    [None, False],
+] + [[compression, True] for compression in WriteArrowFileRule.COMPRESSIONS])
+def test_write_read_arrow_file(compression, memory_map, tmp_path, backend):
+    test_df = backend.DataFrame(data=TEST_DF, astype={"A": "Int64", "B": "boolean"})
+    with get_test_data(test_df, named_inputs={"input": test_df}, named_output="result") as data:
+        write_rule = backend.rules.WriteArrowFileRule(file_name="tst.arrow", file_dir=str(tmp_path), compression=compression, named_input="input")
+        write_rule.apply(data)
+        read_rule = backend.rules.ReadArrowFileRule(file_name="tst.arrow", file_dir=str(tmp_path), memory_map=memory_map, named_output="result")
+        read_rule.apply(data)
+        read_rule = backend.rules.ReadArrowFileRule(file_name="tst.arrow", file_dir=str(tmp_path), columns=["A", "C"], memory_map=memory_map, named_output="result2")
+        read_rule.apply(data)
+        assert_frame_equal(data.get_named_output("result"), test_df)
+        assert_frame_equal(data.get_named_output("result2"), test_df[["A", "C"]])
+
+
+def test_read_arrow_files_regex_context(tmp_path, backend):
+    test_df = backend.DataFrame(data=TEST_DF, astype={"A": "Int64", "B": "boolean"})
+    with context.set({"dir": str(tmp_path)}):
+        for idx in range(3):
+            with get_test_data(test_df, named_inputs={"input": test_df}) as data:
+                backend.rules.WriteArrowFileRule(file_name=f"tst_{idx}.arrow", file_dir="{context.dir}", named_input="input").apply(data)
+        with get_test_data(named_output="result") as data:
+            read_rule = backend.rules.ReadArrowFileRule(file_name="tst_[0-9].arrow", file_dir="{context.dir}", regex=True, named_output="result")
+            read_rule.apply(data)
+            expected = backend.DataFrame(data=TEST_DF * 3, astype={"A": "Int64", "B": "boolean"})
+            assert_frame_equal(data.get_named_output("result"), expected)
+
+
+def test_read_arrow_file_missing_columns(tmp_path, backend):
+    test_df = backend.DataFrame(data=TEST_DF, astype={"A": "Int64", "B": "boolean"})
+    with get_test_data(test_df, named_inputs={"input": test_df}, named_output="result") as data:
+        backend.rules.WriteArrowFileRule(file_name="tst.arrow", file_dir=str(tmp_path), named_input="input").apply(data)
+        with pytest.raises(MissingColumnError):
+            read_rule = backend.rules.ReadArrowFileRule(file_name="tst.arrow", file_dir=str(tmp_path), columns=["A", "E"], named_output="result")
+            read_rule.apply(data)
+
+
+def test_read_write_arrow_file_streaming(tmp_path, backend):
+    if backend.name == "dask":
+        pytest.skip("dask doesn't run in streaming mode.")
+    test_df = backend.DataFrame(data=TEST_DF, astype={"A": "Int64", "B": "boolean"})
+    backend.rules.WriteArrowFileRule(file_name="input.arrow", file_dir=str(tmp_path)).apply(RuleData(test_df))
+    plan = Plan()
+    plan.add_rule(backend.rules.ReadArrowFileRule(file_name="input.arrow", file_dir=str(tmp_path)))
+    plan.add_rule(backend.rules.ProjectRule(["A", "C"]))
+    plan.add_rule(backend.rules.WriteArrowFileRule(file_name="output.arrow", file_dir=str(tmp_path), compression="zstd"))
+    RuleEngine(plan).run_streaming(RuleData(), batch_size=4)
+    data = RuleData()
+    backend.rules.ReadArrowFileRule(file_name="output.arrow", file_dir=str(tmp_path)).apply(data)
+    assert_frame_equal(data.get_main_output(), test_df[["A", "C"]])
+
+
+def test_read_arrow_files_incremental_no_new_files(tmp_path, monkeypatch, backend):
+    test_df = backend.DataFrame(data=TEST_DF, astype={"A": "Int64", "B": "boolean"})
+    with get_test_data(test_df, named_inputs={"input": test_df}) as data:
+        backend.rules.WriteArrowFileRule(file_name="data1.arrow", file_dir=str(tmp_path), named_input="input").apply(data)
+    rule = backend.rules.ReadArrowFileRule("data[0-9]+.arrow", str(tmp_path), regex=True, manifest_file=str(tmp_path / "manifest.json"))
+    first, second = read_incremental_twice(backend, rule, monkeypatch)
+    assert len(first) == len(TEST_DF)
+    # the columns and types come from the schema of the file
+    assert_frame_equal(second, first.head(0))
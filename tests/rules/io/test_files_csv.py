@@ -1,9 +1,25 @@
+import bz2
 import datetime
+import functools
+import gzip
+import json
+import lzma
 import os
+import pyarrow as pa
 import pytest
+import zipfile
+import zlib
 
 from etlrules.backends.common.io.files import WriteCSVFileRule
-from tests.utils.data import assert_frame_equal, get_test_data
+from etlrules.backends.common.io import compression as compression_module, http_download
+from etlrules.backends.common.io.csv_schema import clear_csv_schema_cache_stats, get_csv_schema_cache_stats
+from etlrules.backends.common.io.http_cache import clear_http_cache_stats, get_http_cache_stats
+from etlrules.data import RuleData
+from etlrules.engine import RuleEngine
+from etlrules.exceptions import MissingColumnError, UnsupportedTypeError
+from etlrules.plan import Plan
+from tests.utils.data import assert_frame_equal, get_test_data, read_incremental_twice
+from tests.utils.http import QuietHandler, range_handler, serve_http
 
 
 TEST_DF = [
@@ -21,6 +37,9 @@ TEST_DF = [
     list(WriteCSVFileRule.COMPRESSIONS)
 )
 def test_write_read_csv_file(compression, backend):
+    if compression == "zstd" and backend.name == "dask":
+        # reading zstd files needs the zstandard package
+        pytest.importorskip("zstandard")
     extension = WriteCSVFileRule.COMPRESSIONS[compression] if compression else ""
     test_df = backend.DataFrame(data=TEST_DF)
     try:
@@ -36,6 +55,29 @@ def test_write_read_csv_file(compression, backend):
         os.remove(os.path.join("/tmp", "tst.csv" + extension))
 
 
+@pytest.mark.parametrize("compression,open_func", [
+    ["gzip", gzip.open],
+    ["bz2", bz2.open],
+    ["xz", lzma.open],
+])
+def test_write_read_csv_file_compression_format(compression, open_func, tmp_path, backend):
+    file_name = "tst.csv" + WriteCSVFileRule.COMPRESSIONS[compression]
+    test_df = backend.DataFrame(data=[{"A": 1, "B": "b1"}, {"A": 2, "B": "b2"}])
+    with get_test_data(test_df, named_inputs={"input": test_df}, named_output="result") as data:
+        backend.rules.WriteCSVFileRule(file_name=file_name, file_dir=str(tmp_path), compression=compression, named_input="input").apply(data)
+        with open_func(tmp_path / file_name, "rt") as f:
+            assert f.read().splitlines() == ["A,B", "1,b1", "2,b2"]
+        file_names = [file_name]
+        if backend.name == "polars":
+            # the files written as zip archives (regardless of the extension) by previous versions are still read
+            with zipfile.ZipFile(tmp_path / ("old_" + file_name), "w") as zarch:
+                zarch.writestr("old_tst.csv", "A,B\n1,b1\n2,b2\n")
+            file_names.append("old_" + file_name)
+        for idx, fname in enumerate(file_names):
+            backend.rules.ReadCSVFileRule(file_name=fname, file_dir=str(tmp_path), named_output=f"result{idx}").apply(data)
+            assert_frame_equal(data.get_named_output(f"result{idx}"), test_df)
+
+
 @pytest.mark.parametrize("separator,skip_header_rows", [
     [",", None],
     ["|", None],
@@ -98,9 +140,578 @@ def test_read_csv_file_via_http(backend):
         assert_frame_equal(actual, expected)
 
 
+def _read_http_csv(backend, url):
+    with get_test_data(None, named_inputs={}, named_output="result") as data:
+        backend.rules.ReadCSVFileRule(file_name=url, named_output="result").apply(data)
+        result = data.get_named_output("result")
+        return list((result.compute() if backend.name == "dask" else result)["A"])
+
+
+@pytest.mark.parametrize("file_name", ["data.csv", "data.csv.gz"])
+def test_read_csv_file_via_http_cache_last_modified(file_name, tmp_path, monkeypatch, backend):
+    monkeypatch.setenv("ETLRULES_HTTP_CACHE_DIR", str(tmp_path / "cache"))
+    (tmp_path / "www").mkdir()
+    file_path = tmp_path / "www" / file_name
+
+    def write_file(content, mtime):
+        with (gzip.open if file_name.endswith(".gz") else open)(file_path, "wt") as f:
+            f.write(content)
+        os.utime(file_path, (mtime, mtime))
+
+    write_file("A,B\n1,a\n2,b\n", 1700000000)
+    clear_http_cache_stats()
+    with serve_http(functools.partial(QuietHandler, directory=str(tmp_path / "www"))) as base_url:
+        url = f"{base_url}/{file_name}"
+        assert _read_http_csv(backend, url) == [1, 2]
+        assert _read_http_csv(backend, url) == [1, 2]
+        assert get_http_cache_stats()["downloads"] == 1
+        assert get_http_cache_stats()["not_modified"] == 1
+        write_file("A,B\n3,c\n", 1700000100)
+        assert _read_http_csv(backend, url) == [3]
+        assert get_http_cache_stats()["downloads"] == 2
+
+
+def test_read_csv_file_via_http_cache_etag(tmp_path, monkeypatch, backend):
+    monkeypatch.setenv("ETLRULES_HTTP_CACHE_DIR", str(tmp_path / "cache"))
+    files = {"content": b"A,B\n1,a\n", "etag": '"v1"'}
+    requests = []
+
+    class ETagHandler(QuietHandler):
+        def do_GET(self):
+            requests.append(self.headers.get("If-None-Match"))
+            if self.headers.get("If-None-Match") == files["etag"]:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", files["etag"])
+            self.send_header("Content-Length", str(len(files["content"])))
+            self.end_headers()
+            self.wfile.write(files["content"])
+
+    with serve_http(ETagHandler) as base_url:
+        url = f"{base_url}/data.csv"
+        assert _read_http_csv(backend, url) == [1]
+        assert _read_http_csv(backend, url) == [1]
+        files.update(content=b"A,B\n2,b\n", etag='"v2"')
+        assert _read_http_csv(backend, url) == [2]
+    assert requests == [None, '"v1"', '"v1"']
+
+
+@pytest.mark.parametrize("ranges", [True, False])
+def test_read_csv_file_via_http_ranges(ranges, tmp_path, monkeypatch, backend):
+    if backend.name == "dask":
+        pytest.skip("dask reads the URIs lazily, via fsspec")
+    monkeypatch.setattr(http_download, "RANGE_SIZE", 1000)
+    (tmp_path / "data.csv").write_text("A,B\n" + "".join(f"{idx},b{idx}\n" for idx in range(1000)))
+    served = []
+    handler = range_handler(str(tmp_path), served) if ranges else functools.partial(QuietHandler, directory=str(tmp_path))
+    with serve_http(handler) as base_url:
+        assert _read_http_csv(backend, f"{base_url}/data.csv") == list(range(1000))
+    if ranges:
+        # downloaded in ranges of 1000 bytes
+        file_size = os.path.getsize(tmp_path / "data.csv")
+        assert len(served) == (file_size + 999) // 1000
+        assert sum(served) == file_size
+
+
+def test_read_csv_file_via_http_ranges_weak_etag(tmp_path, monkeypatch, backend):
+    if backend.name == "dask":
+        pytest.skip("dask reads the URIs lazily, via fsspec")
+    monkeypatch.setattr(http_download, "RANGE_SIZE", 1000)
+    (tmp_path / "data.csv").write_text("A,B\n" + "".join(f"{idx},b{idx}\n" for idx in range(1000)))
+    served = []
+    with serve_http(range_handler(str(tmp_path), served, weak_etag=True)) as base_url:
+        assert _read_http_csv(backend, f"{base_url}/data.csv") == list(range(1000))
+    # the ranges are validated by Last-Modified
+    file_size = os.path.getsize(tmp_path / "data.csv")
+    assert len(served) == (file_size + 999) // 1000
+    assert sum(served) == file_size
+
+
+def test_read_csv_file_via_http_ranges_unknown_size(tmp_path, monkeypatch, backend):
+    if backend.name == "dask":
+        pytest.skip("dask reads the URIs lazily, via fsspec")
+    monkeypatch.setattr(http_download, "RANGE_SIZE", 1000)
+    (tmp_path / "data.csv").write_text("A,B\n" + "".join(f"{idx},b{idx}\n" for idx in range(1000)))
+    served = []
+    with serve_http(range_handler(str(tmp_path), served, unknown_size=True)) as base_url:
+        assert _read_http_csv(backend, f"{base_url}/data.csv") == list(range(1000))
+    # the first range, then the whole file
+    assert served == [1000, os.path.getsize(tmp_path / "data.csv")]
+
+
 def test_read_csv_file_via_http_regex(backend):
     url = "https://raw.githubusercontent.com/ciprianmiclaus/etlrules/main/examples/csv2db/.*.csv"
     with get_test_data(None, named_inputs={}, named_output="result") as data:
         with pytest.raises(ValueError) as exc:
             backend.rules.ReadCSVFileRule(file_name=url, regex=True, header=False, named_output="result")
         assert str(exc.value) == "Regex read not supported for URIs."
+
+
+@pytest.mark.parametrize("max_workers", [None, 1, 3])
+def test_read_csv_files_regex(max_workers, tmp_path, backend):
+    for idx in range(5):
+        (tmp_path / f"data{idx}.csv").write_text(f"A,B\n{idx * 2},b{idx * 2}\n{idx * 2 + 1},b{idx * 2 + 1}\n")
+    (tmp_path / "other.csv").write_text("A,B\n100,other\n")
+    with get_test_data(None, named_inputs={}, named_output="result") as data:
+        read_rule = backend.rules.ReadCSVFileRule(file_name=r"data[0-9]\.csv", file_dir=str(tmp_path), regex=True, max_workers=max_workers, named_output="result")
+        read_rule.apply(data)
+        actual = data.get_named_output("result")
+        expected = backend.DataFrame(data={"A": list(range(10)), "B": [f"b{idx}" for idx in range(10)]})
+        assert_frame_equal(actual, expected)
+
+
+def test_read_csv_files_regex_no_files(tmp_path, backend):
+    with get_test_data(None, named_inputs={}, named_output="result") as data:
+        read_rule = backend.rules.ReadCSVFileRule(file_name=r"data[0-9]\.csv", file_dir=str(tmp_path), regex=True, named_output="result")
+        with pytest.raises(IOError):
+            read_rule.apply(data)
+
+
+@pytest.mark.parametrize("use_pyarrow,skip_header_rows", [
+    [False, None],
+    [False, 2],
+    [True, None],
+    [True, 2],
+])
+def test_read_csv_file_column_types(use_pyarrow, skip_header_rows, tmp_path, backend):
+    with open(tmp_path / "tst.csv", "wt") as f:
+        for x in range(skip_header_rows or 0):
+            f.write(f"skipped line {x}\n")
+        f.write("A,B,C,D,E\n1,b1,05/01/2023,1.5,2023-01-05 10:30:00\n,2,06/02/2023,,2023-02-06 11:30:00\n")
+    with get_test_data(named_output="result") as data:
+        read_rule = backend.rules.ReadCSVFileRule(
+            file_name="tst.csv", file_dir=str(tmp_path), skip_header_rows=skip_header_rows,
+            column_types={"A": "int32", "B": "string", "D": "float64"}, date_formats={"C": "%d/%m/%Y", "E": None},
+            use_pyarrow=use_pyarrow, named_output="result")
+        read_rule.apply(data)
+        result = data.get_named_output("result")
+        expected = backend.DataFrame(data=[
+            {"A": 1, "B": "b1", "C": datetime.datetime(2023, 1, 5), "D": 1.5, "E": datetime.datetime(2023, 1, 5, 10, 30)},
+            {"B": "2", "C": datetime.datetime(2023, 2, 6), "E": datetime.datetime(2023, 2, 6, 11, 30)},
+        ], astype={"A": "Int32", "B": "string", "C": "datetime", "D": "Float64", "E": "datetime"})
+        assert_frame_equal(result, expected)
+
+
+def test_read_csv_file_column_types_errors(backend):
+    with pytest.raises(UnsupportedTypeError) as exc:
+        backend.rules.ReadCSVFileRule(file_name="tst.csv", column_types={"A": "int128"})
+    assert "Type 'int128' for column 'A' is not supported." in str(exc.value)
+    with pytest.raises(ValueError) as exc:
+        backend.rules.ReadCSVFileRule(file_name="tst.csv", column_types={"A": "string"}, date_formats={"A": "%Y-%m-%d"})
+    assert "Column 'A' cannot be specified in both column_types and date_formats." in str(exc.value)
+
+
+@pytest.mark.parametrize("use_pyarrow,skip_header_rows,regex", [
+    [False, None, False],
+    [False, 2, False],
+    [True, None, False],
+    [True, 2, False],
+    [False, None, True],
+])
+def test_read_csv_file_blocksize(use_pyarrow, skip_header_rows, regex, tmp_path, backend):
+    file_names = ["data0.csv", "data1.csv"] if regex else ["data0.csv"]
+    for idx, file_name in enumerate(file_names):
+        with open(tmp_path / file_name, "wt") as f:
+            for x in range(skip_header_rows or 0):
+                f.write(f"skipped line {x}\n")
+            f.write("A,B\n")
+            for val in range(idx * 1000, (idx + 1) * 1000):
+                f.write(f"{val},b{val}\n")
+    with get_test_data(named_output="result") as data:
+        read_rule = backend.rules.ReadCSVFileRule(
+            file_name="data[0-9].csv" if regex else "data0.csv", file_dir=str(tmp_path), regex=regex,
+            skip_header_rows=skip_header_rows, use_pyarrow=use_pyarrow, blocksize=2000, named_output="result")
+        read_rule.apply(data)
+        result = data.get_named_output("result")
+        if backend.name == "dask":
+            # ~8KB per file split into blocks of 2000 bytes
+            assert result.npartitions >= 4 * len(file_names)
+            result = result.compute().reset_index(drop=True)
+        values = list(range(len(file_names) * 1000))
+        assert list(result["A"]) == values
+        assert list(result["B"]) == [f"b{val}" for val in values]
+
+
+@pytest.mark.parametrize("blocksize", [0, -1, 1.5])
+def test_read_csv_file_blocksize_invalid(blocksize, backend):
+    with pytest.raises(ValueError) as exc:
+        backend.rules.ReadCSVFileRule(file_name="tst.csv", blocksize=blocksize)
+    assert f"Invalid blocksize {blocksize!r}" in str(exc.value)
+
+
+def _run_incremental_plan(backend, file_dir, manifest_file, manifest_hash=False, fail=False):
+    plan = Plan()
+    plan.add_rule(backend.rules.ReadCSVFileRule(
+        "data[0-9]+.csv", str(file_dir), regex=True, manifest_file=manifest_file, manifest_hash=manifest_hash))
+    if fail:
+        plan.add_rule(backend.rules.ProjectRule(["UNKNOWN"]))
+    data = RuleData()
+    RuleEngine(plan).run(data)
+    result = data.get_main_output()
+    result = result.compute() if backend.name == "dask" else result
+    return sorted(result["A"]), list(result.columns)
+
+
+def test_read_csv_files_incremental(tmp_path, backend):
+    (tmp_path / "data1.csv").write_text("A,B\n1,a\n2,b\n")
+    (tmp_path / "data2.csv").write_text("A,B\n3,c\n")
+    manifest_file = str(tmp_path / "state" / "manifest.json")
+    assert _run_incremental_plan(backend, tmp_path, manifest_file) == ([1, 2, 3], ["A", "B"])
+    assert os.path.exists(manifest_file)
+    # no new files, the result is empty but it keeps the columns
+    assert _run_incremental_plan(backend, tmp_path, manifest_file) == ([], ["A", "B"])
+
+    (tmp_path / "data1.csv").write_text("A,B\n1,a\n2,b\n5,e\n")
+    (tmp_path / "data3.csv").write_text("A,B\n4,d\n")
+    with pytest.raises(MissingColumnError):
+        _run_incremental_plan(backend, tmp_path, manifest_file, fail=True)
+    # the manifest is not updated by the failed run
+    assert _run_incremental_plan(backend, tmp_path, manifest_file) == ([1, 2, 4, 5], ["A", "B"])
+    assert _run_incremental_plan(backend, tmp_path, manifest_file) == ([], ["A", "B"])
+
+
+def test_read_csv_files_incremental_no_new_files(tmp_path, monkeypatch, backend):
+    (tmp_path / "data1.csv").write_text("A,B,C\n" + "".join(f"{idx},b{idx},{idx}.5\n" for idx in range(5000)))
+    rule = backend.rules.ReadCSVFileRule("data[0-9]+.csv", str(tmp_path), regex=True, manifest_file=str(tmp_path / "manifest.json"))
+    first, second = read_incremental_twice(backend, rule, monkeypatch)
+    assert len(first) == 5000
+    # the columns and types are inferred from the start of the file
+    assert_frame_equal(second, first.head(0))
+
+
+def test_read_csv_files_regex_no_match(tmp_path, backend):
+    (tmp_path / "other.csv").write_text("A,B\n1,a\n")
+    with get_test_data(None, named_inputs={}, named_output="result") as data:
+        read_rule = backend.rules.ReadCSVFileRule(file_name=r"data[0-9]\.csv", file_dir=str(tmp_path), regex=True, named_output="result")
+        with pytest.raises(IOError) as exc:
+            read_rule.apply(data)
+    assert "No files matching" in str(exc.value)
+
+
+@pytest.mark.parametrize("manifest_hash,expected", [
+    [False, [1, 2]],
+    [True, []],
+])
+def test_read_csv_files_incremental_touched(manifest_hash, expected, tmp_path, backend):
+    (tmp_path / "data1.csv").write_text("A,B\n1,a\n2,b\n")
+    manifest_file = str(tmp_path / "manifest.json")
+    assert _run_incremental_plan(backend, tmp_path, manifest_file, manifest_hash)[0] == [1, 2]
+    stat = os.stat(tmp_path / "data1.csv")
+    os.utime(tmp_path / "data1.csv", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert _run_incremental_plan(backend, tmp_path, manifest_file, manifest_hash)[0] == expected
+
+
+def test_read_csv_files_incremental_streaming(tmp_path, backend):
+    if backend.name == "dask":
+        pytest.skip("dask doesn't support the streaming mode")
+    (tmp_path / "data1.csv").write_text("A,B\n1,a\n2,b\n")
+    manifest_file = str(tmp_path / "manifest.json")
+    for idx, expected in enumerate([[1, 2], []]):
+        plan = Plan()
+        plan.add_rule(backend.rules.ReadCSVFileRule("data[0-9]+.csv", str(tmp_path), regex=True, manifest_file=manifest_file))
+        plan.add_rule(backend.rules.WriteCSVFileRule(f"out{idx}.csv", str(tmp_path)))
+        RuleEngine(plan).run_streaming(RuleData())
+        lines = (tmp_path / f"out{idx}.csv").read_text().splitlines()
+        assert lines[1:] == [f"{val},{chr(ord('a') + val - 1)}" for val in expected]
+
+
+def _read_csv_schema_cache(backend, file_dir, schema_cache_file, **kwargs):
+    data = RuleData()
+    backend.rules.ReadCSVFileRule("data[0-9]+.csv", str(file_dir), regex=True, schema_cache_file=schema_cache_file, **kwargs).apply(data)
+    result = data.get_main_output()
+    return result.compute().reset_index(drop=True) if backend.name == "dask" else result
+
+
+@pytest.mark.parametrize("use_pyarrow", [False, True])
+def test_read_csv_file_schema_cache(use_pyarrow, tmp_path, backend):
+    (tmp_path / "data1.csv").write_text("A,B,C,D\n1,1.5,x,2023-05-01\n2,,y,2023-05-02\n")
+    schema_cache_file = str(tmp_path / "state" / "schemas.json")
+    clear_csv_schema_cache_stats()
+    first = _read_csv_schema_cache(backend, tmp_path, schema_cache_file, date_formats={"D": "%Y-%m-%d"}, use_pyarrow=use_pyarrow)
+    assert get_csv_schema_cache_stats() == {"hits": 0, "misses": 1, "mismatches": 0}
+    with open(schema_cache_file) as f:
+        schemas = list(json.load(f)["schemas"].values())
+    # the columns with dates are not cached
+    assert schemas == [{
+        "file_pattern": os.path.join(str(tmp_path), "data[0-9]+.csv"), "header": "A,B,C,D",
+        "column_types": {"A": "int64", "B": "float64", "C": "string"},
+    }]
+    second = _read_csv_schema_cache(backend, tmp_path, schema_cache_file, date_formats={"D": "%Y-%m-%d"}, use_pyarrow=use_pyarrow)
+    assert get_csv_schema_cache_stats() == {"hits": 1, "misses": 1, "mismatches": 0}
+    # the same types on the first read (inferred) and the next reads (cached)
+    assert_frame_equal(first, second)
+    if backend.name != "polars":
+        # the numpy types inferred by pandas, not converted to the nullable types
+        assert [str(second[col].dtype) for col in ["A", "B"]] == ["int64", "float64"]
+    assert list(second["A"]) == [1, 2]
+    assert list(second["C"]) == ["x", "y"]
+
+
+def test_read_csv_file_schema_cache_mismatch(tmp_path, backend):
+    (tmp_path / "data1.csv").write_text("A,B\n1,x\n2,y\n")
+    schema_cache_file = str(tmp_path / "schemas.json")
+    clear_csv_schema_cache_stats()
+    _read_csv_schema_cache(backend, tmp_path, schema_cache_file)
+    (tmp_path / "data1.csv").write_text("A,B\n1,x\nabc,y\n")
+    result = _read_csv_schema_cache(backend, tmp_path, schema_cache_file)
+    assert get_csv_schema_cache_stats() == {"hits": 0, "misses": 1, "mismatches": 1}
+    assert list(result["A"]) == ["1", "abc"]
+    with open(schema_cache_file) as f:
+        schemas = list(json.load(f)["schemas"].values())
+    # refreshed with the types inferred again
+    assert [schema["column_types"] for schema in schemas] == [{"A": "string", "B": "string"}]
+    _read_csv_schema_cache(backend, tmp_path, schema_cache_file)
+    assert get_csv_schema_cache_stats() == {"hits": 1, "misses": 1, "mismatches": 1}
+
+
+def test_read_csv_file_schema_cache_header_changed(tmp_path, backend):
+    (tmp_path / "data1.csv").write_text("A,B\n1,x\n")
+    schema_cache_file = str(tmp_path / "schemas.json")
+    clear_csv_schema_cache_stats()
+    _read_csv_schema_cache(backend, tmp_path, schema_cache_file, column_types={"B": "string"})
+    (tmp_path / "data1.csv").write_text("A,B,C\n1,x,1.5\n")
+    result = _read_csv_schema_cache(backend, tmp_path, schema_cache_file, column_types={"B": "string"})
+    assert get_csv_schema_cache_stats() == {"hits": 0, "misses": 2, "mismatches": 0}
+    assert list(result.columns) == ["A", "B", "C"]
+    with open(schema_cache_file) as f:
+        schemas = json.load(f)["schemas"].values()
+    # the columns with explicit types are not cached
+    assert sorted((schema["header"], schema["column_types"]) for schema in schemas) == [
+        ("A,B", {"A": "int64"}),
+        ("A,B,C", {"A": "int64", "C": "float64"}),
+    ]
+
+
+def _run_streaming_schema_cache(backend, tmp_path, schema_cache_file, out_file_name):
+    plan = Plan()
+    plan.add_rule(backend.rules.ReadCSVFileRule("data1.csv", str(tmp_path), schema_cache_file=schema_cache_file))
+    plan.add_rule(backend.rules.WriteCSVFileRule(out_file_name, str(tmp_path)))
+    RuleEngine(plan).run_streaming(RuleData(), batch_size=3)
+    return (tmp_path / out_file_name).read_text().splitlines()
+
+
+def test_read_csv_file_schema_cache_streaming(tmp_path, backend):
+    if backend.name == "dask":
+        pytest.skip("dask doesn't support the streaming mode")
+    # the column B has missing values in the first batch only
+    (tmp_path / "data1.csv").write_text("A,B\n" + "".join(f"{idx},{idx if idx > 2 else ''}\n" for idx in range(10)))
+    schema_cache_file = str(tmp_path / "schemas.json")
+    clear_csv_schema_cache_stats()
+    out0 = _run_streaming_schema_cache(backend, tmp_path, schema_cache_file, "out0.csv")
+    out1 = _run_streaming_schema_cache(backend, tmp_path, schema_cache_file, "out1.csv")
+    assert get_csv_schema_cache_stats() == {"hits": 1, "misses": 1, "mismatches": 0}
+    with open(schema_cache_file) as f:
+        schemas = list(json.load(f)["schemas"].values())
+    # pandas infers the types of each batch (B float64 then int64), widened to float64 in the cache
+    # polars infers the types once, from the first rows of the file
+    b_type = "float64" if backend.name == "pandas" else "int64"
+    assert [schema["column_types"] for schema in schemas] == [{"A": "int64", "B": b_type}]
+    assert out0[3:5] == ["2,", "3,3"]
+    assert out1[3:5] == ["2,", "3,3.0" if backend.name == "pandas" else "3,3"]
+
+
+def test_read_csv_file_schema_cache_streaming_types_changed(tmp_path, backend):
+    if backend.name == "dask":
+        pytest.skip("dask doesn't support the streaming mode")
+    # the column A has integers in the first batch and text in a later batch
+    (tmp_path / "data1.csv").write_text("A,B\n1,x\n2,y\n3,z\nabc,w\n")
+    schema_cache_file = str(tmp_path / "schemas.json")
+    clear_csv_schema_cache_stats()
+    out0 = _run_streaming_schema_cache(backend, tmp_path, schema_cache_file, "out0.csv")
+    assert out0 == ["A,B", "1,x", "2,y", "3,z", "abc,w"]
+    with open(schema_cache_file) as f:
+        schemas = list(json.load(f)["schemas"].values())
+    assert [schema["column_types"] for schema in schemas] == [{"A": "string", "B": "string"}]
+    out1 = _run_streaming_schema_cache(backend, tmp_path, schema_cache_file, "out1.csv")
+    assert get_csv_schema_cache_stats() == {"hits": 1, "misses": 1, "mismatches": 0}
+    assert out1 == out0
+
+
+def test_read_csv_file_schema_cache_streaming_not_finished(tmp_path, backend):
+    if backend.name == "dask":
+        pytest.skip("dask doesn't support the streaming mode")
+    (tmp_path / "data1.csv").write_text("A,B\n" + "".join(f"{idx},b{idx}\n" for idx in range(10)))
+    schema_cache_file = str(tmp_path / "schemas.json")
+    rule = backend.rules.ReadCSVFileRule("data1.csv", str(tmp_path), schema_cache_file=schema_cache_file)
+    batches = rule.do_read_batches(str(tmp_path / "data1.csv"), 3)
+    next(batches)
+    batches.close()
+    # the types are only cached once the whole file is read
+    assert not os.path.exists(schema_cache_file)
+    list(rule.do_read_batches(str(tmp_path / "data1.csv"), 3))
+    assert os.path.exists(schema_cache_file)
+
+
+def test_read_csv_file_schema_cache_errors(backend):
+    with pytest.raises(ValueError) as exc:
+        backend.rules.ReadCSVFileRule(file_name="https://example.com/tst.csv", schema_cache_file="schemas.json")
+    assert "not supported for URIs" in str(exc.value)
+    with pytest.raises(ValueError) as exc:
+        backend.rules.ReadCSVFileRule(file_name="tst.csv", header=False, schema_cache_file="schemas.json")
+    assert "requires a header" in str(exc.value)
+
+
+def _open_zstd(path, mode):
+    if "r" in mode:
+        return pa.CompressedInputStream(pa.OSFile(str(path)), "zstd")
+    return pa.CompressedOutputStream(str(path), "zstd")
+
+
+@pytest.mark.parametrize("compression,open_func", [
+    ["gzip", gzip.open],
+    ["bz2", bz2.open],
+    ["xz", lzma.open],
+    ["zstd", _open_zstd],
+])
+def test_read_write_csv_file_compressed_streaming(compression, open_func, tmp_path, backend):
+    if backend.name == "dask":
+        pytest.skip("dask doesn't support the streaming mode")
+    extension = WriteCSVFileRule.COMPRESSIONS[compression]
+    lines = ["A,B"] + [f"{idx},b{idx}" for idx in range(1000)]
+    with open_func(tmp_path / f"in.csv{extension}", "wb") as f:
+        f.write(("\n".join(lines) + "\n").encode("utf-8"))
+    plan = Plan()
+    plan.add_rule(backend.rules.ReadCSVFileRule(f"in.csv{extension}", str(tmp_path)))
+    plan.add_rule(backend.rules.WriteCSVFileRule(f"out.csv{extension}", str(tmp_path), compression=compression))
+    RuleEngine(plan).run_streaming(RuleData(), batch_size=100)
+    with open_func(tmp_path / f"out.csv{extension}", "rb") as f:
+        assert f.read().decode("utf-8").splitlines() == lines
+
+
+def _count_gzip_members(file_path):
+    with open(file_path, "rb") as f:
+        data = f.read()
+    members = 0
+    while data:
+        decompressor = zlib.decompressobj(31)
+        decompressor.decompress(data)
+        data = decompressor.unused_data
+        members += 1
+    return members
+
+
+@pytest.mark.parametrize("compression,open_func", [
+    ["gzip", gzip.open],
+    ["bz2", bz2.open],
+    ["xz", lzma.open],
+    ["zstd", _open_zstd],
+])
+@pytest.mark.parametrize("max_workers", [None, 1, 4])
+def test_write_csv_file_parallel_compression(compression, open_func, max_workers, tmp_path, monkeypatch, backend):
+    # small blocks to compress the file in multiple blocks
+    monkeypatch.setattr(compression_module, "COMPRESS_BLOCK_SIZE", 1000)
+    extension = WriteCSVFileRule.COMPRESSIONS[compression]
+    num_rows = 1000 if backend.name != "dask" else 30
+    df = _get_partitioned_df(backend, num_rows)
+    with get_test_data(df, named_inputs={"input": df}) as data:
+        backend.rules.WriteCSVFileRule(f"out.csv{extension}", str(tmp_path), compression=compression, max_workers=max_workers, named_input="input").apply(data)
+    with open_func(tmp_path / f"out.csv{extension}", "rb") as f:
+        assert f.read().decode("utf-8").splitlines() == ["A,B"] + [f"{idx},b{idx}" for idx in range(num_rows)]
+    if compression == "gzip" and backend.name != "dask":
+        assert _count_gzip_members(tmp_path / f"out.csv{extension}") > 5
+
+
+def test_write_csv_file_parallel_compression_empty(tmp_path):
+    with compression_module.ParallelCompressedWriter(str(tmp_path / "empty.csv.gz"), "gzip"):
+        pass
+    with gzip.open(tmp_path / "empty.csv.gz", "rb") as f:
+        assert f.read() == b""
+
+
+@pytest.mark.parametrize("compression", [None] + list(WriteCSVFileRule.COMPRESSIONS))
+def test_write_read_csv_file_use_pyarrow(compression, tmp_path, backend):
+    if compression == "zstd" and backend.name == "dask":
+        # reading zstd files needs the zstandard package
+        pytest.importorskip("zstandard")
+    extension = WriteCSVFileRule.COMPRESSIONS[compression] if compression else ""
+    test_df = backend.DataFrame(data=TEST_DF)
+    with get_test_data(test_df, named_inputs={"input": test_df}, named_output="result") as data:
+        write_rule = backend.rules.WriteCSVFileRule(file_name="tst.csv" + extension, file_dir=str(tmp_path), compression=compression, use_pyarrow=True, named_input="input")
+        write_rule.apply(data)
+        read_rule = backend.rules.ReadCSVFileRule(file_name="tst.csv" + extension, file_dir=str(tmp_path), named_output="result")
+        read_rule.apply(data)
+        result = data.get_named_output("result")
+        result = backend.astype(result, {"D": "datetime"})
+        assert_frame_equal(result, test_df)
+
+
+def test_write_csv_file_use_pyarrow_streaming(tmp_path, backend):
+    if backend.name == "dask":
+        pytest.skip("dask doesn't support the streaming mode")
+    lines = ["A,B"] + [f"{idx},b{idx}" for idx in range(100)]
+    (tmp_path / "in.csv").write_text("\n".join(lines) + "\n")
+    plan = Plan()
+    plan.add_rule(backend.rules.ReadCSVFileRule("in.csv", str(tmp_path)))
+    plan.add_rule(backend.rules.WriteCSVFileRule("out.csv.gz", str(tmp_path), compression="gzip", use_pyarrow=True))
+    RuleEngine(plan).run_streaming(RuleData(), batch_size=30)
+    with gzip.open(tmp_path / "out.csv.gz", "rt") as f:
+        if backend.name == "polars":
+            # polars ignores use_pyarrow
+            assert f.read().splitlines() == lines
+        else:
+            # the pyarrow writer quotes the column names and the strings
+            assert f.read().splitlines() == ['"A","B"'] + [f'{idx},"b{idx}"' for idx in range(100)]
+
+
+def _get_partitioned_df(backend, num_rows=30):
+    df = backend.DataFrame(data={"A": list(range(num_rows)), "B": [f"b{idx}" for idx in range(num_rows)]})
+    if backend.name == "dask":
+        df = df.repartition(npartitions=3)
+    return df
+
+
+@pytest.mark.parametrize("compression", [None, "gzip", "zstd"])
+def test_write_csv_file_partitioned(compression, tmp_path, backend):
+    extension = WriteCSVFileRule.COMPRESSIONS[compression] if compression else ""
+    (tmp_path / "out").mkdir()
+    (tmp_path / "out" / "part-7.csv").write_text("A,B\n100,old\n")
+    (tmp_path / "out" / "other.csv").write_text("A,B\n100,other\n")
+    df = _get_partitioned_df(backend)
+    with get_test_data(df, named_inputs={"input": df}, named_output="result") as data:
+        backend.rules.WriteCSVFileRule("out", str(tmp_path), compression=compression, partitioned=True, named_input="input").apply(data)
+        num_parts = 3 if backend.name == "dask" else 1
+        assert sorted(os.listdir(tmp_path / "out")) == ["other.csv"] + [f"part-{idx}.csv{extension}" for idx in range(num_parts)]
+        if compression == "zstd" and backend.name == "dask":
+            return
+        backend.rules.ReadCSVFileRule(r"part-[0-9]+\.csv.*", str(tmp_path / "out"), regex=True, named_output="result").apply(data)
+        result = data.get_named_output("result")
+        result = result.compute() if backend.name == "dask" else result
+        assert sorted(result["A"]) == list(range(30))
+
+
+@pytest.mark.parametrize("compression,open_func", [
+    [None, open],
+    ["gzip", gzip.open],
+    ["bz2", bz2.open],
+    ["xz", lzma.open],
+    ["zstd", _open_zstd],
+])
+def test_write_csv_file_stitched_partitions(compression, open_func, tmp_path, backend):
+    extension = WriteCSVFileRule.COMPRESSIONS[compression] if compression else ""
+    df = _get_partitioned_df(backend)
+    with get_test_data(df, named_inputs={"input": df}, named_output="result") as data:
+        backend.rules.WriteCSVFileRule(f"out.csv{extension}", str(tmp_path), compression=compression, named_input="input").apply(data)
+    assert os.listdir(tmp_path) == [f"out.csv{extension}"]
+    with open_func(tmp_path / f"out.csv{extension}", "rb") as f:
+        assert f.read().decode("utf-8").splitlines() == ["A,B"] + [f"{idx},b{idx}" for idx in range(30)]
+
+
+def test_write_csv_file_partitioned_streaming(tmp_path, backend):
+    if backend.name == "dask":
+        pytest.skip("dask doesn't support the streaming mode")
+    (tmp_path / "in.csv").write_text("A,B\n" + "".join(f"{idx},b{idx}\n" for idx in range(25)))
+    plan = Plan()
+    plan.add_rule(backend.rules.ReadCSVFileRule("in.csv", str(tmp_path)))
+    plan.add_rule(backend.rules.WriteCSVFileRule("out", str(tmp_path), partitioned=True))
+    RuleEngine(plan).run_streaming(RuleData(), batch_size=10)
+    # one part per batch
+    num_parts = len(os.listdir(tmp_path / "out"))
+    assert num_parts >= 3
+    lines = []
+    for idx in range(num_parts):
+        part_lines = (tmp_path / "out" / f"part-{idx}.csv").read_text().splitlines()
+        assert part_lines[0] == "A,B"
+        lines.extend(part_lines[1:])
+    assert lines == [f"{idx},b{idx}" for idx in range(25)]
@@ -0,0 +1,171 @@
+import bz2
+import gzip
+import lzma
+import pytest
+import pyarrow as pa
+
+from etlrules.data import RuleData, context
+from etlrules.engine import RuleEngine
+from etlrules.exceptions import MissingColumnError
+from etlrules.plan import Plan
+from etlrules.backends.common.io.files import ReadJSONLinesFileRule, WriteJSONLinesFileRule
+from tests.utils.data import assert_frame_equal, get_test_data
+
+
+TEST_DF = [
+    {"A": 1, "B": True, "C": "c1", "D": 1.5},
+    {"A": 2, "B": False, "C": "c2", "D": None},
+    {"A": 3, "B": True, "C": "c3", "D": 3.5},
+    {"A": 4, "B": False, "C": None, "D": 4.5},
+]
+
+NESTED_LINES = [
+    '{"A": 1, "B": {"C": "c1", "D": {"E": 1.5}}}',
+    '{"A": 2, "B": {"C": "c2", "D": {"E": null}}}',
+    '{"A": 3, "B": {"C": null, "D": {"E": 3.5}}}',
+]
+
+
+def _open_zstd(path, mode):
+    return pa.CompressedInputStream(pa.OSFile(path, "rb"), "zstd")
+
+
+@pytest.mark.parametrize("compression", [None] + list(WriteJSONLinesFileRule.COMPRESSIONS))
+def test_write_read_jsonl_file(compression, tmp_path, backend):
+    test_df = backend.DataFrame(data=TEST_DF)
+    file_name = "tst.jsonl" + (WriteJSONLinesFileRule.COMPRESSIONS[compression] if compression else "")
+    with get_test_data(test_df, named_inputs={"input": test_df}, named_output="result") as data:
+        write_rule = backend.rules.WriteJSONLinesFileRule(file_name=file_name, file_dir=str(tmp_path), compression=compression, named_input="input")
+        write_rule.apply(data)
+        read_rule = backend.rules.ReadJSONLinesFileRule(file_name=file_name, file_dir=str(tmp_path), named_output="result")
+        read_rule.apply(data)
+        read_rule = backend.rules.ReadJSONLinesFileRule(file_name=file_name, file_dir=str(tmp_path), columns=["A", "C"], named_output="result2")
+        read_rule.apply(data)
+        assert_frame_equal(data.get_named_output("result"), test_df)
+        assert_frame_equal(data.get_named_output("result2"), test_df[["A", "C"]])
+
+
+@pytest.mark.parametrize("compression,open_func", [
+    ["gzip", gzip.open],
+    ["bz2", bz2.open],
+    ["xz", lzma.open],
+    ["zstd", _open_zstd],
+])
+def test_write_jsonl_file_compressed_format(compression, open_func, tmp_path, backend):
+    test_df = backend.DataFrame(data=TEST_DF)
+    file_name = "tst.jsonl" + WriteJSONLinesFileRule.COMPRESSIONS[compression]
+    with get_test_data(test_df, named_inputs={"input": test_df}) as data:
+        backend.rules.WriteJSONLinesFileRule(file_name=file_name, file_dir=str(tmp_path), compression=compression, named_input="input").apply(data)
+    with open_func(str(tmp_path / file_name), "rb") as f:
+        lines = f.read().decode("utf-8").splitlines()
+    assert len(lines) == len(TEST_DF)
+    assert lines[0].startswith('{"A":1,')
+
+
+def test_read_jsonl_file_column_types(tmp_path, backend):
+    (tmp_path / "tst.jsonl").write_text(
+        '{"A": 1, "B": "1", "C": null}\n'
+        '{"A": null, "B": "2", "C": null}\n'
+        '{"A": 3, "C": null}\n'
+    )
+    with get_test_data(named_output="result") as data:
+        read_rule = backend.rules.ReadJSONLinesFileRule(
+            file_name="tst.jsonl", file_dir=str(tmp_path), column_types={"C": "float64", "A": "int64", "B": "string"}, named_output="result")
+        read_rule.apply(data)
+        expected = backend.DataFrame(data=[
+            {"A": 1, "B": "1", "C": None},
+            {"A": None, "B": "2", "C": None},
+            {"A": 3, "B": None, "C": None},
+        ], astype={"A": "Int64", "B": "string", "C": "Float64"})
+        assert_frame_equal(data.get_named_output("result"), expected)
+
+
+def test_read_jsonl_file_flatten(tmp_path, backend):
+    (tmp_path / "tst.jsonl").write_text("\n".join(NESTED_LINES) + "\n")
+    with get_test_data(named_output="result") as data:
+        read_rule = backend.rules.ReadJSONLinesFileRule(file_name="tst.jsonl", file_dir=str(tmp_path), flatten=True, named_output="result")
+        read_rule.apply(data)
+        read_rule = backend.rules.ReadJSONLinesFileRule(file_name="tst.jsonl", file_dir=str(tmp_path), columns=["A", "B.D.E"], flatten=True, named_output="result2")
+        read_rule.apply(data)
+        expected = backend.DataFrame(data=[
+            {"A": 1, "B.C": "c1", "B.D.E": 1.5},
+            {"A": 2, "B.C": "c2", "B.D.E": None},
+            {"A": 3, "B.C": None, "B.D.E": 3.5},
+        ])
+        assert_frame_equal(data.get_named_output("result"), expected)
+        assert_frame_equal(data.get_named_output("result2"), expected[["A", "B.D.E"]])
+
+
+def test_read_jsonl_file_missing_columns(tmp_path, backend):
+    (tmp_path / "tst.jsonl").write_text("\n".join(NESTED_LINES) + "\n")
+    with get_test_data(named_output="result") as data:
+        with pytest.raises(MissingColumnError):
+            read_rule = backend.rules.ReadJSONLinesFileRule(file_name="tst.jsonl", file_dir=str(tmp_path), columns=["A", "B.C"], named_output="result")
+            read_rule.apply(data)
+
+
+def test_read_jsonl_files_regex_context(tmp_path, backend):
+    test_df = backend.DataFrame(data=TEST_DF)
+    with context.set({"dir": str(tmp_path)}):
+        for idx in range(3):
+            with get_test_data(test_df, named_inputs={"input": test_df}) as data:
+                backend.rules.WriteJSONLinesFileRule(file_name=f"tst_{idx}.jsonl.gz", file_dir="{context.dir}", compression="gzip", named_input="input").apply(data)
+        with get_test_data(named_output="result") as data:
+            read_rule = backend.rules.ReadJSONLinesFileRule(file_name=r"tst_[0-9]\.jsonl\.gz", file_dir="{context.dir}", regex=True, named_output="result")
+            read_rule.apply(data)
+            result = data.get_named_output("result")
+            if backend.name == "dask":
+                # one partition per file
+                assert result.npartitions == 3
+            assert_frame_equal(result, backend.DataFrame(data=TEST_DF * 3))
+
+
+def test_read_write_jsonl_file_streaming(tmp_path, backend, monkeypatch):
+    if backend.name == "dask":
+        pytest.skip("dask doesn't run in streaming mode.")
+    # small blocks to parse the file in multiple blocks, cut in the middle of the lines
+    monkeypatch.setattr(ReadJSONLinesFileRule, "BATCH_BLOCK_SIZE", 100)
+    rows = [{"A": idx, "B": idx % 2 == 0, "C": f"c{idx}", "D": None if idx < 10 else idx + 0.5} for idx in range(50)]
+    test_df = backend.DataFrame(data=rows)
+    backend.rules.WriteJSONLinesFileRule(file_name="input.jsonl.gz", file_dir=str(tmp_path), compression="gzip").apply(RuleData(test_df))
+    plan = Plan()
+    plan.add_rule(backend.rules.ReadJSONLinesFileRule(file_name="input.jsonl.gz", file_dir=str(tmp_path), column_types={"D": "float64"}))
+    plan.add_rule(backend.rules.ProjectRule(["A", "C", "D"]))
+    plan.add_rule(backend.rules.WriteJSONLinesFileRule(file_name="output.jsonl.zst", file_dir=str(tmp_path), compression="zstd"))
+    RuleEngine(plan).run_streaming(RuleData(), batch_size=7)
+    data = RuleData()
+    backend.rules.ReadJSONLinesFileRule(file_name="output.jsonl.zst", file_dir=str(tmp_path)).apply(data)
+    assert_frame_equal(data.get_main_output(), test_df[["A", "C", "D"]])
+
+
+def test_read_jsonl_file_streaming_widened_types(tmp_path, backend, monkeypatch):
+    if backend.name == "dask":
+        pytest.skip("dask doesn't run in streaming mode.")
+    monkeypatch.setattr(ReadJSONLinesFileRule, "BATCH_BLOCK_SIZE", 100)
+    # A is an int in the first blocks and a double in the last ones, B is null in the first blocks
+    lines = [f'{{"A": {idx}, "B": null}}' for idx in range(20)] + [f'{{"A": {idx}.5, "B": "b{idx}"}}' for idx in range(20, 30)]
+    (tmp_path / "input.jsonl").write_text("\n".join(lines) + "\n")
+    plan = Plan()
+    plan.add_rule(backend.rules.ReadJSONLinesFileRule(file_name="input.jsonl", file_dir=str(tmp_path)))
+    plan.add_rule(backend.rules.WriteJSONLinesFileRule(file_name="output.jsonl", file_dir=str(tmp_path)))
+    RuleEngine(plan).run_streaming(RuleData(), batch_size=7)
+    data = RuleData()
+    backend.rules.ReadJSONLinesFileRule(file_name="input.jsonl", file_dir=str(tmp_path), named_output="input").apply(data)
+    backend.rules.ReadJSONLinesFileRule(file_name="output.jsonl", file_dir=str(tmp_path), named_output="output").apply(data)
+    assert_frame_equal(data.get_named_output("output"), data.get_named_output("input"))
+
+
+def test_read_jsonl_files_different_columns_dask(tmp_path, backend):
+    if backend.name != "dask":
+        pytest.skip("Only dask reads the files lazily, with the columns of the first file.")
+    (tmp_path / "tst_1.jsonl").write_text('{"A": 1, "B": "b1"}\n{"A": 2.5, "B": "b2"}\n')
+    (tmp_path / "tst_2.jsonl").write_text('{"A": 3, "B": "b3", "C": true}\n')
+    with get_test_data(named_output="result") as data:
+        read_rule = backend.rules.ReadJSONLinesFileRule(file_name=r"tst_[0-9]\.jsonl", file_dir=str(tmp_path), regex=True, named_output="result")
+        read_rule.apply(data)
+        result = data.get_named_output("result")
+        # the types of the whole first file
+        assert dict(result.dtypes) == {"A": "float64", "B": "object"}
+        with pytest.raises(ValueError) as exc:
+            result.compute()
+        assert "tst_2.jsonl" in str(exc.value)
@@ -2,11 +2,17 @@ import datetime
 import glob
 import os
 from pandas import DataFrame
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
 
 from etlrules.exceptions import MissingColumnError
+from etlrules.backends.common.io.parquet_metadata import (
+    clear_parquet_metadata_cache, get_parquet_metadata_cache_stats, row_group_may_match,
+)
 from etlrules.backends.pandas import ReadParquetFileRule, WriteParquetFileRule
-from tests.utils.data import assert_frame_equal, get_test_data
+from tests.utils.data import assert_frame_equal, get_test_data, read_incremental_twice
+from tests.utils.http import range_handler, serve_http
 
 
 TEST_DF = [
@@ -108,3 +114,244 @@ def test_write_read_parquet_file_invalid_column_in_filters(backend):
     finally:
         for f in glob.glob(os.path.join("/tmp", "tst*.parquet")):
             os.remove(f)
+
+
+DATASET_DF = [
+    {"year": 2023, "desk": "fx", "A": 1, "C": "c1"},
+    {"year": 2023, "desk": "rates", "A": 2, "C": "c2"},
+    {"year": 2024, "desk": "fx", "A": 3, "C": "c3"},
+    {"year": 2024, "desk": "rates", "A": 4, "C": "c4"},
+    {"year": 2024, "desk": "fx", "A": 5, "C": "c5"},
+]
+
+
+def _write_dataset(lake_path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    df = DataFrame(DATASET_DF)
+    pq.write_to_dataset(pa.Table.from_pandas(df, preserve_index=False), str(lake_path), partition_cols=["year", "desk"])
+    # a corrupt file in a partition which must be pruned by the filters
+    os.makedirs(lake_path / "year=2025" / "desk=fx")
+    (lake_path / "year=2025" / "desk=fx" / "corrupt.parquet").write_text("not a parquet file")
+
+
+@pytest.mark.parametrize("columns,filters,expected", [
+    [None, [("year", "==", 2024)], [
+        {"A": 3, "C": "c3", "year": 2024, "desk": "fx"},
+        {"A": 4, "C": "c4", "year": 2024, "desk": "rates"},
+        {"A": 5, "C": "c5", "year": 2024, "desk": "fx"},
+    ]],
+    [["A", "desk"], [("year", "<", 2025), ("desk", "==", "fx")], [
+        {"A": 1, "desk": "fx"},
+        {"A": 3, "desk": "fx"},
+        {"A": 5, "desk": "fx"},
+    ]],
+    [["A"], [[("year", "==", 2023), ("A", ">", 1)], [("year", "==", 2024), ("desk", "in", ["rates"])]], [
+        {"A": 2},
+        {"A": 4},
+    ]],
+])
+def test_read_parquet_dataset(columns, filters, expected, tmp_path, backend):
+    _write_dataset(tmp_path / "lake")
+    with get_test_data(None, named_inputs={}, named_output="result") as data:
+        read_rule = backend.rules.ReadParquetFileRule(
+            file_name="lake", file_dir=str(tmp_path), columns=columns, filters=filters, dataset=True, named_output="result")
+        read_rule.apply(data)
+        expected = backend.DataFrame(data=expected, astype={"year": "int32"} if "year" in expected[0] else None)
+        actual = data.get_named_output("result")
+        # the order of the partitions is not guaranteed
+        actual = actual.sort("A") if backend.name == "polars" else actual.sort_values("A").reset_index(drop=True)
+        assert_frame_equal(actual, expected)
+
+
+def test_read_parquet_dataset_errors(tmp_path, backend):
+    _write_dataset(tmp_path / "lake")
+    with pytest.raises(ValueError):
+        backend.rules.ReadParquetFileRule(file_name="lake", file_dir=str(tmp_path), regex=True, dataset=True)
+    with get_test_data(None, named_inputs={}, named_output="result") as data:
+        read_rule = backend.rules.ReadParquetFileRule(
+            file_name="lake", file_dir=str(tmp_path), columns=["A", "UNKNOWN"], filters=[("year", "==", 2024)],
+            dataset=True, named_output="result")
+        with pytest.raises(MissingColumnError):
+            read_rule.apply(data)
+
+
+WRITE_DATASET_DF = [
+    {"A": idx, "year": 2021 + idx % 3, "desk": "fx" if idx % 2 else "rates", "S": (37 * idx) % 100}
+    for idx in range(100)
+]
+
+
+def test_write_parquet_dataset(tmp_path, backend):
+    test_df = backend.DataFrame(data=WRITE_DATASET_DF)
+    with get_test_data(test_df, named_inputs={"input": test_df}, named_output="result") as data:
+        write_rule = backend.rules.WriteParquetFileRule(
+            file_name="lake", file_dir=str(tmp_path), partition_by=["year", "desk"], row_group_size=5,
+            max_rows_per_file=12, sort_by=["S"], compression="zstd", named_input="input")
+        # the files written by previous runs are replaced
+        write_rule.apply(data)
+        write_rule.apply(data)
+        files = glob.glob(str(tmp_path / "lake" / "year=*" / "desk=*" / "part-*.parquet"))
+        assert {os.path.basename(os.path.dirname(os.path.dirname(f))) for f in files} == {"year=2021", "year=2022", "year=2023"}
+        total_rows = 0
+        for file_name in files:
+            metadata = pq.ParquetFile(file_name).metadata
+            assert metadata.num_rows <= 12
+            assert all(metadata.row_group(idx).num_rows <= 5 for idx in range(metadata.num_row_groups))
+            values = pq.read_table(file_name).column("S").to_pylist()
+            assert values == sorted(values)
+            total_rows += metadata.num_rows
+        assert total_rows == 100
+
+        read_rule = backend.rules.ReadParquetFileRule(
+            file_name="lake", file_dir=str(tmp_path), columns=["A"], filters=[("year", "==", 2022)], dataset=True, named_output="result")
+        read_rule.apply(data)
+        result = data.get_named_output("result")
+        result = result.compute() if backend.name == "dask" else result
+        assert sorted(result["A"]) == [idx for idx in range(100) if idx % 3 == 1]
+
+
+def test_write_parquet_file_row_groups_sorted(tmp_path, backend):
+    test_df = backend.DataFrame(data=WRITE_DATASET_DF)
+    with get_test_data(test_df, named_inputs={"input": test_df}, named_output="result") as data:
+        write_rule = backend.rules.WriteParquetFileRule(
+            file_name="tst.parquet", file_dir=str(tmp_path), row_group_size=10, sort_by=["S"], named_input="input")
+        write_rule.apply(data)
+        files = glob.glob(str(tmp_path / "tst*.parquet"))
+        if backend.name != "dask":
+            # dask writes one file per partition
+            assert len(files) == 1
+            assert pq.ParquetFile(files[0]).metadata.num_row_groups == 10
+        for file_name in files:
+            values = pq.read_table(file_name).column("S").to_pylist()
+            assert values == sorted(values)
+
+
+def test_write_parquet_dataset_errors(tmp_path, backend):
+    with pytest.raises(ValueError):
+        backend.rules.WriteParquetFileRule(file_name="lake", file_dir=str(tmp_path), row_group_size=10, max_rows_per_file=5)
+    test_df = backend.DataFrame(data=WRITE_DATASET_DF)
+    with get_test_data(test_df, named_inputs={"input": test_df}, named_output="result") as data:
+        write_rule = backend.rules.WriteParquetFileRule(
+            file_name="lake", file_dir=str(tmp_path), partition_by=["year", "UNKNOWN"], named_input="input")
+        with pytest.raises(MissingColumnError):
+            write_rule.apply(data)
+
+
+def _write_row_group_files(path, nb_files=3, file_name="data{idx}.parquet"):
+    for idx in range(nb_files):
+        table = pa.table({"A": list(range(idx * 100, (idx + 1) * 100)), "B": [f"b{val}" for val in range(100)]})
+        pq.write_table(table, str(path / file_name.format(idx=idx)), row_group_size=10)
+
+
+def test_read_parquet_files_skipped_by_statistics(tmp_path, monkeypatch, backend):
+    monkeypatch.delenv("ETLRULES_PARQUET_METADATA_CACHE_DIR", raising=False)
+    clear_parquet_metadata_cache()
+    if backend.name == "dask":
+        # dask reads all the parts written by dask for a file name (i.e. data*..parquet)
+        _write_row_group_files(tmp_path, file_name="data{idx}..parquet")
+        file_name, regex = "data.parquet", False
+    else:
+        _write_row_group_files(tmp_path)
+        file_name, regex = "data[0-9].parquet", True
+    with get_test_data(None, named_inputs={}, named_output="result", strict=False) as data:
+        read_rule = backend.rules.ReadParquetFileRule(
+            file_name=file_name, file_dir=str(tmp_path), columns=["A", "B"], regex=regex,
+            filters=[[("A", ">=", 150), ("A", "<", 170)], [("A", "==", 5)]], named_output="result")
+        read_rule.apply(data)
+        read_rule.apply(data)
+        result = data.get_named_output("result")
+        result = result.compute() if backend.name == "dask" else result
+        assert sorted(result["A"]) == [5] + list(range(150, 170))
+        # the footers of the files which are not pruned are looked up again when the files are read
+        assert get_parquet_metadata_cache_stats() == {
+            "hits": 3 if backend.name == "dask" else 7, "disk_hits": 0, "misses": 3,
+            "files_skipped": 2, "row_groups_skipped": 2 * (9 + 8 + 10)
+        }
+        if backend.name != "dask":
+            # a file which is rewritten is not served the stale footer
+            pq.write_table(pa.table({"A": [160], "B": ["new"]}), str(tmp_path / "data2.parquet"))
+            read_rule.apply(data)
+            assert list(data.get_named_output("result")["B"]) == ["b5"] + [f"b{val}" for val in range(50, 70)] + ["new"]
+            assert get_parquet_metadata_cache_stats()["misses"] == 4
+    clear_parquet_metadata_cache()
+
+
+def test_read_parquet_metadata_cache_on_disk(tmp_path, monkeypatch, backend):
+    if backend.name == "dask":
+        pytest.skip("dask reads the files via dask.dataframe.read_parquet")
+    monkeypatch.setenv("ETLRULES_PARQUET_METADATA_CACHE_DIR", str(tmp_path / "cache"))
+    clear_parquet_metadata_cache()
+    _write_row_group_files(tmp_path, nb_files=1)
+    with get_test_data(None, named_inputs={}, named_output="result", strict=False) as data:
+        read_rule = backend.rules.ReadParquetFileRule(
+            file_name="data0.parquet", file_dir=str(tmp_path), filters=[("A", ">", 12), ("A", "<", 27), ("A", "in", [15, 25])], named_output="result")
+        read_rule.apply(data)
+        assert len(os.listdir(tmp_path / "cache")) == 1
+        # a new process starts with an empty cache in memory
+        clear_parquet_metadata_cache()
+        read_rule.apply(data)
+        assert list(data.get_named_output("result")["A"]) == [15, 25]
+        assert get_parquet_metadata_cache_stats() == {
+            "hits": 0, "disk_hits": 1, "misses": 0, "files_skipped": 0, "row_groups_skipped": 8
+        }
+    clear_parquet_metadata_cache()
+
+
+@pytest.mark.parametrize("values,filters,expected", [
+    [[1, 2, 3], [[("A", "==", 4)]], False],
+    [[1, 2, 3], [[("A", "==", 4)], [("A", "<=", 1)]], True],
+    [[1, 2, 3], [[("A", ">", 1), ("A", "<", 2)]], True],
+    [[1, 2, 3], [[("A", ">", 3)]], False],
+    [[1, 2, 3], [[("A", "in", [0, 5])]], False],
+    [[1, 1, None], [[("A", "!=", 1)]], False],
+    [[1, 1, None], [[("A", "not in", [1, 2])]], False],
+    [[1.0, 1.0, float("nan")], [[("A", "!=", 1.0)]], True],
+    [["a", "b"], [[("A", ">", 1)]], True],
+    [[None, None], [[("A", "==", 1)]], True],
+    [[1, 2, 3], [[("UNKNOWN", "==", 1)]], True],
+])
+def test_row_group_may_match(values, filters, expected, tmp_path):
+    pq.write_table(pa.table({"A": values}), str(tmp_path / "tst.parquet"))
+    row_group = pq.read_metadata(str(tmp_path / "tst.parquet")).row_group(0)
+    assert row_group_may_match(row_group, filters) == expected
+
+
+@pytest.mark.parametrize("weak_etag", [False, True])
+@pytest.mark.parametrize("streaming", [False, True])
+def test_read_parquet_file_via_http_ranges(streaming, weak_etag, tmp_path, monkeypatch, backend):
+    if backend.name == "dask":
+        pytest.skip("dask reads the URIs lazily, via fsspec")
+    monkeypatch.delenv("ETLRULES_HTTP_CACHE_DIR", raising=False)
+    table = pa.table({
+        "A": list(range(10000)),
+        "B": [f"b{val}" * 20 for val in range(10000)],
+        "C": [float(val) for val in range(10000)],
+    })
+    pq.write_table(table, str(tmp_path / "data.parquet"), row_group_size=1000, compression="none")
+    served = []
+    with serve_http(range_handler(str(tmp_path), served, weak_etag=weak_etag)) as base_url:
+        read_rule = backend.rules.ReadParquetFileRule(
+            file_name=f"{base_url}/data.parquet", columns=["A"], filters=[("A", ">=", 150), ("A", "<", 170)], named_output="result")
+        if streaming:
+            result = [list(df["A"]) for df in read_rule.iter_batches(5)]
+            assert sum(result, []) == list(range(150, 170))
+        else:
+            with get_test_data(None, named_inputs={}, named_output="result") as data:
+                read_rule.apply(data)
+                assert list(data.get_named_output("result")["A"]) == list(range(150, 170))
+    # only the footer and the column chunks of A from the (single) row group matching the filters are downloaded
+    assert sum(served) < os.path.getsize(tmp_path / "data.parquet") / 10
+
+
+@pytest.mark.parametrize("columns", [None, ["A", "C"]])
+def test_read_parquet_files_incremental_no_new_files(columns, tmp_path, monkeypatch, backend):
+    if backend.name == "dask":
+        pytest.skip("dask reads the parts written by dask for a file name (i.e. data1*..parquet)")
+    pq.write_table(pa.table({"A": list(range(100)), "B": [True] * 100, "C": [f"c{idx}" for idx in range(100)]}), str(tmp_path / "data1.parquet"))
+    rule = backend.rules.ReadParquetFileRule(
+        "data[0-9]+.parquet", str(tmp_path), columns=columns, regex=True, manifest_file=str(tmp_path / "manifest.json"))
+    first, second = read_incremental_twice(backend, rule, monkeypatch)
+    assert len(first) == 100
+    # the columns and types come from the footer of the file
+    assert_frame_equal(second, first.head(0))
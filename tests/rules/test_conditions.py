@@ -65,6 +65,96 @@ def test_if_then_else_scenarios(condition_expression, output_column, then_value,
                 assert False
 
 
+CASES = [
+    {"condition_expression": "df['A'] > df['B']", "then_value": "A is greater"},
+    {"condition_expression": "df['A'] == df['B']", "then_value": "A equals B"},
+]
+
+
+@pytest.mark.parametrize("cases,output_column,else_value,else_column,input_df,input_astype,expected,expected_astype", [
+    [CASES, "O", "B is greater", None, [
+        {"A": 1, "B": 2}, {"A": 5, "B": 3}, {"A": 3, "B": 3}, {"A": 3}, {"B": 4},
+    ], None, [
+        {"A": 1, "B": 2, "O": "B is greater"},
+        {"A": 5, "B": 3, "O": "A is greater"},
+        {"A": 3, "B": 3, "O": "A equals B"},
+        {"A": 3, "O": "B is greater"},
+        {"B": 4, "O": "B is greater"},
+    ], None],
+    [CASES, "O", None, None, [
+        {"A": 1, "B": 2}, {"A": 5, "B": 3}, {"A": 3, "B": 3},
+    ], {"A": "Int64", "B": "Int64"}, [
+        {"A": 1, "B": 2, "O": None},
+        {"A": 5, "B": 3, "O": "A is greater"},
+        {"A": 3, "B": 3, "O": "A equals B"},
+    ], {"A": "Int64", "B": "Int64"}],
+    [[
+        {"condition_expression": "df['A'] < 2", "then_column": "C"},
+        {"condition_expression": "df['A'] < context.int_val + 2", "then_column": "D"},
+    ], "O", None, "B", INPUT_DF[:3], None, [
+        {"A": 1, "B": 2, "C": 3, "D": 4, "O": 3},
+        {"A": 5, "B": 3, "C": 1, "D": 9, "O": 3},
+        {"A": 3, "B": 4, "C": 2, "D": 1, "O": 1},
+    ], None],
+    [[
+        {"condition_expression": "df['A'] > 4", "then_value": 1.5},
+        {"condition_expression": "df['A'] > 2", "then_value": 2.5},
+        {"condition_expression": "df['A'] > 0", "then_value": 3.5},
+    ], "O", 0.0, None, {"A": [1, 5, 3, -1]}, None, {"A": [1, 5, 3, -1], "O": [3.5, 1.5, 2.5, 0.0]}, None],
+    [CASES, "O", "B is greater", None, {"A": [], "B": []}, {"A": "Int64", "B": "Int64"}, {"A": [], "B": [], "O": []}, {"A": "Int64", "B": "Int64", "O": "string"}],
+    [CASES, "O", None, "E", INPUT_DF, None, MissingColumnError, None],
+    [[{"condition_expression": "df['A'] > df['B']", "then_column": "E"}], "O", 1, None, INPUT_DF, None, MissingColumnError, None],
+    [CASES, "B", "B is greater", None, INPUT_DF, None, ColumnAlreadyExistsError, None],
+    [[{"condition_expression": "df['A' > df['B']", "then_value": 1}], "O", 0, None, INPUT_DF, None, ExpressionSyntaxError, None],
+    [[{"condition_expression": "df['A'] > df['UNKNOWN']", "then_value": 1}], "O", 0, None, INPUT_DF, None, KeyError, None],
+])
+def test_case_when_scenarios(cases, output_column, else_value, else_column, input_df, input_astype, expected, expected_astype, backend):
+    input_df = backend.DataFrame(input_df, astype=input_astype)
+    expected = backend.DataFrame(expected, astype=expected_astype) if isinstance(expected, (list, dict)) else expected
+    with context.set({"str_val": "STR1", "int_val": 2, "float_val": 3.5, "bool_val": True}):
+        with get_test_data(input_df, named_inputs={"input": input_df}, named_output="result") as data:
+            if isinstance(expected, backend.impl.DataFrame):
+                rule = backend.rules.CaseWhenRule(
+                    cases=cases, output_column=output_column, else_value=else_value, else_column=else_column,
+                    named_input="input", named_output="result")
+                rule.apply(data)
+                actual = data.get_named_output("result")
+                if backend.name == "dask" and rule._has_str_values():
+                    # all the dask partitions are string typed, as the meta
+                    expected = expected.astype({output_column: "string"})
+                assert_frame_equal(actual, expected)
+            elif issubclass(expected, Exception):
+                with pytest.raises(expected):
+                    rule = backend.rules.CaseWhenRule(
+                        cases=cases, output_column=output_column, else_value=else_value, else_column=else_column,
+                        named_input="input", named_output="result")
+                    rule.apply(data)
+            else:
+                assert False
+
+
+@pytest.mark.parametrize("cases,else_value", [
+    [CASES, "B is greater"],
+    [CASES, None],
+    [[{"condition_expression": "df['A'] > df['B']", "then_value": 1.5}], 0.0],
+])
+def test_case_when_dask_meta(cases, else_value, backend):
+    if backend.name != "dask":
+        pytest.skip("the meta is specific to dask")
+    import dask.dataframe as dd
+    import pandas as pd
+    input_df = dd.from_pandas(pd.DataFrame({"A": [1, 5, 3, 6], "B": [2, 3, 3, 1]}), npartitions=2)
+    # the second partition is empty
+    input_df = input_df[input_df["A"] < 4]
+    with get_test_data(input_df, named_inputs={"input": input_df}, named_output="result") as data:
+        rule = backend.rules.CaseWhenRule(cases=cases, output_column="O", else_value=else_value, named_input="input", named_output="result")
+        rule.apply(data)
+        result = data.get_named_output("result")
+        assert result.dtypes.to_dict() == result.compute().dtypes.to_dict()
+        for partition in result.partitions:
+            assert partition.compute().dtypes.to_dict() == result.dtypes.to_dict()
+
+
 @pytest.mark.parametrize("condition_expression,discard_matching_rows,named_output_discarded,input_df,input_dtype,expected,expected_dtype,discarded_expected,discarded_dtype", [
     ["df['A'] > df['B']", False, "discarded", [
         {"A": 1, "B": 2}, {"A": 5, "B": 3}, {"A": 3, "B": 4},
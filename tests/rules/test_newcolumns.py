@@ -1,6 +1,11 @@
 import datetime
+import logging
+import warnings
 import pytest
 
+from etlrules.backends.common import jit
+from etlrules.backends.common import expressions as expressions_module
+from etlrules.backends.common.expressions import clear_expressions_cache, shutdown_expression_workers
 from etlrules.data import context
 from etlrules.exceptions import ExpressionSyntaxError, ColumnAlreadyExistsError, UnsupportedTypeError
 from tests.utils.data import assert_frame_equal, get_test_data
@@ -92,6 +97,10 @@ NON_DF_OPS_SCENARIOS = [
         {"BitwiseShiftLeft": 1 >> 2}, {"BitwiseShiftLeft": 2 >> 3}, {"BitwiseShiftLeft": 3 >> 4}, {"BitwiseShiftLeft": 4 >> 5}, 
     ], None, None],
     ["BitwiseShiftLeftEmpty", "df['A'] >> df['B']", None, None, {"BitwiseShiftLeftEmpty": []}, "string", None],
+    ["Conditional", "df['A'] if df['C'] > 4 else df['C']", None, INPUT_DF, [
+        {"Conditional": 3}, {"Conditional": 4}, {"Conditional": 3}, {"Conditional": 4},
+    ], None, None],
+    ["ConditionalEmpty", "df['A'] if df['C'] > 4 else df['C']", None, None, {"ConditionalEmpty": []}, "string", None],
 ]
 
 
@@ -123,6 +132,16 @@ ERROR_SCENARIOS = [
 ]
 
 
+# dask infers the type of the row level expressions without computing the data,
+# so an empty dataframe gets the same type as a non-empty one (object when it cannot be inferred)
+DASK_ROWWISE_EMPTY_TYPES = {
+    "BitwiseShiftRightEmpty": "int64",
+    "BitwiseShiftLeftEmpty": "int64",
+    "ConditionalEmpty": "int64",
+    "IntStringConcat": "object",
+}
+
+
 @pytest.mark.parametrize("column_name,expression,expression_type,input_df_in,expected,expected_dtype,expected_info",
     DF_OPS_SCENARIOS +
     NON_DF_OPS_SCENARIOS +
@@ -134,6 +153,8 @@ def test_add_new_column(column_name, expression, expression_type, input_df_in, e
     input_df = backend.DataFrame(INPUT_DF, astype=INPUT_DF_TYPES)
     if input_df_in is None:
         input_df = backend.empty_df(input_df)
+        if backend.name == "dask":
+            expected_dtype = DASK_ROWWISE_EMPTY_TYPES.get(column_name, expected_dtype)
     expected = backend.DataFrame(expected, dtype=expected_dtype) if isinstance(expected, (list, dict)) else expected
     with context.set({"str_val": "STR1", "int_val": 2, "float_val": 3.5, "bool_val": True}):
         with get_test_data(input_df, named_inputs={"copy": input_df}, named_output="result") as data:
@@ -214,3 +235,258 @@ def test_add_row_numbers(output_column, start, step, strict, input_df_in, expect
                 assert expected_info in str(exc.value)
         else:
             assert False, f"Unexpected {type(expected)} in '{expected}'"
+
+
+NUMERIC_INPUT_DF = [
+    {"A": 1, "B": 2.5, "C": 3},
+    {"A": 2, "B": -3.0, "C": 4},
+    {"A": 3, "B": 4.5, "C": 15},
+    {"A": 4, "B": 0.0, "C": 4},
+]
+
+
+@pytest.mark.parametrize("column_name,expression,expected", [
+    ["R", "df['A'] + df['B'] * 2 > df['C']", [True, False, False, False]],
+    ["R", "df['A'] + df['B'] * 2 - df['C']", [3.0, -8.0, -3.0, 0.0]],
+    ["R", "-df['A'] / context.int_val + context.float_val", [3.0, 2.5, 2.0, 1.5]],
+    ["R", "df['A'] * df['C'] - 1", [2, 7, 44, 15]],
+    ["R", "df['A'] != df['C'] - 1", [True, True, True, True]],
+])
+def test_add_new_column_numeric_types(column_name, expression, expected, backend):
+    input_df = backend.DataFrame(NUMERIC_INPUT_DF, astype={"A": "int64", "B": "float64", "C": "int64"})
+    expected = backend.hconcat(input_df, backend.DataFrame({column_name: expected}))
+    with context.set({"int_val": 2, "float_val": 3.5}):
+        with get_test_data(input_df, named_inputs={"copy": input_df}, named_output="result") as data:
+            rule = backend.rules.AddNewColumnRule(column_name, expression, named_input="copy", named_output="result")
+            rule.apply(data)
+            assert_frame_equal(data.get_named_output("result"), expected)
+
+
+def test_add_new_column_eval_mode_memoized(caplog, backend):
+    clear_expressions_cache()
+    input_df = backend.DataFrame(INPUT_DF, astype=INPUT_DF_TYPES)
+    rule = backend.rules.AddNewColumnRule("Conditional", "df['A'] if df['C'] > 4 else df['C']", named_input="copy", named_output="result")
+    with caplog.at_level(logging.INFO, logger="etlrules.perf"):
+        for _ in range(3):
+            with get_test_data(input_df, named_inputs={"copy": input_df}, named_output="result") as data:
+                rule.apply(data)
+    eval_mode_logs = [record.getMessage() for record in caplog.records if "is evaluated" in record.getMessage()]
+    assert len(eval_mode_logs) == 1
+    assert "is evaluated rowwise" in eval_mode_logs[0]
+
+
+def test_add_new_column_expressions_cached(backend):
+    rule = backend.rules.AddNewColumnRule("Sum", "df['A'] + df['B']", named_input="copy", named_output="result")
+    rule2 = backend.rules.AddNewColumnRule.from_dict(rule.to_dict(), backend=backend.name)
+    assert rule2._column_expression is rule._column_expression
+    rule3 = backend.rules.AddNewColumnRule("Sum", "df['A'] - df['B']", named_input="copy", named_output="result")
+    assert rule3._column_expression is not rule._column_expression
+    clear_expressions_cache()
+    rule4 = backend.rules.AddNewColumnRule("Sum", "df['A'] + df['B']", named_input="copy", named_output="result")
+    assert rule4._column_expression is not rule._column_expression
+    assert rule4 == rule
+
+
+def test_jit_kernels_cache_bounded(monkeypatch):
+    if not jit.HAS_NUMBA:
+        pytest.skip("numba is not installed.")
+    import numpy as np
+    monkeypatch.setattr("etlrules.backends.common.expressions.EXPRESSIONS_CACHE_SIZE", 2)
+    clear_expressions_cache()
+    values = [np.array([1, 2, 3], dtype="int64")]
+    kernels = [jit.get_jit_kernel(f"c0 + {idx}", values, []) for idx in range(3)]
+    assert [kernel(values, []).tolist() for kernel in kernels] == [[1, 2, 3], [2, 3, 4], [3, 4, 5]]
+    # the least recently used kernel is evicted
+    assert [source for source, _ in jit._JIT_KERNELS] == ["c0 + 1", "c0 + 2"]
+    assert jit.get_jit_kernel("c0 + 2", values, []) is kernels[2]
+    clear_expressions_cache()
+    assert not jit._JIT_KERNELS
+
+
+@pytest.mark.parametrize("jit_min_rows", [0, 1_000_000])
+@pytest.mark.parametrize("column_name,expression,expected", [
+    ["R", "df['A'] if df['C'] > 4 else df['C']", [3, 4, 3, 4]],
+    ["R", "df['B'] * 2 if df['A'] % 2 == 0 else df['C'] - context.int_val", [1.0, -6.0, 13.0, 0.0]],
+    ["R", "df['A'] > 1 and df['C'] < 10", [False, True, False, True]],
+])
+def test_add_new_column_numeric_types_rowwise(column_name, expression, expected, jit_min_rows, monkeypatch, backend):
+    monkeypatch.setattr("etlrules.backends.common.jit.JIT_MIN_ROWS", jit_min_rows)
+    kernel_calls = []
+    get_jit_kernel = jit.get_jit_kernel
+
+    def get_jit_kernel_spy(*args, **kwargs):
+        kernel = get_jit_kernel(*args, **kwargs)
+        if kernel is None:
+            return None
+        def call_kernel(*args, **kwargs):
+            kernel_calls.append(kernel)
+            return kernel(*args, **kwargs)
+        return call_kernel
+
+    monkeypatch.setattr(jit, "get_jit_kernel", get_jit_kernel_spy)
+    input_df = backend.DataFrame(NUMERIC_INPUT_DF, astype={"A": "int64", "B": "float64", "C": "int64"})
+    expected = backend.hconcat(input_df, backend.DataFrame({column_name: expected}))
+    with context.set({"int_val": 2, "float_val": 3.5}):
+        with get_test_data(input_df, named_inputs={"copy": input_df}, named_output="result") as data:
+            rule = backend.rules.AddNewColumnRule(column_name, expression, named_input="copy", named_output="result")
+            rule.apply(data)
+            assert_frame_equal(data.get_named_output("result"), expected)
+    # evaluated by the jit compiled kernel rather than the python row by row fallback
+    assert bool(kernel_calls) == (jit.HAS_NUMBA and jit_min_rows == 0)
+
+
+def _apply_division_by_zero(backend, jit_min_rows, monkeypatch):
+    monkeypatch.setattr("etlrules.backends.common.jit.JIT_MIN_ROWS", jit_min_rows)
+    input_df = backend.DataFrame({"A": [1, 2, -1, 3], "B": [0, 4, 0, 2]}, astype={"A": "int64", "B": "int64"})
+    with get_test_data(input_df, named_inputs={"copy": input_df}, named_output="result") as data:
+        rule = backend.rules.AddNewColumnRule("R", "df['A'] / df['B'] if df['A'] > 0 else 0", named_input="copy", named_output="result")
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            rule.apply(data)
+            result = data.get_named_output("result")
+            if backend.name == "dask":
+                result = result.compute()
+    return result
+
+
+def test_add_new_column_jit_division_by_zero(monkeypatch, backend):
+    if not jit.HAS_NUMBA:
+        pytest.skip("numba is not installed.")
+    # at least JIT_MIN_ROWS rows, evaluated by the jit compiled kernel
+    result = _apply_division_by_zero(backend, 4, monkeypatch)
+    assert list(result["R"]) == [float("inf"), 0.5, 0.0, 1.5]
+    if backend.name == "polars":
+        # the rows are python values in polars, which raise on a division by zero
+        return
+    # the same result as the row by row evaluation (numpy semantics)
+    assert_frame_equal(result, _apply_division_by_zero(backend, 1_000_000, monkeypatch))
+
+
+def test_add_new_column_rowwise_scalar_types(monkeypatch, backend):
+    monkeypatch.setattr("etlrules.backends.common.jit.JIT_MIN_ROWS", 1_000_000)
+    input_df = backend.DataFrame(NUMERIC_INPUT_DF, astype={"A": "int64", "B": "float64", "C": "int64"})
+    with get_test_data(input_df, named_inputs={"copy": input_df}, named_output="result") as data:
+        rule = backend.rules.AddNewColumnRule("R", "df['A'] / df['B'] if df['A'] > 1 else 0.0", named_input="copy", named_output="result")
+        if backend.name == "polars":
+            # the rows are python values in polars, as with map_rows
+            with pytest.raises(ZeroDivisionError):
+                rule.apply(data)
+            return
+        # the numeric columns are passed as numpy scalars, as with df.apply
+        with pytest.warns(RuntimeWarning):
+            rule.apply(data)
+            result = data.get_named_output("result")
+            if backend.name == "dask":
+                result = result.compute()
+        assert list(result["R"]) == [0.0, 2 / -3.0, 3 / 4.5, float("inf")]
+
+
+@pytest.mark.parametrize("column_name,expression,expected", [
+    ["R", "df['A'] if df['C'] > 4 else df['C']", [3, 4, 3, 4]],
+    ["R", "str(df['A']) + context.str_val if df['A'] % 2 == 0 else 'odd'", ["odd", "2x", "odd", "4x"]],
+])
+def test_add_new_column_rowwise_parallel(column_name, expression, expected, monkeypatch, backend):
+    monkeypatch.setenv("ETLRULES_EXPRESSION_WORKERS", "2")
+    monkeypatch.setattr("etlrules.backends.common.expressions.PARALLEL_MIN_ROWS", 1)
+    monkeypatch.setattr("etlrules.backends.common.jit.JIT_MIN_ROWS", 1_000_000)
+    input_df = backend.DataFrame(NUMERIC_INPUT_DF, astype={"A": "int64", "B": "float64", "C": "int64"})
+    expected = backend.hconcat(input_df, backend.DataFrame({column_name: expected}))
+    with context.set({"str_val": "x"}):
+        with get_test_data(input_df, named_inputs={"copy": input_df}, named_output="result") as data:
+            rule = backend.rules.AddNewColumnRule(column_name, expression, named_input="copy", named_output="result")
+            rule.apply(data)
+            assert_frame_equal(data.get_named_output("result"), expected)
+
+
+def test_add_new_column_rowwise_parallel_pool_reused(monkeypatch, backend):
+    monkeypatch.setenv("ETLRULES_EXPRESSION_WORKERS", "2")
+    monkeypatch.setattr("etlrules.backends.common.expressions.PARALLEL_MIN_ROWS", 1)
+    monkeypatch.setattr("etlrules.backends.common.jit.JIT_MIN_ROWS", 1_000_000)
+    shutdown_expression_workers()
+    input_df = backend.DataFrame(NUMERIC_INPUT_DF, astype={"A": "int64", "B": "float64", "C": "int64"})
+    executors = []
+    for idx in range(2):
+        with context.set({"str_val": f"x{idx}"}):
+            with get_test_data(input_df, named_inputs={"copy": input_df}, named_output="result") as data:
+                rule = backend.rules.AddNewColumnRule(
+                    "R", "str(df['A']) + context.str_val if df['A'] % 2 == 0 else 'odd'", named_input="copy", named_output="result")
+                rule.apply(data)
+                result = data.get_named_output("result")
+                result = result.compute() if backend.name == "dask" else result
+                # the context values are sent with each evaluation to the shared pool
+                assert list(result["R"]) == ["odd", f"2x{idx}", "odd", f"4x{idx}"]
+        executors.append(expressions_module._EXECUTOR)
+    if backend.name != "dask":
+        # the dask partitions are evaluated in the current process
+        assert executors[0] is not None and executors[0] is executors[1]
+    shutdown_expression_workers()
+    assert expressions_module._EXECUTOR is None
+
+
+def test_add_new_column_rowwise_parallel_errors(monkeypatch, backend):
+    monkeypatch.setenv("ETLRULES_EXPRESSION_WORKERS", "2")
+    monkeypatch.setattr("etlrules.backends.common.expressions.PARALLEL_MIN_ROWS", 1)
+    input_df = backend.DataFrame(NUMERIC_INPUT_DF, astype={"A": "int64", "B": "float64", "C": "int64"})
+    with context.set({"str_val": "x"}):
+        with get_test_data(input_df, named_inputs={"copy": input_df}, named_output="result") as data:
+            rule = backend.rules.AddNewColumnRule("R", "df['A'] if df['C'] > context.unknown else 0", named_input="copy", named_output="result")
+            with pytest.raises(KeyError):
+                rule.apply(data)
+                result = data.get_named_output("result")
+                if backend.name == "dask":
+                    result.compute()
+
+
+@pytest.mark.parametrize("expression,expected_dtype", [
+    ["df['A'] << df['C']", "int64"],
+    ["df['B'] if df['A'] > 0 else df['C'] * 1.5", "float64"],
+    ["str(df['A']) + str(df['B'])", "object"],
+])
+def test_add_new_column_rowwise_doesnt_compute(expression, expected_dtype, backend):
+    if backend.name != "dask":
+        pytest.skip("Only dask builds the result lazily.")
+    import dask
+
+    def scheduler(*args, **kwargs):
+        assert False, "Adding the new column should not compute any data."
+
+    input_df = backend.DataFrame(NUMERIC_INPUT_DF, astype={"A": "int64", "B": "float64", "C": "int64"})
+    with get_test_data(input_df, named_inputs={"copy": input_df}, named_output="result") as data:
+        rule = backend.rules.AddNewColumnRule("NEW", expression, named_input="copy", named_output="result")
+        with dask.config.set(scheduler=scheduler):
+            rule.apply(data)
+            result = data.get_named_output("result")
+        assert str(result["NEW"].dtype) == expected_dtype
+
+
+@pytest.mark.parametrize("expression,expected", [
+    # fail on the dummy values of the meta dataframe
+    ["int(df['D']) + 1", [2, 3, 4, 5]],
+    ["{'x': 1.5, 'y': 2.5}[df['D']] if df['A'] >= 0 else 0.0", [1.5, 2.5, 1.5, 2.5]],
+    ["df['D'][5] if df['A'] >= 0 else ''", IndexError],
+])
+def test_add_new_column_rowwise_meta_dtype(expression, expected, backend):
+    if backend.name != "dask":
+        pytest.skip("Only dask builds the result lazily.")
+    import dask
+
+    def scheduler(*args, **kwargs):
+        assert False, "Adding the new column should not compute any data."
+
+    values = ["1", "2", "3", "4"] if expression.startswith("int(") else ["x", "y", "x", "y"]
+    input_df = backend.DataFrame([{"A": idx, "D": value} for idx, value in enumerate(values)], astype={"A": "int64", "D": "string"})
+    with get_test_data(input_df, named_inputs={"copy": input_df}, named_output="result") as data:
+        rule = backend.rules.AddNewColumnRule("NEW", expression, named_input="copy", named_output="result")
+        with dask.config.set(scheduler=scheduler):
+            rule.apply(data)
+            result = data.get_named_output("result")
+        # the type cannot be inferred without computing the data, the partitions are object typed as the meta
+        assert str(result["NEW"].dtype) == "object"
+        if isinstance(expected, list):
+            computed = result.compute()
+            assert str(computed["NEW"].dtype) == "object"
+            assert list(computed["NEW"]) == expected
+        else:
+            # the expression fails on the data too, the error is raised when computed
+            with pytest.raises(expected):
+                result.compute()
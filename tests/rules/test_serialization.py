@@ -88,6 +88,9 @@ ALL_RULES = [
                 named_output="result", name="BF", description="Some desc2 BF", strict=True)],
     ["IfThenElseRule", dict(condition_expression="df['A'] > df['B']", output_column="O", then_column="C", else_column="D", named_input="input", 
                 named_output="result", name="BF", description="Some desc2 BF", strict=True)],
+    ["CaseWhenRule", dict(cases=[{"condition_expression": "df['A'] > df['B']", "then_value": "A is greater"},
+                {"condition_expression": "df['A'] == df['B']", "then_column": "C"}], output_column="O", else_value="B is greater", named_input="input", 
+                named_output="result", name="BF", description="Some desc2 BF", strict=True)],
     ["FilterRule", dict(condition_expression="df['A'] > df['B']", discard_matching_rows=True, named_output_discarded="discarded", named_input="input", 
                 named_output="result", name="BF", description="Some desc2 BF", strict=True)],
     ["DateTimeLocalNowRule", dict(output_column="TimeNow", named_input="input", 
@@ -116,12 +119,42 @@ ALL_RULES = [
                 named_output="result", name="BF", description="Some desc2 BF", strict=True)],
     ["ReadCSVFileRule", dict(file_name="test.csv", file_dir="/home/myuser", regex=False, separator=",", header=True, 
                 named_output="result", name="BF", description="Some desc2 BF", strict=True)],
+    ["ReadCSVFileRule", dict(file_name="test[0-9]+.csv", file_dir="/home/myuser", regex=True, max_workers=4, 
+                named_output="result", name="BF", description="Some desc2 BF", strict=True)],
+    ["ReadCSVFileRule", dict(file_name="test.csv", file_dir="/home/myuser", column_types={"A": "int64", "B": "string"},
+                date_formats={"C": "%d/%m/%Y", "D": None}, use_pyarrow=True,
+                named_output="result", name="BF", description="Some desc2 BF", strict=True)],
+    ["ReadCSVFileRule", dict(file_name="test[0-9]+.csv", file_dir="/home/myuser", regex=True,
+                manifest_file="/home/myuser/state/manifest.json", manifest_hash=True,
+                named_output="result", name="BF", description="Some desc2 BF", strict=True)],
+    ["ReadCSVFileRule", dict(file_name="test.csv", file_dir="/home/myuser", blocksize=16_000_000,
+                named_output="result", name="BF", description="Some desc2 BF", strict=True)],
+    ["ReadCSVFileRule", dict(file_name="test[0-9]+.csv", file_dir="/home/myuser", regex=True,
+                schema_cache_file="/home/myuser/state/schemas.json",
+                named_output="result", name="BF", description="Some desc2 BF", strict=True)],
     ["ReadParquetFileRule", dict(file_name="test.csv", file_dir="/home/myuser", regex=False, columns=["A", "B", "C"], filters=[["A", ">=", 10], ["B", "==", True]], 
                 named_output="result", name="BF", description="Some desc2 BF", strict=True)],
+    ["ReadParquetFileRule", dict(file_name="lake", file_dir="/home/myuser", dataset=True, columns=["A", "B", "C"], filters=[["year", ">=", 2023]], 
+                named_output="result", name="BF", description="Some desc2 BF", strict=True)],
     ["WriteCSVFileRule", dict(file_name="test.csv.gz", file_dir="/home/myuser", separator=",", header=True, compression="gzip",
                 named_input="result", name="BF", description="Some desc2 BF", strict=True)],
+    ["WriteCSVFileRule", dict(file_name="out", file_dir="/home/myuser", compression="gzip", partitioned=True,
+                named_input="input", name="BF", description="Some desc2 BF", strict=True)],
+    ["WriteCSVFileRule", dict(file_name="test.csv.zst", file_dir="/home/myuser", compression="zstd", use_pyarrow=True, max_workers=4,
+                named_input="input", name="BF", description="Some desc2 BF", strict=True)],
     ["WriteParquetFileRule", dict(file_name="test.csv", file_dir="/home/myuser", compression="gzip", 
                 named_input="result", name="BF", description="Some desc2 BF", strict=True)],
+    ["WriteParquetFileRule", dict(file_name="lake", file_dir="/home/myuser", compression="zstd", partition_by=["year", "desk"],
+                row_group_size=10000, max_rows_per_file=100000, sort_by=["A"],
+                named_input="result", name="BF", description="Some desc2 BF", strict=True)],
+    ["ReadArrowFileRule", dict(file_name="test.arrow", file_dir="/home/myuser", columns=["A", "B"], memory_map=False,
+                named_output="result", name="BF", description="Some desc2 BF", strict=True)],
+    ["WriteArrowFileRule", dict(file_name="test.arrow", file_dir="/home/myuser", compression="zstd",
+                named_input="result", name="BF", description="Some desc2 BF", strict=True)],
+    ["ReadJSONLinesFileRule", dict(file_name="test.jsonl.gz", file_dir="/home/myuser", columns=["A", "B.C"], column_types={"A": "int64"},
+                flatten=True, named_output="result", name="BF", description="Some desc2 BF", strict=True)],
+    ["WriteJSONLinesFileRule", dict(file_name="test.jsonl.gz", file_dir="/home/myuser", compression="gzip",
+                named_input="result", name="BF", description="Some desc2 BF", strict=True)],
     ["ReadSQLQueryRule", dict(sql_engine="sqlite:///mydb.db", sql_query="SELECT * FROM MyTable", named_output="MyData", name="BF", description="Some desc2 BF", strict=True)],
     ["WriteSQLTableRule", dict(sql_engine="sqlite:///mydb.db", sql_table="MyTable", if_exists="append", named_input="input_data", name="BF", description="Some desc2 BF", strict=True)],
     ["ExplodeValuesRule", dict(input_column="to_explode", column_type="int64", named_input="input", named_output="result", name="name", description="description", strict=True)],
@@ -192,3 +192,89 @@ def test_run_produces_output_already_exists_in_input_data(backend):
     assert err is not None
     assert "Named output clashes. The following named outputs are produced by rules in the plan but they also exist in the input data, leading to ambiguity: {'input'}" in err
     assert valid is False
+
+
+def _read_file(backend, file_name, file_dir):
+    data = RuleData()
+    if file_name.endswith(".parquet"):
+        backend.rules.ReadParquetFileRule(file_name, file_dir).apply(data)
+    else:
+        backend.rules.ReadCSVFileRule(file_name, file_dir).apply(data)
+    return data.get_main_output()
+
+
+def _get_streaming_plan(backend, input_file_name, output_file_name, file_dir):
+    plan = Plan()
+    if input_file_name.endswith(".parquet"):
+        plan.add_rule(backend.rules.ReadParquetFileRule(input_file_name, file_dir, filters=[["A", ">", 2]]))
+    else:
+        plan.add_rule(backend.rules.ReadCSVFileRule(input_file_name, file_dir))
+    plan.add_rule(backend.rules.AddNewColumnRule("C", "df['A'] * 2"))
+    plan.add_rule(backend.rules.FilterRule("df['A'] % 3 == 0"))
+    plan.add_rule(backend.rules.StrUpperRule("B"))
+    if output_file_name.endswith(".parquet"):
+        plan.add_rule(backend.rules.WriteParquetFileRule(output_file_name, file_dir))
+    else:
+        plan.add_rule(backend.rules.WriteCSVFileRule(output_file_name, file_dir, compression="gzip" if output_file_name.endswith(".gz") else None))
+    return plan
+
+
+@pytest.mark.parametrize("input_file_name,output_file_name", [
+    ["input.csv", "output.csv"],
+    ["input.csv", "output.csv.gz"],
+    ["input.csv", "output.parquet"],
+    ["input.parquet", "output.csv"],
+    ["input.parquet", "output.parquet"],
+])
+def test_run_streaming(input_file_name, output_file_name, tmp_path, backend):
+    input_df = backend.DataFrame(data=[{"A": idx, "B": f"b{idx}"} for idx in range(25)])
+    if input_file_name.endswith(".parquet"):
+        backend.rules.WriteParquetFileRule(input_file_name, str(tmp_path)).apply(RuleData(input_df))
+    else:
+        backend.rules.WriteCSVFileRule(input_file_name, str(tmp_path)).apply(RuleData(input_df))
+
+    RuleEngine(_get_streaming_plan(backend, input_file_name, "expected_" + output_file_name, str(tmp_path))).run(RuleData())
+    rule_engine = RuleEngine(_get_streaming_plan(backend, input_file_name, output_file_name, str(tmp_path)))
+    if backend.name == "dask":
+        valid, err = rule_engine.validate_streaming()
+        assert valid is False
+        assert "cannot be applied on batches of rows" in err
+        with pytest.raises(InvalidPlanError):
+            rule_engine.run_streaming(RuleData(), batch_size=4)
+        return
+    assert rule_engine.validate_streaming() == (True, None)
+    rule_engine.run_streaming(RuleData(), batch_size=4)
+    result = _read_file(backend, output_file_name, str(tmp_path))
+    expected = _read_file(backend, "expected_" + output_file_name, str(tmp_path))
+    assert len(result) == (8 if input_file_name.endswith(".parquet") else 9)
+    assert_frame_equal(result, expected)
+
+
+def test_run_streaming_invalid_plans(backend):
+    plan = Plan()
+    plan.add_rule(backend.rules.ReadCSVFileRule("input.csv", "."))
+    plan.add_rule(backend.rules.AddNewColumnRule("C", "df['A'] * 2"))
+    plan.add_rule(backend.rules.SortRule(["A"]))
+    plan.add_rule(backend.rules.DedupeRule(["A"], name="dedupe A"))
+    plan.add_rule(backend.rules.WriteCSVFileRule("output.csv", "."))
+    rule_engine = RuleEngine(plan)
+    with pytest.raises(InvalidPlanError) as exc:
+        rule_engine.run_streaming(RuleData())
+    assert "SortRule(name=None, index=2), DedupeRule(name=dedupe A, index=3)" in str(exc.value)
+    valid, err = rule_engine.validate_streaming()
+    assert valid is False
+    assert "SortRule(name=None, index=2)" in err
+
+    plan = Plan()
+    plan.add_rule(backend.rules.AddNewColumnRule("C", "df['A'] * 2"))
+    plan.add_rule(backend.rules.WriteCSVFileRule("output.csv", "."))
+    with pytest.raises(InvalidPlanError) as exc:
+        RuleEngine(plan).run_streaming(RuleData())
+    assert "must start with a reader rule and end with a writer rule" in str(exc.value)
+
+    plan = Plan()
+    plan.add_rule(backend.rules.ReadCSVFileRule("input.csv", ".", named_output="input"))
+    plan.add_rule(backend.rules.WriteCSVFileRule("output.csv", ".", named_input="input"))
+    with pytest.raises(InvalidPlanError) as exc:
+        RuleEngine(plan).run_streaming(RuleData())
+    assert "Only pipeline plans can be run in streaming mode." in str(exc.value)
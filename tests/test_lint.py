@@ -0,0 +1,95 @@
+import os
+import pytest
+import sys
+from unittest.mock import patch
+
+from etlrules.lint import (
+    REGEX_READ_MAX_FILES, SEVERITY_HIGH, SEVERITY_MEDIUM,
+    get_sample_df_from_schema, lint_plan, run,
+)
+from etlrules.plan import Plan
+
+
+def _lint_rules(backend, rules, schema=None):
+    plan = Plan(context={"int_val": 2})
+    for rule in rules:
+        plan.add_rule(rule)
+    sample_df = get_sample_df_from_schema(schema, backend.name) if schema is not None else None
+    return lint_plan(plan, sample_df)
+
+
+@pytest.mark.parametrize("expression,schema,expected", [
+    ["df['A'] + df['B']", None, False],
+    ["df['A'] + df['B']", {"A": "int64", "B": "int64"}, False],
+    ["df['A'] if df['A'] > 1 else df['B']", None, True],
+    ["df['A'] if df['A'] > 1 else df['B']", {"A": "int64", "B": "int64"}, True],
+    ["df['A'] > 1 and df['B'] < context.int_val", None, True],
+    ["str(df['A']) + 'x'", None, True],
+    ["df['A'] + df['B']", {"A": "int64", "B": "string"}, True],
+    ["df['A'] + len(df['B'])", {"A": "int64", "B": "string"}, False],
+    ["df['A'] & df['B']", {"A": "int64", "B": "float64"}, True],
+])
+def test_lint_expressions(expression, schema, expected, backend):
+    if backend.name == "polars" and schema == {"A": "int64", "B": "string"}:
+        # polars vectorizes adding ints and strings (string concatenation)
+        expected = False
+    rules = [backend.rules.AddNewColumnRule("C", expression)]
+    findings = _lint_rules(backend, rules, schema)
+    assert [finding.severity for finding in findings] == ([SEVERITY_HIGH] if expected else [])
+    if expected:
+        assert expression in findings[0].message
+        assert findings[0].suggestion
+
+
+def test_lint_expressions_new_columns_added_to_sample(backend):
+    rules = [
+        backend.rules.AddNewColumnRule("C", "df['A'] * 2"),
+        backend.rules.FilterRule("df['C'] > df['B']"),
+        backend.rules.IfThenElseRule("df['C'] > 1 or df['B'] > 1", "D", then_value=1, else_value=2),
+    ]
+    findings = _lint_rules(backend, rules, {"A": "int64", "B": "int64"})
+    assert [(finding.rule_idx, finding.severity) for finding in findings] == [(2, SEVERITY_HIGH)]
+    assert "'or'" in findings[0].suggestion
+
+
+def test_lint_slow_rules(backend):
+    rules = [
+        backend.rules.ReadSQLQueryRule("sqlite:///mydb.db", "SELECT * FROM MyTable"),
+        backend.rules.ReadSQLQueryRule("sqlite:///mydb.db", "SELECT * FROM MyTable", column_types={"A": "int64"}),
+        backend.rules.AggregateRule(["A"], aggregations={"B": "sum", "C": "list"},
+                                    aggregation_expressions=None if backend.name == "dask" else {"D": "sum(values)"}),
+        backend.rules.StrSplitRejoinRule("B", separator=",", new_separator="|"),
+        backend.rules.StrSplitRule("B", separator=","),
+    ]
+    findings = _lint_rules(backend, rules)
+    if backend.name == "dask":
+        # dask doesn't support aggregation expressions and its StrSplitRule is not vectorized
+        expected = [(0, SEVERITY_MEDIUM), (2, SEVERITY_MEDIUM), (3, SEVERITY_MEDIUM), (4, SEVERITY_MEDIUM)]
+    else:
+        expected = [(0, SEVERITY_MEDIUM), (2, SEVERITY_MEDIUM), (2, SEVERITY_HIGH), (3, SEVERITY_MEDIUM)]
+    assert [(finding.rule_idx, finding.severity) for finding in findings] == expected
+    assert all(finding.suggestion for finding in findings)
+
+
+def test_lint_regex_reads(tmp_path, backend):
+    for idx in range(REGEX_READ_MAX_FILES + 1):
+        (tmp_path / f"data{idx}.csv").write_text("A\n1\n")
+    rules = [
+        backend.rules.ReadCSVFileRule("data[0-9]+.csv", str(tmp_path), regex=True, named_output="all"),
+        backend.rules.ReadCSVFileRule("data1[0-9].csv", str(tmp_path), regex=True, named_output="some"),
+        backend.rules.ReadCSVFileRule("data1.csv", str(tmp_path), named_output="one"),
+        backend.rules.ReadCSVFileRule("data[0-9]+.csv", "{context.missing_dir}", regex=True, named_output="unknown"),
+        backend.rules.ReadCSVFileRule("data[0-9]+.csv", str(tmp_path), regex=True, manifest_file=str(tmp_path / "manifest.json"), named_output="new"),
+    ]
+    findings = _lint_rules(backend, rules)
+    assert [(finding.rule_idx, finding.severity) for finding in findings] == [(0, SEVERITY_MEDIUM)]
+    assert f"matches {REGEX_READ_MAX_FILES + 1} files" in findings[0].message
+
+
+def test_lint_run(capsys):
+    args = ["lint.py", "-p", os.path.join("tests", "csv2db.yml"), "-b", "pandas", "--schema", "A:int64,B:string"]
+    with patch.object(sys, 'argv', args):
+        with pytest.raises(SystemExit) as exc:
+            run()
+    assert exc.value.code == 0
+    assert "0 finding(s)." in capsys.readouterr().out
@@ -94,3 +94,22 @@ class TestRule(RuleData):
         for name, df in self.named_inputs_copies.items():
             if name != self.named_output:
                 assert_frame_equal(df, self.get_named_output(name))
+
+
+def read_incremental_twice(backend, rule, monkeypatch):
+    """ Applies an incremental read rule twice, the second time without new files, and returns both results.
+
+    The second run doesn't read the files entirely (do_read), except with dask which builds the result lazily.
+    """
+    results = []
+    for idx in range(2):
+        if idx == 1 and backend.name != "dask":
+            def do_read(*args, **kwargs):
+                assert False, "The files should not be read entirely when there are no new files."
+            monkeypatch.setattr(rule, "do_read", do_read)
+        data = RuleData()
+        rule.apply(data)
+        data.commit()
+        result = data.get_main_output()
+        results.append(result.compute() if backend.name == "dask" else result)
+    return results
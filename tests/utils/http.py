@@ -0,0 +1,76 @@
+import functools
+import os
+import re
+import threading
+from contextlib import contextmanager
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+
+@contextmanager
+def serve_http(handler_class):
+    """ Serves http requests with handler_class in a background thread and yields the base url of the server. """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    """ Serves the files from a directory (without support for range requests), without logging the requests. """
+
+    def log_message(self, *args):
+        pass
+
+
+class RangeHandler(QuietHandler):
+    """ Serves the files from a directory with support for range requests and records the ranges served. """
+
+    def __init__(self, *args, served, unknown_size=False, weak_etag=False, **kwargs):
+        self.served = served
+        self.unknown_size = unknown_size
+        self.weak_etag = weak_etag
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        file_path = os.path.join(self.directory, self.path.lstrip("/"))
+        if not os.path.isfile(file_path):
+            self.send_error(404)
+            return
+        with open(file_path, "rb") as f:
+            content = f.read()
+        mtime_ns = os.stat(file_path).st_mtime_ns
+        etag = f'{"W/" if self.weak_etag else ""}"{mtime_ns}"'
+        last_modified = self.date_time_string(mtime_ns // 1_000_000_000)
+        match = re.fullmatch(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+        if_range = self.headers.get("If-Range")
+        # a weak ETag never matches If-Range (RFC 9110), the whole file is sent
+        if_range_matches = if_range is None or if_range == last_modified or (if_range == etag and not self.weak_etag)
+        if match and if_range_matches:
+            start, end = int(match.group(1)), min(int(match.group(2)), len(content) - 1)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{'*' if self.unknown_size else len(content)}")
+            content = content[start:end + 1]
+        else:
+            self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.write_content(content)
+        self.served.append(len(content))
+
+    def write_content(self, content: bytes) -> None:
+        self.wfile.write(content)
+
+
+def range_handler(directory, served, unknown_size=False, weak_etag=False):
+    """ Returns a RangeHandler class serving directory which appends the number of bytes of each response to served.
+
+    When unknown_size is True, the size of the files is not sent with the ranges (Content-Range: bytes start-end/*).
+    When weak_etag is True, the ETags are weak (W/"..."), which don't match If-Range.
+    """
+    return functools.partial(RangeHandler, directory=directory, served=served, unknown_size=unknown_size, weak_etag=weak_etag)